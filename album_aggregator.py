@@ -0,0 +1,77 @@
+"""
+Module for collecting the parts of a Telegram album (media group) before sending.
+Each album item arrives as its own update with the same media_group_id; items are
+buffered for a short window after the last one arrives and then handed over
+together, so an album is sent as one album. Messages outside albums never wait here.
+"""
+
+import logging
+import threading
+import time
+
+import send_queue
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds to wait after the latest item of an album before sending it ("album_flush_delay" in config.json)
+DEFAULT_FLUSH_DELAY = 1.0
+
+# Telegram albums hold at most this many items; a full album is sent right away
+MAX_ALBUM_SIZE = 10
+
+# Albums being collected: (chat_id, media_group_id) -> Album
+_albums = {}
+_albums_lock = threading.Lock()
+
+class Album:
+    """Items of one media group collected so far."""
+
+    __slots__ = ("bot", "items", "last_seen", "flush_delay", "on_complete")
+
+    def __init__(self, bot, flush_delay, on_complete):
+        self.bot = bot
+        self.items = []
+        self.last_seen = 0
+        self.flush_delay = flush_delay
+        self.on_complete = on_complete
+
+def add(bot, message, on_complete, flush_delay=DEFAULT_FLUSH_DELAY):
+    """Buffer an album item; on_complete(bot, items) is called once the album is complete.
+
+    Args:
+        bot: The Telegram bot instance
+        message: An album item (a message with media_group_id)
+        on_complete: Callable(bot, items) receiving the items sorted by message id
+        flush_delay (float): Seconds without a new item after which the album is complete
+    """
+    key = (message.chat_id, message.media_group_id)
+    with _albums_lock:
+        album = _albums.get(key)
+        is_new = album is None
+        if is_new:
+            album = _albums[key] = Album(bot, flush_delay, on_complete)
+        album.items.append(message)
+        album.last_seen = time.time()
+        is_full = len(album.items) >= MAX_ALBUM_SIZE
+
+    if is_full:
+        send_queue.enqueue(message.chat_id, _flush, key)
+    elif is_new:
+        send_queue.enqueue_at(time.time() + flush_delay, message.chat_id, _flush, key)
+
+def _flush(key):
+    """Hand a complete album over, or check again later if items are still arriving."""
+    with _albums_lock:
+        album = _albums.get(key)
+        if album is None:
+            return
+        wait = album.last_seen + album.flush_delay - time.time()
+        if wait > 0 and len(album.items) < MAX_ALBUM_SIZE:
+            send_queue.enqueue_at(time.time() + wait, key[0], _flush, key)
+            return
+        del _albums[key]
+
+    items = sorted(album.items, key=lambda item: item.message_id)
+    logger.info(f"Collected album {key[1]} with {len(items)} item(s)")
+    album.on_complete(album.bot, items)
@@ -0,0 +1,151 @@
+"""
+Module for handling Arabic text normalization in the Telegram bot.
+Text is normalized once per message (diacritics and tatweel removed, alef forms,
+ta marbuta and alef maqsura unified, case folded) so the blacklist, whitelist,
+duplicate and replacement matchers can match spelling variants of the same word.
+"""
+
+import functools
+import logging
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
+import config_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Features that can opt into normalization, with their menu labels
+FEATURES = {
+    "blacklist": "القائمة السوداء",
+    "whitelist": "القائمة البيضاء",
+    "duplicate": "فلتر التكرار",
+    "replacements": "الاستبدال"
+}
+
+# Tashkeel (fathatan .. sukun), superscript alef and tatweel are dropped
+_REMOVED_CHARS = frozenset(chr(code) for code in range(0x064B, 0x0653)) | {'ٰ', 'ـ'}
+
+# Letter variants mapped to one form
+_CHAR_MAP = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ة': 'ه',
+    'ى': 'ي'
+}
+
+# Number of normalized texts kept; every filter stage of a message hits the same entry
+NORMALIZE_CACHE_SIZE = 256
+
+class NormalizedText:
+    """Normalized text together with a map back to the original text.
+
+    offsets[i] is the index in the original text of normalized character i;
+    offsets has one extra entry for the end of the text. A span therefore ends
+    where the next kept character starts, so dropped characters after its last
+    letter (its diacritics) stay with it.
+    """
+
+    __slots__ = ("original", "text", "offsets")
+
+    def __init__(self, original, text, offsets):
+        self.original = original
+        self.text = text
+        self.offsets = offsets
+
+    def to_original_span(self, start, end):
+        """Map a [start, end) span of the normalized text to the original text."""
+        return self.offsets[start], self.offsets[end]
+
+@functools.lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(text):
+    """Normalize Arabic (and Latin) text for matching.
+
+    Results are cached, so the filters and transforms of one message share
+    a single normalization pass.
+
+    Args:
+        text (str): The original text
+
+    Returns:
+        NormalizedText: The normalized text and its offset map
+    """
+    return _normalize(text)
+
+def _normalize(text):
+    """Normalize a text without going through the message cache."""
+    chars = []
+    offsets = []
+    for index, char in enumerate(text):
+        if char in _REMOVED_CHARS:
+            continue
+        for folded in _CHAR_MAP.get(char) or char.casefold():
+            chars.append(folded)
+            offsets.append(index)
+
+    offsets.append(len(text))
+    return NormalizedText(text, ''.join(chars), offsets)
+
+def normalize_term(term):
+    """Return the normalized form of a word or pattern entered by the admin.
+
+    Terms bypass the cache so compiling a long word list does not evict messages.
+    """
+    return _normalize(term).text
+
+def normalize_pattern(pattern):
+    """Return a regex pattern with its Arabic letters normalized.
+
+    Escapes, letter case and regex syntax are kept as written; callers compile
+    the result with re.IGNORECASE to match the casefolded text.
+    """
+    chars = []
+    escaped = False
+    for char in pattern:
+        if escaped or char == '\\':
+            escaped = not escaped
+            chars.append(char)
+        elif char not in _REMOVED_CHARS:
+            chars.append(_CHAR_MAP.get(char, char))
+    return ''.join(chars)
+
+def is_enabled(feature, config=None):
+    """Check if normalization is enabled for a feature (blacklist, whitelist, duplicate, replacements)."""
+    if config is None:
+        config = config_store.get_config()
+    return bool(config.get("arabic_normalization", {}).get(feature, False))
+
+def arabic_normalization_menu(update, context):
+    """Show the Arabic normalization menu."""
+    query = update.callback_query
+    query.answer()
+
+    settings = config_store.get_config().get("arabic_normalization", {})
+
+    keyboard = [
+        [InlineKeyboardButton(
+            f"{label}: {'✅ مفعّل' if settings.get(feature, False) else '❌ معطّل'}",
+            callback_data=f'toggle_arabic_normalization_{feature}'
+        )]
+        for feature, label in FEATURES.items()
+    ]
+    keyboard.append([InlineKeyboardButton("🔙 العودة", callback_data='advanced_filters_menu')])
+
+    query.edit_message_text(
+        '🔤 *توحيد الحروف العربية*\n\n'
+        'عند التفعيل تتم المطابقة بعد إزالة التشكيل والتطويل وتوحيد أشكال الألف (أ إ آ ا) '
+        'والتاء المربوطة والهاء والألف المقصورة والياء.\n\n'
+        'مثال: كلمة "مُبَارَكَة" تطابق "مباركه".\n\n'
+        'اختر الميزات التي تستخدم التوحيد:',
+        parse_mode=ParseMode.MARKDOWN,
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+def toggle_arabic_normalization(update, context, feature):
+    """Toggle normalization for one feature and show the menu again."""
+    if feature not in FEATURES:
+        return arabic_normalization_menu(update, context)
+
+    config = config_store.load_config()
+    settings = config.setdefault("arabic_normalization", {})
+    settings[feature] = not settings.get(feature, False)
+    config_store.save_config(config)
+
+    arabic_normalization_menu(update, context)
@@ -3,7 +3,6 @@ Module for handling scheduled posts (autopost) functionality in the Telegram bot
 This module contains all functions related to scheduling posts to be automatically sent at specific times.
 """
 
-import json
 import logging
 import time
 from datetime import datetime, timedelta
@@ -11,6 +10,7 @@ import threading
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext, ConversationHandler
 import main
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -26,23 +26,11 @@ is_scheduler_running = False
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def save_posts():
     """Save scheduled posts to config file"""
@@ -5,6 +5,7 @@ This module contains all functions related to blacklisted words and phrases.
 
 import logging
 import main
+import keyword_matcher
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 
@@ -18,18 +19,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Helper function to check if a message contains blacklisted words
-def contains_blacklisted_words(text, blacklist):
-    """Check if a message contains any blacklisted words."""
-    if not text or not blacklist:
-        return False
+def find_blacklisted_word(text, blacklist, normalize=False):
+    """Return the first blacklisted word found in a message, or None.
     
-    text_lower = text.lower()
-    for word in blacklist:
-        if word.lower() in text_lower:
-            return True
+    With normalize=True Arabic spelling variants (diacritics, alef forms, ...) also match.
+    """
+    if not text or not blacklist:
+        return None
     
-    return False
+    return keyword_matcher.get_matcher(blacklist, normalize).search(text)
 
 # Main menu for blacklist management
 def toggle_blacklist_status(update, context):
@@ -0,0 +1,50 @@
+"""
+Module with a Bloom filter for string keys.
+The filter answers "definitely not seen" or "maybe seen" from a fixed-size bit
+array, so an on-disk index behind it only has to be read for keys it may hold.
+"""
+
+import hashlib
+import math
+
+class BloomFilter:
+    """A Bloom filter sized for an expected number of keys and false positive rate."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        # Keys added that were not (maybe) present already
+        self.count = 0
+
+    def _positions(self, key):
+        """Return the bit positions of a key (double hashing over one 128-bit digest)."""
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hash_count)]
+
+    def add(self, key):
+        """Add a key; returns True if it was not in the filter before."""
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def is_full(self):
+        """Check if the filter holds as many keys as it was sized for."""
+        return self.count >= self.capacity
+
+    def clear(self):
+        """Remove all keys."""
+        self.bits = bytearray(len(self.bits))
+        self.count = 0
@@ -6,9 +6,18 @@ from datetime import datetime
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 import main
-import whitelist_handler
-import char_limit_handler
+import config_store
+import forward_pipeline
+import copy_engine
+import send_queue
+import retry_engine
+import dead_letter_handler
+import message_map_store
+import routing_table
+import fanout_planner
+import album_aggregator
 import delay_handler
+import rate_limit_handler
 import translation_handler
 
 # Configure logging
@@ -264,6 +273,12 @@ def status_command(update, context):
     # Get forwarding status
     forwarding_status = forwarding_control_handler.get_forwarding_status()
 
+    # Get the enabled filter stages
+    filter_stages = ", ".join(forward_pipeline.get_pipeline().stage_names) or "لا يوجد"
+
+    # Get send queue metrics
+    queue_stats = send_queue.get_queue_stats()
+
     update.message.reply_text(
         f'🤖 *حالة البوت*\n\n'
         f'▶️ *يعمل منذ:* {stats["started_at"].strftime("%Y-%m-%d %H:%M:%S")}\n'
@@ -275,6 +290,10 @@ def status_command(update, context):
         f'📝 *طريقة النشر:* {forward_mode_text}\n'
         f'⚙️ *حالة التوجيه:* {forwarding_status}\n'
         f'⏱ *حد الرسائل:* {rate_limit_status}\n'
+        f'🧩 *مراحل الفلترة:* `{filter_stages}`\n'
+        f'📤 *طابور الإرسال:* {queue_stats["depth"]} رسالة ({queue_stats["workers"]} عمال)\n'
+        f'⏳ *رسائل مؤجلة:* {queue_stats["scheduled"]}\n'
+        f'⌛ *زمن الانتظار:* متوسط {queue_stats["avg_latency"]:.2f} ث / أقصى {queue_stats["max_latency"]:.2f} ث\n'
         f'❌ *الأخطاء:* {stats["errors"]}',
         parse_mode=ParseMode.MARKDOWN
     )
@@ -410,6 +429,9 @@ def admin_panel(update, context):
             InlineKeyboardButton("📅 النشر التلقائي", callback_data='autopost_menu'),
             InlineKeyboardButton("⏰ ساعات العمل", callback_data='working_hours_menu')
         ],
+        [
+            InlineKeyboardButton("📮 الرسائل الفاشلة", callback_data='dead_letters_menu')
+        ],
         [
             InlineKeyboardButton("🔄 إعادة تشغيل البوت", callback_data='restart_bot')
         ],
@@ -459,6 +481,7 @@ def button_handler(update, context):
     import working_hours_handler
     import text_format_handler
     import button_removal_handler
+    import arabic_normalization_handler
     import user_settings_handler
 
     query = update.callback_query
@@ -650,6 +673,9 @@ def button_handler(update, context):
             [
                 InlineKeyboardButton("♻️ فلتر التكرار", callback_data='duplicate_filter_menu')
             ],
+            [
+                InlineKeyboardButton("🔤 توحيد الحروف العربية", callback_data='arabic_normalization_menu')
+            ],
             [
                 InlineKeyboardButton("🔄 فلتر المعاد توجيهه", callback_data='forwarded_filter_menu')
             ],
@@ -1352,6 +1378,14 @@ def button_handler(update, context):
         # Show delay settings menu
         delay_handler.delay_menu(update, context)
 
+    elif query.data == 'rate_limit_menu':
+        # Show rate limit settings menu
+        rate_limit_handler.rate_limit_menu(update, context)
+    elif query.data == 'toggle_rate_limit_status':
+        rate_limit_handler.toggle_rate_limit_status(update, context)
+    elif query.data == 'toggle_rate_limit_mode':
+        rate_limit_handler.toggle_rate_limit_mode(update, context)
+
     elif query.data == 'char_limit_menu':
         # Show character limit menu
         char_limit_handler.char_limit_menu(update, context)
@@ -1388,10 +1422,26 @@ def button_handler(update, context):
         # Toggle duplicate filter status
         duplicate_filter_handler.toggle_duplicate_filter_status(update, context)
 
+    elif query.data == 'toggle_duplicate_mode':
+        duplicate_filter_handler.toggle_duplicate_mode(update, context)
+
+    elif query.data == 'cycle_duplicate_threshold':
+        duplicate_filter_handler.cycle_duplicate_threshold(update, context)
+
+    elif query.data == 'cycle_duplicate_memory_hours':
+        duplicate_filter_handler.cycle_duplicate_memory_hours(update, context)
+
     elif query.data == 'clear_message_memory':
         # Clear stored message hashes
         duplicate_filter_handler.clear_message_memory(update, context)
 
+    elif query.data == 'arabic_normalization_menu':
+        arabic_normalization_handler.arabic_normalization_menu(update, context)
+
+    elif query.data.startswith('toggle_arabic_normalization_'):
+        arabic_normalization_handler.toggle_arabic_normalization(
+            update, context, query.data.replace('toggle_arabic_normalization_', ''))
+
     elif query.data == 'language_filter_menu':
         # Show language filter menu
         language_filter_handler.language_filter_menu(update, context)
@@ -1989,46 +2039,38 @@ def cancel_command(update, context):
     )
     return ConversationHandler.END
 
-def apply_text_replacements(text, replacements):
-    """Apply text replacements to a string."""
-    if not text or not replacements:
-        return text
+def send_to_target(bot, message, target_channel_id, config):
+    """Send one message to the target channel and return the sent Message.
 
-    result = text
-    for replacement in replacements:
-        pattern = replacement.get('pattern', '')
+    This is the only place that talks to Telegram for a forwarded message, so
+    every message costs exactly one outbound API call.
+    """
+    forward_mode = config.get("forward_mode", "forward")
 
-        # Support both key names: 'replace_with' and 'replacement'
-        replace_with = replacement.get('replace_with', '')
-        if not replace_with:
-            replace_with = replacement.get('replacement', '')
+    # Forward based on selected mode
+    if forward_mode == "forward":
+        # Forward the message to the target channel (with "Forwarded from" tag)
+        sent_message = bot.forward_message(
+            chat_id=target_channel_id,
+            from_chat_id=message.chat_id,
+            message_id=message.message_id
+        )
+        logger.info(f"Successfully forwarded message {message.message_id} with 'forwarded from' tag")
+    else:
+        # Copy the message as a new message (without "Forwarded from" tag)
+        sent_message = copy_engine.copy_to_target(bot, message, target_channel_id, config)
+        logger.info(f"Successfully copied and sent message {message.message_id} without 'forwarded from' tag")
 
-        if pattern and isinstance(result, str):
-            result = result.replace(pattern, replace_with)
+    return sent_message
 
-    return result
+def forward_message(update, context):
+    """Forward messages from a source channel to its target channels.
 
-def forward_message(update, context, target_channel_id):
-    """Forward messages from source channel to target channel."""
-    # Import all the required handlers
-    import media_filters_handler
-    import replacements_handler
-    import blacklist_handler
-    import whitelist_handler
-    import rate_limit_handler
-    import forwarding_control_handler
-    import message_customization_handler
-    import link_cleaner_handler
-    import forwarded_filter_handler
-    import duplicate_filter_handler
-    import language_filter_handler
-    import inline_button_filter_handler
-    import char_limit_handler
-    import delay_handler
-    import translation_handler
-    import working_hours_handler
-    import text_format_handler
-    import button_removal_handler
+    The routes for the message's chat are looked up in the routing table and
+    planned by the fan-out planner: each route runs its filters once, and
+    targets sharing a transform profile share one transformed text while
+    their sends run in parallel on the sender workers.
+    """
     try:
         message = update.message or update.channel_post
 
@@ -2036,474 +2078,137 @@ def forward_message(update, context, target_channel_id):
             logger.warning("Received update with no message")
             return
 
-        logger.info(f"Forwarding message from channel {message.chat_id} to {target_channel_id}")
-
-        # Check if forwarding is enabled
-        if not forwarding_control_handler.should_forward_message(message.date):
-            logger.info(f"Forwarding is disabled. Skipping message {message.message_id}.")
+        routes = routing_table.get_routing_table().get_routes(message.chat_id)
+        if not routes:
             return
 
-        # Check if current time is within working hours
-        if not working_hours_handler.is_within_working_hours():
-            logger.info(f"Outside of working hours. Skipping message {message.message_id}.")
+        if message.media_group_id:
+            # Album items are collected and sent together; other messages go out right away
+            album_aggregator.add(context.bot, message, forward_album, config_store.get_config().get(
+                "album_flush_delay", album_aggregator.DEFAULT_FLUSH_DELAY))
             return
 
-        # Check rate limit
-        if not rate_limit_handler.should_forward_message():
-            logger.info(f"Rate limit reached. Skipping message {message.message_id}.")
-            return
+        for group in fanout_planner.plan(message, routes):
+            for target, config in group.sends:
+                queue_send(context.bot, message, target, config)
 
-        # Check character limit
-        message_text = message.text or message.caption or ""
-        if not char_limit_handler.should_forward_message_by_length(message_text):
-            logger.info(f"Message exceeds character limit. Skipping message {message.message_id}.")
-            return
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error(f"Error forwarding message: {str(e)}")
 
-        # Apply delay if enabled
-        delay_handler.should_delay_message()
+def queue_send(bot, message, target_channel_id, config):
+    """Queue a filtered message for one target, applying its rate limit and delay."""
+    logger.info(f"Forwarding message from channel {message.chat_id} to {target_channel_id}")
 
-        # Get current forward mode, media filters, text replacements, and blacklist from config
-        config = main.load_config()
-        forward_mode = config.get("forward_mode", "forward")
-        media_filters = config.get("media_filters", {})
-        text_replacements = config.get("text_replacements", [])
-        blacklist = config.get("blacklist", [])
-
-        # Determine message type for filtering
-        message_type = None
-
-        if message.text and not message.photo and not message.video and not message.audio and not message.voice and not message.document and not message.animation and not message.sticker and not message.video_note and not message.game and not message.poll and not message.contact and not message.location and not message.venue:
-            message_type = "text"
-        elif message.photo:
-            message_type = "photo"
-        elif message.video:
-            message_type = "video"
-        elif message.audio:
-            message_type = "audio"
-        elif message.voice:
-            message_type = "voice"
-        elif message.document:
-            message_type = "document"
-        elif message.animation:
-            message_type = "animation"
-        elif message.sticker:
-            message_type = "sticker"
-        elif message.video_note:
-            message_type = "video_note"
-        elif message.poll:
-            message_type = "poll"
-        elif message.game:
-            message_type = "game"
-        elif message.contact:
-            message_type = "contact"
-        elif message.location:
-            message_type = "location"
-        elif message.venue:
-            message_type = "venue"
-
-        # Check if this message type should be forwarded
-        if message_type:
-            is_allowed = media_filters.get(message_type, True)
-            if not is_allowed:
-                logger.info(f"Message type '{message_type}' is filtered out. Skipping message {message.message_id}")
-                return
-
-        # Check if message contains blacklisted words (only if blacklist is enabled)
-        blacklist_enabled = config.get('blacklist_enabled', True)
-        message_text = message.text or message.caption or ""
-
-        if blacklist_enabled and blacklist_handler.contains_blacklisted_words(message_text, blacklist):
-            logger.info(f"Message {message.message_id} contains blacklisted words. Skipping message.")
-            return
+    # Reserve a rate limit slot for the target; over-limit messages are deferred or dropped
+    rate_slot = rate_limit_handler.reserve_send_slot(target_channel_id, config)
+    if rate_slot is False:
+        logger.info(f"Message {message.message_id} dropped by the rate limit for {target_channel_id}")
+        return
 
-        # Check whitelist if enabled (only forward if message contains whitelisted words)
-        whitelist_enabled = config.get('whitelist_enabled', False)
-        whitelist = config.get('whitelist', [])
+    # Reserve a send slot; delayed messages are scheduled instead of sleeping
+    send_at = max(rate_slot or 0, delay_handler.reserve_send_time(target_channel_id, config) or 0)
+    if send_at:
+        delay_handler.schedule_delayed_send(deliver_message, bot, message, target_channel_id, config, send_at)
+    else:
+        # Hand the send off to the sender workers so the dispatcher is free for the next update
+        send_queue.enqueue(target_channel_id, deliver_message, bot, message, target_channel_id, config)
 
-        if whitelist_enabled and whitelist and not whitelist_handler.contains_whitelisted_words(message_text, whitelist):
-            logger.info(f"Message {message.message_id} does not contain any whitelisted words. Skipping message.")
-            return
+def forward_album(bot, items):
+    """Plan a complete album: every item is filtered, and each target gets the items its routes accept."""
+    try:
+        routes = routing_table.get_routing_table().get_routes(items[0].chat_id)
+        accepted = {}
+        for item in items:
+            for group in fanout_planner.plan(item, routes):
+                for target, config in group.sends:
+                    accepted.setdefault(target, (config, []))[1].append(item)
 
-        # Check forwarded message filter (skip messages forwarded from other channels if enabled)
-        if not forwarded_filter_handler.should_forward_forwarded_message(message):
-            logger.info(f"Message {message.message_id} is forwarded from another source. Skipping message.")
-            return
+        for target, (config, target_items) in accepted.items():
+            queue_album_send(bot, target_items, target, config)
 
-        # Check duplicate message filter (skip if duplicate content)
-        if not duplicate_filter_handler.should_forward_duplicate_message(message):
-            logger.info(f"Message {message.message_id} is a duplicate. Skipping message.")
-            return
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error(f"Error forwarding album: {str(e)}")
 
-        # Check language filter (skip based on language detection)
-        if not language_filter_handler.should_forward_by_language(message):
-            logger.info(f"Message {message.message_id} filtered by language settings. Skipping message.")
-            return
+def queue_album_send(bot, items, target_channel_id, config):
+    """Queue an album for one target; every item takes a rate limit slot, the album one delay."""
+    logger.info(f"Forwarding album of {len(items)} item(s) from channel {items[0].chat_id} to {target_channel_id}")
 
-        # Check link filter (skip messages with links if enabled)
-        if not link_cleaner_handler.should_forward_message_with_links(message):
-            logger.info(f"Message {message.message_id} contains links and link filter is enabled. Skipping message.")
-            return
+    rate_slot = rate_limit_handler.reserve_send_slot(target_channel_id, config, count=len(items))
+    if rate_slot is False:
+        logger.info(f"Album {items[0].media_group_id} dropped by the rate limit for {target_channel_id}")
+        return
 
-        # Check inline button filter (skip messages with inline buttons if enabled)
-        if not inline_button_filter_handler.should_forward_message_with_buttons(message):
-            logger.info(f"Message {message.message_id} contains inline buttons and button filter is enabled. Skipping message.")
-            return
+    send_at = max(rate_slot or 0, delay_handler.reserve_send_time(target_channel_id, config) or 0)
+    if send_at:
+        # Delayed albums are scheduled in memory only; they are not restored after a restart
+        send_queue.enqueue_at(send_at, target_channel_id, deliver_album, bot, items, target_channel_id, config)
+    else:
+        send_queue.enqueue(target_channel_id, deliver_album, bot, items, target_channel_id, config)
+
+def deliver_album(bot, items, target_channel_id, config):
+    """Send an album to the target channel with one sendMediaGroup call; runs on a sender worker."""
+    if (config.get("forward_mode", "forward") == "forward" or len(items) == 1
+            or not copy_engine.can_copy_as_album(items)):
+        # Forwarding keeps the source album by sending its items in order; each
+        # item is retried (and dead-lettered) on its own so none is sent twice
+        _deliver_items(bot, items, target_channel_id, config)
+        return
 
-        # Forward based on selected mode
-        if forward_mode == "forward":
-            # Forward the message to the target channel (with "Forwarded from" tag)
-            context.bot.forward_message(
-                chat_id=target_channel_id,
-                from_chat_id=message.chat_id,
-                message_id=message.message_id
-            )
-            logger.info(f"Successfully forwarded message {message.message_id} with 'forwarded from' tag")
-        else:
-            # Copy and send the message as a new message (without "Forwarded from" tag)
-            # Handle different message types
-            if message.text and not message.photo and not message.video and not message.audio and not message.document:
-                # Text message
-                # Apply text replacements
-                modified_text = apply_text_replacements(message.text, text_replacements)
-
-                # Apply link cleaning if enabled
-                link_cleaner_enabled = config.get("link_cleaner_enabled", False)
-                if link_cleaner_enabled:
-                    modified_text = link_cleaner_handler.clean_links(modified_text)
-                    logger.info(f"Applied link cleaning to message {message.message_id}")
-
-                # Apply automatic translation if enabled
-                auto_translate_enabled = config.get("auto_translate_enabled", False)
-                if auto_translate_enabled:
-                    modified_text = translation_handler.translate_text(modified_text, config)
-                    logger.info(f"Applied automatic translation to message {message.message_id}")
-
-                # Apply text formatting (plain text or bold)
-                modified_text = text_format_handler.apply_text_formatting(modified_text, config)
-
-                # Apply header and footer customization
-                modified_text = message_customization_handler.customize_message_text(modified_text, config)
-
-                # Get inline button if enabled
-                reply_markup = message_customization_handler.create_inline_button(config)
-
-                # Remove buttons if button removal is enabled
-                if button_removal_handler.should_remove_buttons() and reply_markup:
-                    reply_markup = None
-                    logger.info(f"Removed inline buttons from message {message.message_id}")
-
-                # Send message with customizations
-                context.bot.send_message(
-                    chat_id=target_channel_id,
-                    text=modified_text,
-                    disable_web_page_preview=getattr(message, 'disable_web_page_preview', None),
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif message.photo:
-                # Photo message
-                photo = message.photo[-1]  # Get the largest photo
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-
-                # Apply link cleaning if enabled
-                link_cleaner_enabled = config.get("link_cleaner_enabled", False)
-                if modified_caption and link_cleaner_enabled:
-                    modified_caption = link_cleaner_handler.clean_links(modified_caption)
-                    logger.info(f"Applied link cleaning to caption of message {message.message_id}")
-
-                # Apply automatic translation if enabled
-                auto_translate_enabled = config.get("auto_translate_enabled", False)
-                if modified_caption and auto_translate_enabled:
-                    modified_caption = translation_handler.translate_text(modified_caption, config)
-                    logger.info(f"Applied automatic translation to caption of message {message.message_id}")
-
-                # Apply text formatting if there's a caption
-                if modified_caption:
-                    modified_caption = text_format_handler.apply_text_formatting(modified_caption, config)
-
-                # Apply header and footer customization
-                if modified_caption:
-                    modified_caption = message_customization_handler.customize_message_text(modified_caption, config)
-
-                # Get inline button if enabled
-                reply_markup = message_customization_handler.create_inline_button(config)
-
-                # Remove buttons if button removal is enabled
-                if button_removal_handler.should_remove_buttons() and reply_markup:
-                    reply_markup = None
-                    logger.info(f"Removed inline buttons from message {message.message_id}")
-
-                # Send message with customizations
-                context.bot.send_photo(
-                    chat_id=target_channel_id,
-                    photo=photo.file_id,
-                    caption=modified_caption,
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif message.video:
-                # Video message
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                context.bot.send_video(
-                    chat_id=target_channel_id,
-                    video=message.video.file_id,
-                    caption=modified_caption
-                )
-            elif message.document:
-                # Document message
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                context.bot.send_document(
-                    chat_id=target_channel_id,
-                    document=message.document.file_id,
-                    caption=modified_caption
-                )
-            elif message.audio:
-                # Audio message
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                context.bot.send_audio(
-                    chat_id=target_channel_id,
-                    audio=message.audio.file_id,
-                    caption=modified_caption
-                )
-            elif message.voice:
-                # Voice message
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                context.bot.send_voice(
-                    chat_id=target_channel_id,
-                    voice=message.voice.file_id,
-                    caption=modified_caption
-                )
-            elif message.sticker:
-                # Sticker message
-                context.bot.send_sticker(
-                    chat_id=target_channel_id,
-                    sticker=message.sticker.file_id
-                )
-            elif message.animation:
-                # Animation/GIF message
-                # Apply text replacements to caption
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                context.bot.send_animation(
-                    chat_id=target_channel_id,
-                    animation=message.animation.file_id,
-                    caption=modified_caption
-                )
-            elif message.video_note:
-                # Video note (round video) message
-                context.bot.send_video_note(
-                    chat_id=target_channel_id,
-                    video_note=message.video_note.file_id
-                )
-            elif message.poll:
-                # Poll message - needs to be recreated since polls can't be copied directly
-                # Apply text replacements to poll question and options
-                modified_question = apply_text_replacements(message.poll.question, text_replacements)
-                modified_options = [apply_text_replacements(option.text, text_replacements) for option in message.poll.options]
-                context.bot.send_poll(
-                    chat_id=target_channel_id,
-                    question=modified_question,
-                    options=modified_options,
-                    is_anonymous=message.poll.is_anonymous,
-                    allows_multiple_answers=message.poll.allows_multiple_answers,
-                    type=message.poll.type
-                )
-            elif message.contact:
-                # Contact message
-                context.bot.send_contact(
-                    chat_id=target_channel_id,
-                    phone_number=message.contact.phone_number,
-                    first_name=message.contact.first_name,
-                    last_name=message.contact.last_name
-                )
-            elif message.location:
-                # Location message
-                context.bot.send_location(
-                    chat_id=target_channel_id,
-                    latitude=message.location.latitude,
-                    longitude=message.location.longitude
-                )
-            elif message.venue:
-                # Venue message
-                # Apply text replacements to venue title and address
-                modified_title = apply_text_replacements(message.venue.title, text_replacements)
-                modified_address = apply_text_replacements(message.venue.address, text_replacements)
-                context.bot.send_venue(
-                    chat_id=target_channel_id,
-                    latitude=message.venue.location.latitude,
-                    longitude=message.venue.location.longitude,
-                    title=modified_title,
-                    address=modified_address
-                )
-            else:
-                # Unsupported message type, use fallback to forward
-                context.bot.forward_message(
-                    chat_id=target_channel_id,
-                    from_chat_id=message.chat_id,
-                    message_id=message.message_id
-                )
-                logger.info(f"Unsupported message type, falling back to regular forwarding for message {message.message_id}")
+    try:
+        sent_messages = retry_engine.send_with_retry(
+            target_channel_id, copy_engine.copy_album_to_target, bot, items, target_channel_id, config,
+            max_attempts=config.get("retry_max_attempts", retry_engine.DEFAULT_MAX_ATTEMPTS)
+        )
+        logger.info(f"Successfully copied album {items[0].media_group_id} with {len(items)} item(s)")
 
-            logger.info(f"Successfully copied and sent message {message.message_id} without 'forwarded from' tag")
+        stats["messages_forwarded"] += len(items)
+        stats["last_forwarded"] = datetime.now()
+        for item, sent_message in zip(items, sent_messages or ()):
+            message_map_store.record(item.chat_id, item.message_id, target_channel_id, sent_message.message_id)
 
-        # Get the sent message object to store mapping
-        sent_message = None
-        if forward_mode == "forward":
-            # For forwarded messages, get the message ID
-            sent_message = context.bot.forward_message(
-                chat_id=target_channel_id,
-                from_chat_id=message.chat_id,
-                message_id=message.message_id
-            )
-        else:
-            # For copied messages, save the result based on message type
-            if message.text and not message.photo and not message.video and not message.audio and not message.document:
-                # Text message
-                modified_text = apply_text_replacements(message.text, text_replacements)
-
-                # Apply header and footer customization
-                modified_text = message_customization_handler.customize_message_text(modified_text, config)
-
-                # Get inline button if enabled
-                reply_markup = message_customization_handler.create_inline_button(config)
-
-                # Send message with customizations
-                sent_message = context.bot.send_message(
-                    chat_id=target_channel_id,
-                    text=modified_text,
-                    disable_web_page_preview=getattr(message, 'disable_web_page_preview', None),
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif message.photo:
-                # Photo message
-                photo = message.photo[-1]  # Get the largest photo
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-
-                # Apply header and footer customization
-                if modified_caption:
-                    modified_caption = message_customization_handler.customize_message_text(modified_caption, config)
-
-                # Get inline button if enabled
-                reply_markup = message_customization_handler.create_inline_button(config)
-
-                # Send message with customizations
-                sent_message = context.bot.send_photo(
-                    chat_id=target_channel_id,
-                    photo=photo.file_id,
-                    caption=modified_caption,
-                    reply_markup=reply_markup,
-                    parse_mode=ParseMode.HTML
-                )
-            elif message.video:
-                # Video message
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                sent_message = context.bot.send_video(
-                    chat_id=target_channel_id,
-                    video=message.video.file_id,
-                    caption=modified_caption
-                )
-            elif message.document:
-                # Document message
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                sent_message = context.bot.send_document(
-                    chat_id=target_channel_id,
-                    document=message.document.file_id,
-                    caption=modified_caption
-                )
-            elif message.audio:
-                # Audio message
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                sent_message = context.bot.send_audio(
-                    chat_id=target_channel_id,
-                    audio=message.audio.file_id,
-                    caption=modified_caption
-                )
-            elif message.voice:
-                # Voice message
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                sent_message = context.bot.send_voice(
-                    chat_id=target_channel_id,
-                    voice=message.voice.file_id,
-                    caption=modified_caption
-                )
-            elif message.sticker:
-                # Sticker message
-                sent_message = context.bot.send_sticker(
-                    chat_id=target_channel_id,
-                    sticker=message.sticker.file_id
-                )
-            elif message.animation:
-                # Animation/GIF message
-                modified_caption = apply_text_replacements(message.caption, text_replacements)
-                sent_message = context.bot.send_animation(
-                    chat_id=target_channel_id,
-                    animation=message.animation.file_id,
-                    caption=modified_caption
-                )
-            elif message.video_note:
-                # Video note (round video) message
-                sent_message = context.bot.send_video_note(
-                    chat_id=target_channel_id,
-                    video_note=message.video_note.file_id
-                )
-            elif message.poll:
-                # Poll message
-                modified_question = apply_text_replacements(message.poll.question, text_replacements)
-                modified_options = [apply_text_replacements(option.text, text_replacements) for option in message.poll.options]
-                sent_message = context.bot.send_poll(
-                    chat_id=target_channel_id,
-                    question=modified_question,
-                    options=modified_options,
-                    is_anonymous=message.poll.is_anonymous,
-                    allows_multiple_answers=message.poll.allows_multiple_answers,
-                    type=message.poll.type
-                )
-            elif message.contact:
-                # Contact message
-                sent_message = context.bot.send_contact(
-                    chat_id=target_channel_id,
-                    phone_number=message.contact.phone_number,
-                    first_name=message.contact.first_name,
-                    last_name=message.contact.last_name
-                )
-            elif message.location:
-                # Location message
-                sent_message = context.bot.send_location(
-                    chat_id=target_channel_id,
-                    latitude=message.location.latitude,
-                    longitude=message.location.longitude
-                )
-            elif message.venue:
-                # Venue message
-                modified_title = apply_text_replacements(message.venue.title, text_replacements)
-                modified_address = apply_text_replacements(message.venue.address, text_replacements)
-                sent_message = context.bot.send_venue(
-                    chat_id=target_channel_id,
-                    latitude=message.venue.location.latitude,
-                    longitude=message.venue.location.longitude,
-                    title=modified_title,
-                    address=modified_address
-                )
-            else:
-                # Unsupported message type, use fallback to forward
-                sent_message = context.bot.forward_message(
-                    chat_id=target_channel_id,
-                    from_chat_id=message.chat_id,
-                    message_id=message.message_id
-                )
+    except send_queue.RetryLater:
+        raise
+    except Exception as e:
+        stats["errors"] += 1
+        logger.error(f"Error forwarding album: {str(e)}")
+        # Keep the items so they can be replayed (one by one) from the admin panel
+        for item in items:
+            dead_letter_handler.add_dead_letter(item, target_channel_id, e)
+
+def _deliver_items(bot, items, target_channel_id, config):
+    """Send album items one by one; after a flood wait only the items not sent yet are retried."""
+    for index, item in enumerate(items):
+        try:
+            deliver_message(bot, item, target_channel_id, config)
+        except send_queue.RetryLater as e:
+            raise send_queue.RetryLater(e.retry_at, _deliver_items, bot, items[index:], target_channel_id, config) from e
 
-        # Update statistics
-        stats["messages_forwarded"] += 1
-        stats["last_forwarded"] = datetime.now()
+def deliver_message(bot, message, target_channel_id, config):
+    """Send a filtered message to the target channel; runs on a sender worker."""
+    try:
+        # Send once, retrying only transient errors (flood waits, timeouts, network)
+        sent_message = retry_engine.send_with_retry(
+            target_channel_id, send_to_target, bot, message, target_channel_id, config,
+            max_attempts=config.get("retry_max_attempts", retry_engine.DEFAULT_MAX_ATTEMPTS)
+        )
+
+        # Update statistics from the message that was actually sent
+        if sent_message:
+            stats["messages_forwarded"] += 1
+            stats["last_forwarded"] = datetime.now()
+            # Remember the copy so edits of the source can be applied to it
+            message_map_store.record(message.chat_id, message.message_id, target_channel_id, sent_message.message_id)
 
+    except send_queue.RetryLater:
+        # Flood wait: the worker sends the message again once it is over
+        raise
     except Exception as e:
         stats["errors"] += 1
         logger.error(f"Error forwarding message: {str(e)}")
+        # Keep the message so it can be replayed from the admin panel
+        dead_letter_handler.add_dead_letter(message, target_channel_id, e)
 
 # تمت إزالة دالة forward_message_from_userbot كجزء من عملية إزالة ميزة UserBot
 
@@ -3,33 +3,21 @@ Module for handling inline button removal functionality in the Telegram bot.
 This module contains functions for removing inline buttons from messages before forwarding.
 """
 
-import json
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def button_removal_menu(update, context):
     """Show the button removal menu."""
@@ -107,14 +95,18 @@ def toggle_button_removal_status(update, context):
             ]])
         )
 
-def should_remove_buttons():
+def should_remove_buttons(config=None):
     """Check if buttons should be removed from messages.
     
+    Args:
+        config: Optional configuration snapshot to use instead of loading it
+        
     Returns:
         bool: True if buttons should be removed, False otherwise
     """
     # Load config
-    config = load_config()
+    if config is None:
+        config = config_store.get_config()
     
     # Check if feature is enabled
     return config.get("button_removal_enabled", False)
\ No newline at end of file
@@ -4,9 +4,9 @@ This module contains all functions related to filtering messages based on charac
 """
 
 import logging
-import json
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -16,22 +16,11 @@ WAITING_CHAR_LIMIT = range(1)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error("Failed to load config.json")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
-        return False
+    return config_store.save_config(config)
 
 def char_limit_menu(update, context):
     """Show the character limit menu."""
@@ -167,27 +156,4 @@ def receive_char_limit(update, context):
         )
         return WAITING_CHAR_LIMIT
     
-    return ConversationHandler.END
-
-def should_forward_message_by_length(message_text):
-    """Check if a message should be forwarded based on character count."""
-    config = load_config()
-    char_limit_enabled = config.get("char_limit_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not char_limit_enabled:
-        return True
-    
-    # If no text, always forward (media without caption, etc.)
-    if not message_text:
-        return True
-    
-    char_limit_count = config.get("char_limit_count", 1000)
-    message_length = len(message_text)
-    
-    should_forward = message_length <= char_limit_count
-    
-    if not should_forward:
-        logger.info(f"Message exceeds character limit ({message_length} > {char_limit_count}). Skipping message.")
-    
-    return should_forward
\ No newline at end of file
+    return ConversationHandler.END
\ No newline at end of file
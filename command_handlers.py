@@ -7,6 +7,8 @@ import logging
 from datetime import datetime
 import main
 import bot_handler
+import forward_pipeline
+import send_queue
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 
@@ -165,6 +167,12 @@ def status_command(update, context):
     else:
         forward_mode_text = "نسخ (بدون علامة التوجيه)"
 
+    # Get the enabled filter stages
+    filter_stages = ", ".join(forward_pipeline.get_pipeline().stage_names) or "لا يوجد"
+
+    # Get send queue metrics
+    queue_stats = send_queue.get_queue_stats()
+
     # Send status message
     update.message.reply_text(
         f'📊 *حالة البوت*\n\n'
@@ -175,6 +183,10 @@ def status_command(update, context):
         f'📡 *قناة المصدر:* {source_channel}\n'
         f'📡 *قناة الهدف:* {target_channel}\n'
         f'📝 *طريقة النشر:* {forward_mode_text}\n'
+        f'🧩 *مراحل الفلترة:* `{filter_stages}`\n'
+        f'📤 *طابور الإرسال:* {queue_stats["depth"]} رسالة ({queue_stats["workers"]} عمال)\n'
+        f'⏳ *رسائل مؤجلة:* {queue_stats["scheduled"]}\n'
+        f'⌛ *زمن الانتظار:* متوسط {queue_stats["avg_latency"]:.2f} ث / أقصى {queue_stats["max_latency"]:.2f} ث\n'
         f'❌ *الأخطاء:* {stats["errors"]}',
         parse_mode=ParseMode.MARKDOWN
     )
@@ -283,6 +295,9 @@ def create_admin_keyboard():
         [
             InlineKeyboardButton("📅 النشر التلقائي", callback_data='autopost_menu'),
             InlineKeyboardButton("⏰ ساعات العمل", callback_data='working_hours_menu')
+        ],
+        [
+            InlineKeyboardButton("📮 الرسائل الفاشلة", callback_data='dead_letters_menu')
         ]
     ]
 
@@ -0,0 +1,149 @@
+"""
+Module providing a shared, in-memory view of the bot configuration.
+All handlers read config.json through this module instead of parsing the file themselves.
+"""
+
+import copy
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Configuration file path
+CONFIG_FILE = 'config.json'
+
+# Cached state: the parsed config, its frozen snapshot and the file signature it was read from
+_lock = threading.RLock()
+_raw_config = {}
+_snapshot = None
+_file_signature = None
+_version = 0
+
+def _freeze(value):
+    """Recursively convert dicts and lists into read-only equivalents."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _get_file_signature():
+    """Return (inode, mtime, size) of the config file, or None if it does not exist."""
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def _set_config(config, signature):
+    """Replace the cached config and bump the version counter."""
+    global _raw_config, _snapshot, _file_signature, _version
+    _raw_config = config
+    _snapshot = _freeze(config)
+    _file_signature = signature
+    _version += 1
+
+def _reload(signature):
+    """Parse config.json from disk into the cache."""
+    global _file_signature
+    if signature is None:
+        logger.error("Config file not found")
+        _set_config({}, None)
+        return
+
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as file:
+            config = json.load(file)
+    except (OSError, json.JSONDecodeError) as e:
+        # Keep serving the last good snapshot, e.g. while another process is mid-write
+        logger.error(f"Error loading config: {e}")
+        if _snapshot is None:
+            _set_config({}, signature)
+        else:
+            _file_signature = signature
+        return
+
+    if not isinstance(config, dict):
+        logger.error("Invalid config format")
+        config = {}
+
+    _set_config(config, signature)
+    logger.info(f"Configuration loaded (version {_version})")
+
+def get_config():
+    """Return the current read-only configuration snapshot.
+
+    The file is only parsed again when its inode, mtime or size changes,
+    so calling this on every message costs a single stat().
+
+    Returns:
+        Mapping: An immutable view of config.json (lists become tuples)
+    """
+    signature = _get_file_signature()
+    snapshot = _snapshot
+    if snapshot is not None and signature == _file_signature:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or signature != _file_signature:
+            _reload(signature)
+        return _snapshot
+
+def get_version():
+    """Return a counter that increases every time the configuration changes."""
+    get_config()
+    return _version
+
+def get_versioned_config():
+    """Return the current snapshot together with its version number.
+
+    Returns:
+        tuple: (snapshot, version) taken consistently under the same lock
+    """
+    get_config()
+    with _lock:
+        return _snapshot, _version
+
+def load_config():
+    """Return a mutable copy of the configuration for callers that edit and save it."""
+    get_config()
+    with _lock:
+        return copy.deepcopy(_raw_config)
+
+def save_config(config):
+    """Save configuration to config.json and refresh the in-memory snapshot.
+
+    The file is written to a temporary path and renamed into place so readers
+    never observe a partially written config.
+    """
+    temp_file = f"{CONFIG_FILE}.tmp"
+    try:
+        with _lock:
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(config, file, ensure_ascii=False, indent=2)
+            os.replace(temp_file, CONFIG_FILE)
+            _set_config(copy.deepcopy(config), _get_file_signature())
+        return True
+    except Exception as e:
+        logger.error(f"Error saving config: {e}")
+        return False
+
+def merge_config(snapshot, overrides):
+    """Return a read-only snapshot with some top-level keys replaced, e.g. for a route profile.
+
+    Args:
+        snapshot: A snapshot returned by get_config()
+        overrides (dict): Keys to replace
+
+    Returns:
+        Mapping: A new immutable view; the snapshot itself is not changed
+    """
+    if not overrides:
+        return snapshot
+    merged = dict(snapshot)
+    merged.update({key: _freeze(value) for key, value in overrides.items()})
+    return MappingProxyType(merged)
@@ -0,0 +1,317 @@
+"""
+Module for copying messages to the target channel without the "Forwarded from" tag.
+Messages are copied with Telegram's copyMessage; typed send_* calls are only used
+when the content itself (not just a caption) has to change.
+"""
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from telegram import InputMediaAudio, InputMediaDocument, InputMediaPhoto, InputMediaVideo
+
+import replacements_handler
+import link_cleaner_handler
+import translation_handler
+import text_format_handler
+import message_customization_handler
+import button_removal_handler
+import message_map_store
+import arabic_normalization_handler
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Settings that transform_text() reads; targets that agree on all of them get the same text
+TRANSFORM_KEYS = (
+    "text_replacements", "arabic_normalization", "link_cleaner_enabled",
+    "auto_translate_enabled", "translate_source", "translate_target", "translation_backend",
+    "plain_text_conversion_enabled", "bold_text_conversion_enabled",
+    "header_enabled", "header_text", "footer_enabled", "footer_text"
+)
+
+# Transform profile of recent snapshots: id(config) -> (config, profile)
+PROFILE_CACHE_SIZE = 64
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+
+# Transformed texts of recent messages: (chat_id, message_id, profile) -> ((text, entities), Future)
+TRANSFORM_CACHE_SIZE = 256
+_transform_cache = OrderedDict()
+_transform_cache_lock = threading.Lock()
+
+# Album item types and how to rebuild them for sendMediaGroup
+ALBUM_MEDIA_TYPES = (
+    ("photo", InputMediaPhoto),
+    ("video", InputMediaVideo),
+    ("document", InputMediaDocument),
+    ("audio", InputMediaAudio)
+)
+
+# Message types whose caption can be overridden by copyMessage
+CAPTION_TYPES = ("photo", "video", "document", "audio", "voice", "animation")
+
+def transform_text(text, config, entities=None):
+    """Run a text or caption through the configured transformations.
+
+    Formatting is carried by Telegram entities, never by markup in the text, so
+    the result is sent with entities/caption_entities and needs no escaping.
+    The original entities are kept while the text is unchanged; once a
+    replacement, link cleaning or translation rewrites it their offsets no
+    longer apply and they are dropped.
+
+    Args:
+        text (str): The original text or caption
+        config: The configuration snapshot
+        entities: Telegram entities of the original text; link cleaning uses
+            them to skip texts without links, like the links filter does
+
+    Returns:
+        tuple: The transformed text and its list of entities
+    """
+    original_text = text
+    text = replacements_handler.apply_text_replacements(
+        text, config.get("text_replacements", []), arabic_normalization_handler.is_enabled("replacements", config))
+
+    # Apply link cleaning if enabled; entities of the unchanged original say whether there are links
+    if config.get("link_cleaner_enabled", False):
+        if text != original_text or link_cleaner_handler.text_has_links(text, entities):
+            text = link_cleaner_handler.clean_links(text)
+        # Hidden links (text_link) survive in the entities even when the text is unchanged
+        entities = link_cleaner_handler.strip_link_entities(entities or ())
+
+    # Apply automatic translation if enabled
+    if config.get("auto_translate_enabled", False):
+        text = translation_handler.translate_text(text, config)
+
+    if entities is None or text != original_text:
+        entities = []
+
+    # Apply text formatting (plain text or bold)
+    entities = text_format_handler.apply_entity_formatting(text, entities, config)
+
+    # Apply header and footer customization; entities of the text move past the header
+    if entities:
+        entities = text_format_handler.shift_entities(
+            entities, text_format_handler.utf16_length(message_customization_handler.get_header_prefix(config)))
+    return message_customization_handler.customize_message_text(text, config), entities
+
+def get_transform_profile(config):
+    """Return a hashable key of the settings that affect transform_text().
+
+    Snapshots that differ only in other settings (filters, rate limits...) get
+    the same key, so their targets can share one transformed text.
+    """
+    with _profiles_lock:
+        cached = _profiles.get(id(config))
+        # Check identity too, since ids of dropped snapshots are reused
+        if cached is not None and cached[0] is config:
+            return cached[1]
+
+    profile = json.dumps([config.get(key) for key in TRANSFORM_KEYS], sort_keys=True, default=dict)
+    with _profiles_lock:
+        _profiles[id(config)] = (config, profile)
+        while len(_profiles) > PROFILE_CACHE_SIZE:
+            _profiles.popitem(last=False)
+    return profile
+
+def transform_message(message, config):
+    """Return transform_text() of a message's text or caption, computed once per message and profile.
+
+    A post sent to several targets with the same transform profile is handled
+    by several workers; the first one transforms the text and the others wait
+    for and reuse its result.
+
+    Returns:
+        tuple: The transformed text and its list of entities
+    """
+    if message.text:
+        text, entities = message.text, message.entities
+    else:
+        text, entities = message.caption, message.caption_entities
+
+    key = (message.chat_id, message.message_id, get_transform_profile(config))
+    signature = (text, tuple(entities or ()))
+    with _transform_cache_lock:
+        cached = _transform_cache.get(key)
+        # The text must match too: edits change it
+        if cached is None or cached[0] != signature:
+            # First worker for this message: compute while the others wait on the future
+            cached = _transform_cache[key] = (signature, Future())
+            owner = True
+            while len(_transform_cache) > TRANSFORM_CACHE_SIZE:
+                _transform_cache.popitem(last=False)
+        else:
+            _transform_cache.move_to_end(key)
+            owner = False
+
+    future = cached[1]
+    if owner:
+        try:
+            future.set_result(transform_text(text, config, entities))
+        except Exception as e:
+            future.set_exception(e)
+            with _transform_cache_lock:
+                if _transform_cache.get(key) is cached:
+                    del _transform_cache[key]
+    return future.result()
+
+def get_reply_markup(config):
+    """Return the custom inline button for copied messages, unless button removal is on."""
+    if button_removal_handler.should_remove_buttons(config):
+        return None
+    return message_customization_handler.create_inline_button(config)
+
+def get_reply_to_message_id(message, target_channel_id, config):
+    """Return the id of the copy of the message's parent in the target chat, or None.
+
+    The lookup goes through the message map's in-memory cache, so it costs no
+    database query for recent parents. Replies to posts that were never copied
+    (filtered out, or older than the retention window) are sent standalone.
+    """
+    parent = message.reply_to_message
+    if parent is None or not config.get("preserve_reply_enabled", True):
+        return None
+    try:
+        return message_map_store.get_target_message_id(message.chat_id, parent.message_id, target_channel_id)
+    except Exception as e:
+        logger.error(f"Error looking up the parent of message {message.message_id}: {str(e)}")
+        return None
+
+def _has_caption_media(message):
+    """Check if the message carries media whose caption copyMessage can replace."""
+    return any(getattr(message, media_type, None) for media_type in CAPTION_TYPES)
+
+def copy_to_target(bot, message, target_channel_id, config):
+    """Copy a message to the target channel with the configured transformations.
+
+    Args:
+        bot: The Telegram bot instance
+        message: The source Telegram message
+        target_channel_id: The chat to copy the message to
+        config: The configuration snapshot
+
+    Returns:
+        The sent Message (send_*) or MessageId (copyMessage)
+    """
+    reply_markup = get_reply_markup(config)
+    # Keep reply chains; the send still succeeds if the parent copy was deleted
+    reply_to_message_id = get_reply_to_message_id(message, target_channel_id, config)
+    reply_kwargs = {"reply_to_message_id": reply_to_message_id, "allow_sending_without_reply": True} if reply_to_message_id else {}
+    replacements = config.get("text_replacements", [])
+    normalize = arabic_normalization_handler.is_enabled("replacements", config)
+
+    if message.text:
+        modified_text, modified_entities = transform_message(message, config)
+        if modified_text != message.text or modified_entities != list(message.entities):
+            # Text content or formatting changed, so it has to be sent as a new message
+            return bot.send_message(
+                chat_id=target_channel_id,
+                text=modified_text,
+                entities=modified_entities,
+                disable_web_page_preview=getattr(message, 'disable_web_page_preview', None),
+                reply_markup=reply_markup,
+                **reply_kwargs
+            )
+
+    elif message.poll:
+        # copyMessage cannot edit a poll, so recreate it only if the replacements change it
+        modified_question = replacements_handler.apply_text_replacements(message.poll.question, replacements, normalize)
+        modified_options = [replacements_handler.apply_text_replacements(option.text, replacements, normalize)
+                            for option in message.poll.options]
+        if modified_question != message.poll.question or modified_options != [option.text for option in message.poll.options]:
+            return bot.send_poll(
+                chat_id=target_channel_id,
+                question=modified_question,
+                options=modified_options,
+                is_anonymous=message.poll.is_anonymous,
+                allows_multiple_answers=message.poll.allows_multiple_answers,
+                type=message.poll.type,
+                reply_markup=reply_markup,
+                **reply_kwargs
+            )
+
+    elif message.venue:
+        # Same for venues: only rebuild when the title or address changes
+        modified_title = replacements_handler.apply_text_replacements(message.venue.title, replacements, normalize)
+        modified_address = replacements_handler.apply_text_replacements(message.venue.address, replacements, normalize)
+        if modified_title != message.venue.title or modified_address != message.venue.address:
+            return bot.send_venue(
+                chat_id=target_channel_id,
+                latitude=message.venue.location.latitude,
+                longitude=message.venue.location.longitude,
+                title=modified_title,
+                address=modified_address,
+                reply_markup=reply_markup,
+                **reply_kwargs
+            )
+
+    elif message.caption and _has_caption_media(message):
+        modified_caption, modified_entities = transform_message(message, config)
+        if modified_caption != message.caption or modified_entities != list(message.caption_entities):
+            # Override the caption and keep the media as-is
+            return bot.copy_message(
+                chat_id=target_channel_id,
+                from_chat_id=message.chat_id,
+                message_id=message.message_id,
+                caption=modified_caption,
+                caption_entities=modified_entities,
+                reply_markup=reply_markup,
+                **reply_kwargs
+            )
+
+    # Nothing to change: copy the message with its original formatting
+    return bot.copy_message(
+        chat_id=target_channel_id,
+        from_chat_id=message.chat_id,
+        message_id=message.message_id,
+        reply_markup=reply_markup,
+        **reply_kwargs
+    )
+
+def can_copy_as_album(items):
+    """Check if every item of an album can be rebuilt for sendMediaGroup."""
+    return all(any(getattr(item, media_type, None) for media_type, _ in ALBUM_MEDIA_TYPES) for item in items)
+
+def _build_input_media(message, config):
+    """Rebuild an album item as InputMedia with its transformed caption, or None if unsupported."""
+    for media_type, input_media_class in ALBUM_MEDIA_TYPES:
+        media = getattr(message, media_type, None)
+        if not media:
+            continue
+        # Photos come in several sizes; the last one is the original
+        file_id = media[-1].file_id if media_type == "photo" else media.file_id
+        if message.caption:
+            caption, caption_entities = transform_message(message, config)
+            return input_media_class(media=file_id, caption=caption, caption_entities=caption_entities)
+        return input_media_class(media=file_id)
+    return None
+
+def copy_album_to_target(bot, items, target_channel_id, config):
+    """Copy the items of an album to the target channel as one album.
+
+    Captions (usually only the first item has one) get the same
+    transformations as single messages. Albums cannot carry an inline
+    keyboard, so the custom button is not added.
+
+    Args:
+        bot: The Telegram bot instance
+        items: The album's messages, in order
+        target_channel_id: The chat to copy the album to
+        config: The configuration snapshot
+
+    Returns:
+        list: The sent Messages, one per item and in the same order
+
+    Raises:
+        ValueError: If an item is not a photo, video, document or audio
+            (check with can_copy_as_album first)
+    """
+    media = [_build_input_media(item, config) for item in items]
+    if any(item is None for item in media):
+        raise ValueError("Album has items that sendMediaGroup cannot rebuild")
+
+    reply_to_message_id = get_reply_to_message_id(items[0], target_channel_id, config)
+    reply_kwargs = {"reply_to_message_id": reply_to_message_id, "allow_sending_without_reply": True} if reply_to_message_id else {}
+    return bot.send_media_group(chat_id=target_channel_id, media=media, **reply_kwargs)
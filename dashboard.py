@@ -5,7 +5,7 @@ import logging
 import os
 import secrets
 from datetime import datetime, timedelta
-from utils import load_config, save_config, get_bot_stats
+from utils import load_config, save_config, get_bot_stats, get_send_queue_stats
 from functools import wraps
 
 # تكوين التسجيل
@@ -100,6 +100,7 @@ def dashboard():
         'dashboard.html',
         config=config,
         stats=stats,
+        queue_stats=get_send_queue_stats(),
         admin_count=admin_count,
         bot_active=forwarding_enabled
     )
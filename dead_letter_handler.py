@@ -0,0 +1,193 @@
+"""
+Module for handling messages that could not be delivered to the target channel.
+Failed sends are kept in a durable dead-letter store and can be replayed or
+cleared from the admin panel.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
+import rate_limit_handler
+import routing_table
+import send_queue
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Dead-letter store, persisted so failed messages survive a restart
+DEAD_LETTER_FILE = 'dead_letters.json'
+MAX_DEAD_LETTERS = 1000
+
+dead_letters = {}
+_dead_letter_lock = threading.Lock()
+_loaded = False
+
+def _load_dead_letters():
+    """Read the store from DEAD_LETTER_FILE once (caller holds _dead_letter_lock)."""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+    try:
+        with open(DEAD_LETTER_FILE, 'r', encoding='utf-8') as file:
+            dead_letters.update(json.load(file))
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Error loading dead letters: {str(e)}")
+
+def _save_dead_letters():
+    """Write the store to DEAD_LETTER_FILE atomically (caller holds _dead_letter_lock)."""
+    temp_file = f"{DEAD_LETTER_FILE}.tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(dead_letters, file, ensure_ascii=False)
+        os.replace(temp_file, DEAD_LETTER_FILE)
+    except Exception as e:
+        logger.error(f"Error saving dead letters: {str(e)}")
+
+def add_dead_letter(message, target_channel_id, error):
+    """Store a message whose delivery failed for good.
+
+    Args:
+        message: The Telegram message that could not be sent
+        target_channel_id: The chat it should have been sent to
+        error: The exception of the last attempt
+    """
+    key = f"{message.chat_id}:{message.message_id}:{target_channel_id}"
+    with _dead_letter_lock:
+        _load_dead_letters()
+        dead_letters.pop(key, None)
+        dead_letters[key] = {
+            "target_channel_id": target_channel_id,
+            "error": f"{type(error).__name__}: {error}",
+            "failed_at": time.time(),
+            "message": message.to_dict()
+        }
+        # Keep the store bounded by dropping the oldest entries
+        while len(dead_letters) > MAX_DEAD_LETTERS:
+            dead_letters.pop(next(iter(dead_letters)))
+        _save_dead_letters()
+    logger.warning(f"Message {message.message_id} for {target_channel_id} moved to the dead-letter store")
+
+def get_dead_letter_count():
+    """Return the number of messages in the dead-letter store."""
+    with _dead_letter_lock:
+        _load_dead_letters()
+        return len(dead_letters)
+
+def replay_dead_letters(bot, deliver):
+    """Queue the stored messages for delivery again, removing them from the store.
+
+    Messages that fail again are stored back by the deliver callable, and
+    messages the rate limit cannot take stay in the store.
+
+    Args:
+        bot: The Telegram bot instance
+        deliver: Callable(bot, message, target_channel_id, config) doing the send
+
+    Returns:
+        int: The number of messages queued
+    """
+    from telegram import Message
+
+    with _dead_letter_lock:
+        _load_dead_letters()
+        records = list(dead_letters.items())
+        dead_letters.clear()
+        _save_dead_letters()
+
+    replayed = 0
+    kept = {}
+    for key, record in records:
+        try:
+            message = Message.de_json(record["message"], bot)
+        except Exception as e:
+            logger.error(f"Could not restore dead letter {key}: {str(e)}")
+            continue
+        target_channel_id = record["target_channel_id"]
+        config = routing_table.get_send_config(message.chat_id, target_channel_id)
+        # Replays take rate limit slots like new messages, so a large backlog is spread out
+        rate_slot = rate_limit_handler.reserve_send_slot(target_channel_id, config)
+        if rate_slot is False:
+            kept[key] = record
+            continue
+        if rate_slot:
+            send_queue.enqueue_at(rate_slot, target_channel_id, deliver, bot, message, target_channel_id, config)
+        else:
+            send_queue.enqueue(target_channel_id, deliver, bot, message, target_channel_id, config)
+        replayed += 1
+
+    if kept:
+        # Over the limit: keep them for the next replay instead of losing them
+        with _dead_letter_lock:
+            dead_letters.update(kept)
+            _save_dead_letters()
+        logger.info(f"Kept {len(kept)} dead-letter messages over the rate limit")
+
+    logger.info(f"Replaying {replayed} dead-letter messages")
+    return replayed
+
+def clear_dead_letters():
+    """Remove every message from the dead-letter store."""
+    with _dead_letter_lock:
+        _load_dead_letters()
+        dead_letters.clear()
+        _save_dead_letters()
+
+def dead_letters_menu(update, context):
+    """Show the failed messages menu."""
+    query = update.callback_query
+    query.answer()
+
+    with _dead_letter_lock:
+        _load_dead_letters()
+        count = len(dead_letters)
+        last_error = next(reversed(dead_letters.values()))["error"] if dead_letters else None
+
+    keyboard = [
+        [InlineKeyboardButton("🔁 إعادة إرسال الكل", callback_data='replay_dead_letters')],
+        [InlineKeyboardButton("🗑 حذف الكل", callback_data='clear_dead_letters')],
+        [InlineKeyboardButton("🔙 العودة للوحة التحكم", callback_data='admin_panel')]
+    ]
+
+    reply_markup = InlineKeyboardMarkup(keyboard)
+
+    text = '📮 *الرسائل الفاشلة*\n\n' \
+           f'عدد الرسائل: *{count}*\n'
+    if last_error:
+        text += f'آخر خطأ: `{last_error[:100]}`\n'
+    text += '\nهذه رسائل فشل إرسالها إلى قناة الهدف بعد كل المحاولات. يمكنك إعادة إرسالها أو حذفها.'
+
+    query.edit_message_text(
+        text,
+        parse_mode=ParseMode.MARKDOWN,
+        reply_markup=reply_markup
+    )
+
+def replay_dead_letters_command(update, context):
+    """Replay the stored failed messages from the admin panel."""
+    import bot_handler
+
+    query = update.callback_query
+    query.answer()
+
+    replayed = replay_dead_letters(context.bot, bot_handler.deliver_message)
+    remaining = get_dead_letter_count()
+
+    keyboard = [[InlineKeyboardButton("🔙 العودة", callback_data='dead_letters_menu')]]
+    query.edit_message_text(
+        '✅ *تمت إعادة الإرسال*\n\n'
+        f'تمت إضافة *{replayed}* رسالة إلى طابور الإرسال.'
+        + (f'\nبقيت *{remaining}* رسالة في المخزن لإعادة إرسالها لاحقًا.' if remaining else ''),
+        parse_mode=ParseMode.MARKDOWN,
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+def clear_dead_letters_command(update, context):
+    """Delete the stored failed messages from the admin panel."""
+    clear_dead_letters()
+    dead_letters_menu(update, context)
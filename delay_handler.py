@@ -3,11 +3,16 @@ Module for handling time delay functionality in the Telegram bot.
 This module contains all functions related to adding time delay between forwarded messages.
 """
 
-import logging
 import json
+import logging
+import os
+import threading
 import time
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
+import config_store
+import send_queue
+import routing_table
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -15,27 +20,26 @@ logger = logging.getLogger(__name__)
 # State constants for conversation handlers
 WAITING_DELAY_SECONDS = range(1)
 
-# Variable to store the timestamp of the last forwarded message
-last_forwarded_time = 0
+# Timestamp of the last forwarded (or reserved) message slot of each target chat;
+# targets keep their own spacing so a post fanned out to many targets is not serialized
+last_forwarded_times = {}
+
+# Delayed messages waiting to be sent, persisted so they survive a restart
+PENDING_FILE = 'pending_sends.json'
+pending_sends = {}
+_pending_lock = threading.Lock()
+
+# Changes to the backlog are written at most once per SAVE_INTERVAL seconds
+SAVE_INTERVAL = 1
+_save_timer = None
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error("Failed to load config.json")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
-        return False
+    return config_store.save_config(config)
 
 def delay_menu(update, context):
     """Show the delay settings menu."""
@@ -61,7 +65,8 @@ def delay_menu(update, context):
     message = "⏱ *إعدادات التأخير*\n\n" \
               "هذه الميزة تضيف تأخير زمني بين الرسائل المعاد توجيهها.\n\n" \
               f"الحالة الحالية: {delay_status}\n" \
-              f"مدة التأخير: {delay_seconds} ثانية\n\n" \
+              f"مدة التأخير: {delay_seconds} ثانية\n" \
+              f"رسائل بانتظار الإرسال: {get_pending_count()}\n\n" \
               "يساعد التأخير في تجنب قيود التيليجرام عند إرسال رسائل متعددة بسرعة."
     
     # Edit message if it exists, otherwise send new message
@@ -173,36 +178,140 @@ def receive_delay_seconds(update, context):
     
     return ConversationHandler.END
 
-def should_delay_message():
-    """Check if there should be a delay before forwarding the current message."""
-    global last_forwarded_time
+def reserve_send_time(target_channel_id, config=None):
+    """Reserve the time slot at which the next message to a target chat may be sent.
     
-    config = load_config()
-    delay_enabled = config.get("delay_enabled", False)
+    Slots are spaced delay_seconds apart starting from the last one reserved
+    for the same target, so messages keep their order without blocking the
+    caller, and the targets of one post are delayed independently.
     
-    # If delay is disabled, always forward immediately
-    if not delay_enabled:
-        # Update last forwarded time without delay
-        last_forwarded_time = time.time()
-        return False
+    Returns:
+        float: The timestamp to send at, or None if the message can go out now
+    """
+    if config is None:
+        config = config_store.get_config()
     
-    delay_seconds = config.get("delay_seconds", 5)
     current_time = time.time()
-    time_since_last_message = current_time - last_forwarded_time
+    key = str(target_channel_id)
+    
+    with _pending_lock:
+        # If delay is disabled, always forward immediately
+        if not config.get("delay_enabled", False):
+            last_forwarded_times[key] = current_time
+            return None
+        
+        send_at = max(current_time, last_forwarded_times.get(key, 0) + config.get("delay_seconds", 5))
+        last_forwarded_times[key] = send_at
+    
+    if send_at <= current_time:
+        return None
     
-    # If enough time has passed since the last message, no need for delay
-    if time_since_last_message >= delay_seconds:
-        last_forwarded_time = current_time
-        return False
+    logger.info(f"Scheduling message in {send_at - current_time:.2f} seconds")
+    return send_at
+
+def schedule_delayed_send(deliver, bot, message, target_channel_id, config, send_at):
+    """Schedule a message to be delivered at send_at and persist it until it is sent.
     
-    # Calculate how much more time to wait
-    wait_time = delay_seconds - time_since_last_message
-    logger.info(f"Delaying message for {wait_time:.2f} seconds")
+    Args:
+        deliver: Callable(bot, message, target_channel_id, config) doing the send
+        bot: The Telegram bot instance
+        message: The Telegram message to send
+        target_channel_id: The chat to send to
+        config: The configuration snapshot
+        send_at (float): Timestamp to send at
+    """
+    key = f"{message.chat_id}:{message.message_id}:{target_channel_id}"
+    with _pending_lock:
+        pending_sends[key] = {
+            "send_at": send_at,
+            "target_channel_id": target_channel_id,
+            "message": message.to_dict()
+        }
+        _schedule_save()
     
-    # Sleep for the required delay
-    time.sleep(wait_time)
+    send_queue.enqueue_at(send_at, target_channel_id, _run_pending_send, key, deliver, bot, message, target_channel_id, config)
+
+def _run_pending_send(key, deliver, bot, message, target_channel_id, config):
+    """Deliver a scheduled message and drop it from the pending backlog."""
+    retry_later = False
+    try:
+        deliver(bot, message, target_channel_id, config)
+    except send_queue.RetryLater:
+        # Not sent yet: the worker runs this job again after the flood wait
+        retry_later = True
+        raise
+    finally:
+        if not retry_later:
+            with _pending_lock:
+                pending_sends.pop(key, None)
+                _schedule_save()
+
+def get_pending_count():
+    """Return the number of delayed messages waiting to be sent."""
+    return len(pending_sends)
+
+def _save_pending_sends():
+    """Write the pending backlog to PENDING_FILE atomically (caller holds _pending_lock)."""
+    temp_file = f"{PENDING_FILE}.tmp"
+    try:
+        with open(temp_file, 'w', encoding='utf-8') as file:
+            json.dump(pending_sends, file, ensure_ascii=False)
+        os.replace(temp_file, PENDING_FILE)
+    except Exception as e:
+        logger.error(f"Error saving pending sends: {str(e)}")
+
+def _schedule_save():
+    """Save the backlog after SAVE_INTERVAL, batching the changes made until then (caller holds _pending_lock)."""
+    global _save_timer
+    if _save_timer is None:
+        _save_timer = threading.Timer(SAVE_INTERVAL, flush_pending_sends)
+        _save_timer.daemon = True
+        _save_timer.start()
+
+def flush_pending_sends():
+    """Write the pending backlog to PENDING_FILE now, e.g. on shutdown."""
+    global _save_timer
+    with _pending_lock:
+        if _save_timer is not None:
+            _save_timer.cancel()
+            _save_timer = None
+        _save_pending_sends()
+
+def restore_pending_sends(bot, deliver):
+    """Re-schedule the delayed messages saved before the last shutdown.
+    
+    Args:
+        bot: The Telegram bot instance
+        deliver: Callable(bot, message, target_channel_id, config) doing the send
+    """
+    from telegram import Message
+    
+    try:
+        with open(PENDING_FILE, 'r', encoding='utf-8') as file:
+            saved = json.load(file)
+    except FileNotFoundError:
+        return 0
+    except json.JSONDecodeError as e:
+        logger.error(f"Error loading {PENDING_FILE}: {str(e)}")
+        return 0
     
-    # Update the last forwarded time
-    last_forwarded_time = time.time()
+    restored = 0
+    for key, record in sorted(saved.items(), key=lambda item: item[1]["send_at"]):
+        try:
+            message = Message.de_json(record["message"], bot)
+        except Exception as e:
+            logger.error(f"Could not restore pending message {key}: {str(e)}")
+            continue
+        with _pending_lock:
+            pending_sends[key] = record
+            target_key = str(record["target_channel_id"])
+            last_forwarded_times[target_key] = max(last_forwarded_times.get(target_key, 0), record["send_at"])
+        # Send with the settings of the message's route, as when it was scheduled
+        config = routing_table.get_send_config(message.chat_id, record["target_channel_id"])
+        send_queue.enqueue_at(record["send_at"], record["target_channel_id"], _run_pending_send,
+                              key, deliver, bot, message, record["target_channel_id"], config)
+        restored += 1
     
-    return True
\ No newline at end of file
+    if restored:
+        logger.info(f"Restored {restored} pending delayed messages")
+    return restored
@@ -6,38 +6,77 @@ This module contains all functions related to preventing duplicate messages.
 import json
 import logging
 import hashlib
+import os
+import sqlite3
+import sys
+import threading
 import time
+from collections import OrderedDict
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext
+import config_store
+import bloom_filter
+import simhash_index
+import arabic_normalization_handler
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Store message hashes for checking duplicates (in-memory for simplicity)
-# In a production environment, this should be a persistent storage
-message_hashes = set()
-# Maximum number of messages to remember (to prevent unlimited memory growth)
+# Hot cache of hashes seen recently, oldest first: {hash: last seen timestamp}
+# The full window lives in a SQLite index so it survives restarts and is shared between processes
+message_hashes = OrderedDict()
+_hashes_lock = threading.Lock()
+HOT_CACHE_SIZE = 10000
+
+# Bloom filter of every hash in the index: new messages (the common case) are
+# answered from memory and only hashes it may hold are looked up on disk.
+# It is rebuilt from the index once it fills up, and picks up hashes recorded
+# by other processes every BLOOM_SYNC_INTERVAL seconds.
+BLOOM_ERROR_RATE = 0.01
+MIN_BLOOM_CAPACITY = 1024
+BLOOM_SYNC_INTERVAL = 2
+_bloom = None
+_last_bloom_sync = 0
+
+# Recorded hashes and fingerprints are written to the index every FLUSH_INTERVAL
+# seconds, or sooner once FLUSH_BATCH_SIZE are waiting
+FLUSH_INTERVAL = 1
+FLUSH_BATCH_SIZE = 100
+_pending_hashes = {}
+_pending_fingerprints = {}
+_pending_ready = threading.Condition(_hashes_lock)
+_flusher = None
+_running = False
+
+# Default window: number of messages to remember ("duplicate_memory_size" in config.json)
+# and how long to remember them in hours ("duplicate_memory_hours", 0 = no age limit)
 MAX_MESSAGE_MEMORY = 1000
+DEFAULT_MEMORY_HOURS = 0
+MEMORY_HOURS_CHOICES = (0, 1, 24, 168, 720)
+
+# Detection modes: "exact" compares content hashes, "similar" also catches
+# near-duplicates (changed emoji, links or footer) with SimHash fingerprints
+DEFAULT_MODE = "exact"
+DEFAULT_SIMILARITY_THRESHOLD = 85
+SIMILARITY_THRESHOLD_CHOICES = (80, 85, 90, 95)
+_near_index = None
+
+# SQLite index of message hashes (WAL mode, so several bot processes can share it)
+DEDUP_DB_FILE = 'duplicate_hashes.db'
+PRUNE_INTERVAL = 60
+_connection = None
+_last_prune = 0
+
+# Hash file written by earlier versions; imported into the index once
+LEGACY_HASHES_FILE = 'duplicate_hashes.json'
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def duplicate_filter_menu(update, context):
     """Show the duplicate messages filter menu."""
@@ -46,6 +85,16 @@ def duplicate_filter_menu(update, context):
     # Get current status
     duplicate_filter_enabled = config.get("duplicate_filter_enabled", False)
     status = "✅ مفعّل" if duplicate_filter_enabled else "❌ معطّل"
+    memory_hours = config.get("duplicate_memory_hours", DEFAULT_MEMORY_HOURS)
+    mode = config.get("duplicate_filter_mode", DEFAULT_MODE)
+    mode_text = "متشابهة" if mode == "similar" else "مطابقة تماماً"
+    threshold = config.get("duplicate_similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+    memory_stats = get_memory_stats(config)
+    memory_text = (
+        f'عدد الرسائل المخزنة في الذاكرة: {memory_stats["count"]}/{memory_stats["max_count"]}\n'
+        f'مدة التذكر: {format_memory_hours(memory_hours)}\n'
+        f'في الذاكرة السريعة: {memory_stats["cached"]} ({memory_stats["bytes"] / 1024:.1f} KB)'
+    )
     
     # Create keyboard with options
     keyboard = [
@@ -53,6 +102,18 @@ def duplicate_filter_menu(update, context):
             f"حالة الفلتر: {status}", 
             callback_data='toggle_duplicate_filter'
         )],
+        [InlineKeyboardButton(
+            f"🔍 نمط الكشف: {mode_text}", 
+            callback_data='toggle_duplicate_mode'
+        )],
+        [InlineKeyboardButton(
+            f"📏 نسبة التشابه: {threshold}%", 
+            callback_data='cycle_duplicate_threshold'
+        )],
+        [InlineKeyboardButton(
+            f"⏳ مدة التذكر: {format_memory_hours(memory_hours)}", 
+            callback_data='cycle_duplicate_memory_hours'
+        )],
         [InlineKeyboardButton(
             "🗑️ مسح ذاكرة الرسائل", 
             callback_data='clear_message_memory'
@@ -73,8 +134,9 @@ def duplicate_filter_menu(update, context):
             '♻️ *فلتر الرسائل المكررة*\n\n'
             'تحكم بتوجيه الرسائل المكررة (تم نشرها سابقاً).\n\n'
             f'الحالة الحالية: *{status}*\n\n'
-            'عند تفعيل هذه الميزة، سيتجاهل البوت أي رسالة تم نشرها مسبقاً لتجنب التكرار.\n\n'
-            f'عدد الرسائل المخزنة في الذاكرة: {len(message_hashes)}/{MAX_MESSAGE_MEMORY}',
+            'عند تفعيل هذه الميزة، سيتجاهل البوت أي رسالة تم نشرها مسبقاً لتجنب التكرار.\n'
+            'في نمط "متشابهة" تُعتبر الرسالة مكررة أيضاً إذا اختلفت فقط في رموز أو روابط أو تذييل.\n\n'
+            f'{memory_text}',
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
@@ -84,8 +146,9 @@ def duplicate_filter_menu(update, context):
             '♻️ *فلتر الرسائل المكررة*\n\n'
             'تحكم بتوجيه الرسائل المكررة (تم نشرها سابقاً).\n\n'
             f'الحالة الحالية: *{status}*\n\n'
-            'عند تفعيل هذه الميزة، سيتجاهل البوت أي رسالة تم نشرها مسبقاً لتجنب التكرار.\n\n'
-            f'عدد الرسائل المخزنة في الذاكرة: {len(message_hashes)}/{MAX_MESSAGE_MEMORY}',
+            'عند تفعيل هذه الميزة، سيتجاهل البوت أي رسالة تم نشرها مسبقاً لتجنب التكرار.\n'
+            'في نمط "متشابهة" تُعتبر الرسالة مكررة أيضاً إذا اختلفت فقط في رموز أو روابط أو تذييل.\n\n'
+            f'{memory_text}',
             parse_mode=ParseMode.MARKDOWN,
             reply_markup=reply_markup
         )
@@ -119,14 +182,69 @@ def toggle_duplicate_filter_status(update, context):
             ]])
         )
 
+def cycle_duplicate_memory_hours(update, context):
+    """Switch the duplicate memory age window to the next preset."""
+    config = load_config()
+    
+    current_hours = config.get("duplicate_memory_hours", DEFAULT_MEMORY_HOURS)
+    if current_hours in MEMORY_HOURS_CHOICES:
+        index = (MEMORY_HOURS_CHOICES.index(current_hours) + 1) % len(MEMORY_HOURS_CHOICES)
+    else:
+        index = 0
+    config["duplicate_memory_hours"] = MEMORY_HOURS_CHOICES[index]
+    save_config(config)
+    
+    duplicate_filter_menu(update, context)
+
+def toggle_duplicate_mode(update, context):
+    """Switch duplicate detection between exact and near-duplicate matching."""
+    config = load_config()
+    
+    current_mode = config.get("duplicate_filter_mode", DEFAULT_MODE)
+    config["duplicate_filter_mode"] = "exact" if current_mode == "similar" else "similar"
+    save_config(config)
+    
+    duplicate_filter_menu(update, context)
+
+def cycle_duplicate_threshold(update, context):
+    """Switch the near-duplicate similarity threshold to the next preset."""
+    config = load_config()
+    
+    current_threshold = config.get("duplicate_similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+    if current_threshold in SIMILARITY_THRESHOLD_CHOICES:
+        index = (SIMILARITY_THRESHOLD_CHOICES.index(current_threshold) + 1) % len(SIMILARITY_THRESHOLD_CHOICES)
+    else:
+        index = 0
+    config["duplicate_similarity_threshold"] = SIMILARITY_THRESHOLD_CHOICES[index]
+    save_config(config)
+    
+    duplicate_filter_menu(update, context)
+
+def format_memory_hours(hours):
+    """Return the display text for a memory age window."""
+    if not hours:
+        return "بلا حد"
+    if hours % 24 == 0:
+        return f"{hours // 24} يوم"
+    return f"{hours} ساعة"
+
 def clear_message_memory(update, context):
     """Clear the stored message hashes."""
     query = update.callback_query
     query.answer()
     
-    # Clear the set of message hashes
-    global message_hashes
-    message_hashes.clear()
+    # Clear the remembered message hashes
+    with _hashes_lock:
+        message_hashes.clear()
+        _pending_hashes.clear()
+        _pending_fingerprints.clear()
+        connection = _get_connection()
+        _bloom.clear()
+        connection.execute("DELETE FROM message_hashes")
+        connection.execute("DELETE FROM message_simhashes")
+        connection.commit()
+        if _near_index is not None:
+            _near_index.clear()
     
     # Show success message
     query.edit_message_text(
@@ -138,11 +256,33 @@ def clear_message_memory(update, context):
         ]])
     )
 
-def get_message_hash(message):
+def get_media_id(message):
+    """Return the unique file ids of the media in a message ('' for text messages)."""
+    media_id = ""
+    if message.photo and message.photo:
+        media_id += message.photo[-1].file_unique_id  # Use largest photo
+    if message.video:
+        media_id += message.video.file_unique_id
+    if message.audio:
+        media_id += message.audio.file_unique_id
+    if message.document:
+        media_id += message.document.file_unique_id
+    if message.animation:
+        media_id += message.animation.file_unique_id
+    if message.voice:
+        media_id += message.voice.file_unique_id
+    if message.video_note:
+        media_id += message.video_note.file_unique_id
+    if message.sticker:
+        media_id += message.sticker.file_unique_id
+    return media_id
+
+def get_message_hash(message, normalize=False):
     """Generate a hash for the message content to identify duplicates.
     
     Args:
         message: A Telegram message object
+        normalize (bool): Hash the Arabic-normalized text, so spelling variants count as duplicates
         
     Returns:
         str: A hash string representing the message content
@@ -156,23 +296,11 @@ def get_message_hash(message):
     elif message.caption:
         content += message.caption
     
+    if normalize and content:
+        content = arabic_normalization_handler.normalize(content).text
+    
     # For media messages, add file unique identifier
-    if message.photo and message.photo:
-        content += message.photo[-1].file_unique_id  # Use largest photo
-    if message.video:
-        content += message.video.file_unique_id
-    if message.audio:
-        content += message.audio.file_unique_id
-    if message.document:
-        content += message.document.file_unique_id
-    if message.animation:
-        content += message.animation.file_unique_id
-    if message.voice:
-        content += message.voice.file_unique_id
-    if message.video_note:
-        content += message.video_note.file_unique_id
-    if message.sticker:
-        content += message.sticker.file_unique_id
+    content += get_media_id(message)
     
     # Add poll question if it's a poll
     if message.poll:
@@ -188,44 +316,343 @@ def get_message_hash(message):
     
     return None
 
-def should_forward_duplicate_message(message):
-    """Check if a message should be forwarded based on duplicate status.
+def remember_message(message, config=None):
+    """Record a message in the duplicate memory.
+    
+    Lookups hit the in-memory cache first (an insertion-ordered dict, so lookup,
+    insert and eviction are O(1)), then the Bloom filter, and only read the
+    SQLite index for hashes the filter may hold. The hash is written to the
+    index with the next batch.
     
     Args:
         message: A Telegram message object
+        config: Optional configuration snapshot with the memory window settings
         
     Returns:
-        bool: True if the message should be forwarded, False otherwise
+        bool: True if the message was not seen before, False if it is a duplicate
     """
-    global message_hashes
-    
-    # Load config to check if this feature is enabled
-    config = load_config()
-    duplicate_filter_enabled = config.get("duplicate_filter_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not duplicate_filter_enabled:
-        return True
+    if config is None:
+        config = config_store.get_config()
     
     # Generate hash for the message
-    message_hash = get_message_hash(message)
+    normalize = arabic_normalization_handler.is_enabled("duplicate", config)
+    message_hash = get_message_hash(message, normalize)
     
     # If couldn't generate hash, forward the message
     if not message_hash:
         return True
     
-    # Check if this message is a duplicate
-    if message_hash in message_hashes:
+    now = time.time()
+    max_count = config.get("duplicate_memory_size", MAX_MESSAGE_MEMORY)
+    max_age = config.get("duplicate_memory_hours", DEFAULT_MEMORY_HOURS) * 3600
+    
+    with _hashes_lock:
+        connection = _get_connection()
+        _evict_expired(now, max_age)
+        
+        # Check if this message is a duplicate: in memory, then in the index if the Bloom filter may hold it
+        is_duplicate = message_hash in message_hashes or message_hash in _pending_hashes
+        if not is_duplicate and message_hash in _bloom:
+            row = connection.execute(
+                "SELECT created_at FROM message_hashes WHERE content_hash = ?", (message_hash,)
+            ).fetchone()
+            is_duplicate = row is not None and (not max_age or row[0] >= now - max_age)
+        
+        # Record the hash; seeing it again keeps it in memory longer
+        message_hashes[message_hash] = now
+        message_hashes.move_to_end(message_hash)
+        while len(message_hashes) > min(max_count, HOT_CACHE_SIZE):
+            message_hashes.popitem(last=False)
+        _bloom.add(message_hash)
+        _pending_hashes[message_hash] = now
+        
+        # In "similar" mode also compare the SimHash against the near-duplicate index
+        is_similar = config.get("duplicate_filter_mode", DEFAULT_MODE) == "similar" and (
+            _remember_fingerprint(connection, message, config, now, max_count, max_age, normalize))
+        
+        _start_flusher()
+        if len(_pending_hashes) >= FLUSH_BATCH_SIZE:
+            _pending_ready.notify()
+    
+    if is_duplicate:
         logger.info(f"Duplicate message detected, hash: {message_hash}")
         return False
     
-    # If not a duplicate, add to memory and forward
-    message_hashes.add(message_hash)
+    if is_similar:
+        logger.info(f"Near-duplicate message detected, hash: {message_hash}")
+        return False
+    
+    return True
+
+def _remember_fingerprint(connection, message, config, now, max_count, max_age, normalize=False):
+    """Record the SimHash of a message and check it against the near-duplicate index.
+    
+    Fingerprints are scoped by the media file ids, so only captions of the same
+    media (or texts without media) are compared. Caller holds _hashes_lock.
+    
+    Returns:
+        bool: True if a similar message is already in the window
+    """
+    global _near_index
+    
+    text = message.text or message.caption or ""
+    if normalize:
+        text = arabic_normalization_handler.normalize(text).text
+    fingerprint = simhash_index.get_fingerprint(text)
+    if fingerprint is None:
+        return False
+    
+    # The buckets do not depend on the threshold, only the distance checked on a match
+    threshold = config.get("duplicate_similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD)
+    max_distance = simhash_index.get_max_distance(threshold)
+    if _near_index is None:
+        _near_index = _load_near_index(connection, max_distance, max_count)
+    _near_index.max_distance = max_distance
     
-    # If memory is full, remove oldest entries (simplified approach)
-    if len(message_hashes) > MAX_MESSAGE_MEMORY:
-        # Convert to list, sort by time (this is simplified and not optimal in production)
-        # In production, use a proper time-based cache mechanism
-        message_hashes = set(list(message_hashes)[-MAX_MESSAGE_MEMORY:])
+    _near_index.evict(max_count, now - max_age if max_age else None)
+    scope = get_media_id(message)
+    is_similar = _near_index.find(scope, fingerprint) is not None
+    
+    _near_index.add(scope, fingerprint, now)
+    _near_index.evict(max_count)
+    _pending_fingerprints[(scope, simhash_index.to_signed(fingerprint))] = now
+    return is_similar
+
+def _load_near_index(connection, max_distance, max_count):
+    """Build the near-duplicate index from the most recent stored fingerprints (caller holds _hashes_lock)."""
+    _write_pending(connection)
+    index = simhash_index.SimHashIndex(max_distance)
+    rows = connection.execute(
+        "SELECT scope, simhash, created_at FROM message_simhashes ORDER BY created_at DESC LIMIT ?",
+        (max_count,)
+    ).fetchall()
+    for scope, value, created_at in reversed(rows):
+        index.add(scope, simhash_index.from_signed(value), created_at)
+    return index
+
+def _evict_expired(now, max_age):
+    """Drop hashes older than max_age seconds from the cache (caller holds _hashes_lock)."""
+    if not max_age:
+        return
+    cutoff = now - max_age
+    while message_hashes:
+        _, seen_at = next(iter(message_hashes.items()))
+        if seen_at >= cutoff:
+            break
+        message_hashes.popitem(last=False)
+
+def _prune_index(connection, now, max_count, max_age):
+    """Remove hashes outside the window from the index (caller holds _hashes_lock)."""
+    global _last_prune
+    _last_prune = now
+    if max_age:
+        connection.execute("DELETE FROM message_hashes WHERE created_at < ?", (now - max_age,))
+        connection.execute("DELETE FROM message_simhashes WHERE created_at < ?", (now - max_age,))
+    connection.execute(
+        "DELETE FROM message_hashes WHERE content_hash IN ("
+        "SELECT content_hash FROM message_hashes ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (max_count,)
+    )
+    connection.execute(
+        "DELETE FROM message_simhashes WHERE rowid IN ("
+        "SELECT rowid FROM message_simhashes ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+        (max_count,)
+    )
+    connection.commit()
+
+def _write_pending(connection):
+    """Write the buffered hashes and fingerprints in one transaction (caller holds _hashes_lock).
     
-    return True
\ No newline at end of file
+    If the write fails the batch stays buffered and is retried with the next one.
+    """
+    if not _pending_hashes and not _pending_fingerprints:
+        return
+    try:
+        connection.executemany(
+            "INSERT OR REPLACE INTO message_hashes (content_hash, created_at) VALUES (?, ?)",
+            list(_pending_hashes.items())
+        )
+        connection.executemany(
+            "INSERT OR REPLACE INTO message_simhashes (scope, simhash, created_at) VALUES (?, ?, ?)",
+            [key + (created_at,) for key, created_at in _pending_fingerprints.items()]
+        )
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    _pending_hashes.clear()
+    _pending_fingerprints.clear()
+
+def _build_bloom(connection, max_count):
+    """Fill a new Bloom filter with every hash in the index (caller holds _hashes_lock)."""
+    global _bloom, _last_bloom_sync
+    _last_bloom_sync = time.time()
+    bloom = bloom_filter.BloomFilter(max(2 * max_count, MIN_BLOOM_CAPACITY), BLOOM_ERROR_RATE)
+    for (content_hash,) in connection.execute("SELECT content_hash FROM message_hashes"):
+        bloom.add(content_hash)
+    for content_hash in _pending_hashes:
+        bloom.add(content_hash)
+    _bloom = bloom
+
+def _sync_bloom(connection, now):
+    """Add hashes recorded by other processes since the last sync to the Bloom filter (caller holds _hashes_lock)."""
+    global _last_bloom_sync
+    # Other processes write in batches, so look back over their flush interval too
+    rows = connection.execute(
+        "SELECT content_hash FROM message_hashes WHERE created_at >= ?",
+        (_last_bloom_sync - BLOOM_SYNC_INTERVAL - FLUSH_INTERVAL,)
+    ).fetchall()
+    _last_bloom_sync = now
+    for (content_hash,) in rows:
+        _bloom.add(content_hash)
+
+def flush(config=None):
+    """Write buffered hashes to the index and do the periodic index maintenance.
+    
+    Prunes the window now and then, picks up hashes recorded by other
+    processes, and rebuilds the Bloom filter once it is full.
+    """
+    if config is None:
+        config = config_store.get_config()
+    max_count = config.get("duplicate_memory_size", MAX_MESSAGE_MEMORY)
+    max_age = config.get("duplicate_memory_hours", DEFAULT_MEMORY_HOURS) * 3600
+    now = time.time()
+    
+    with _hashes_lock:
+        connection = _get_connection()
+        _write_pending(connection)
+        if now - _last_prune >= PRUNE_INTERVAL:
+            _prune_index(connection, now, max_count, max_age)
+        if _bloom.is_full() or _bloom.capacity < max_count:
+            _build_bloom(connection, max_count)
+        elif now - _last_bloom_sync >= BLOOM_SYNC_INTERVAL:
+            _sync_bloom(connection, now)
+
+def _flush_loop():
+    """Background thread writing recorded hashes to the index."""
+    while True:
+        with _hashes_lock:
+            if _running and len(_pending_hashes) < FLUSH_BATCH_SIZE:
+                _pending_ready.wait(FLUSH_INTERVAL)
+            if not _running:
+                return
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Error writing the duplicate index: {str(e)}")
+
+def _start_flusher():
+    """Start the flusher thread on first use (caller holds _hashes_lock)."""
+    global _flusher, _running
+    if _flusher is None:
+        _running = True
+        _flusher = threading.Thread(target=_flush_loop, name="duplicate-index-flusher", daemon=True)
+        _flusher.start()
+
+def _get_connection():
+    """Open the SQLite index on first use (caller holds _hashes_lock)."""
+    global _connection
+    if _connection is not None:
+        return _connection
+    
+    connection = sqlite3.connect(DEDUP_DB_FILE, timeout=10, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    # created_at is the time the hash was last recorded
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS message_hashes ("
+        "content_hash TEXT PRIMARY KEY, created_at REAL NOT NULL)"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS ix_message_hashes_created_at ON message_hashes (created_at)"
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS message_simhashes ("
+        "scope TEXT NOT NULL, simhash INTEGER NOT NULL, created_at REAL NOT NULL, "
+        "PRIMARY KEY (scope, simhash))"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS ix_message_simhashes_created_at ON message_simhashes (created_at)"
+    )
+    connection.commit()
+    _connection = connection
+    
+    _import_legacy_hashes(connection)
+    
+    _build_bloom(connection, config_store.get_config().get("duplicate_memory_size", MAX_MESSAGE_MEMORY))
+    
+    # Warm the cache with the most recent hashes
+    rows = connection.execute(
+        "SELECT content_hash, created_at FROM message_hashes ORDER BY created_at DESC LIMIT ?",
+        (HOT_CACHE_SIZE,)
+    ).fetchall()
+    for content_hash, created_at in reversed(rows):
+        message_hashes[content_hash] = created_at
+    logger.info(f"Duplicate index opened with {len(rows)} cached hashes")
+    return connection
+
+def _import_legacy_hashes(connection):
+    """Move hashes from LEGACY_HASHES_FILE into the index and delete the file."""
+    try:
+        with open(LEGACY_HASHES_FILE, 'r', encoding='utf-8') as file:
+            saved = json.load(file)
+    except FileNotFoundError:
+        return
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Error loading {LEGACY_HASHES_FILE}: {str(e)}")
+        return
+    
+    # Saved as a list of [hash, timestamp] pairs
+    connection.executemany(
+        "INSERT OR REPLACE INTO message_hashes (content_hash, created_at) VALUES (?, ?)", saved
+    )
+    connection.commit()
+    os.remove(LEGACY_HASHES_FILE)
+    logger.info(f"Imported {len(saved)} message hashes from {LEGACY_HASHES_FILE}")
+
+def get_memory_stats(config=None):
+    """Return the size of the duplicate memory for display.
+    
+    Returns:
+        dict: count (hashes in the index), cached, max_count and an estimate
+              of the bytes used by the in-memory cache
+    """
+    if config is None:
+        config = config_store.get_config()
+    
+    with _hashes_lock:
+        connection = _get_connection()
+        _write_pending(connection)
+        count = connection.execute("SELECT COUNT(*) FROM message_hashes").fetchone()[0]
+        cached = len(message_hashes)
+        size = sys.getsizeof(message_hashes)
+        if cached:
+            # All entries have the same shape: a 32-char hex digest and a float
+            sample_hash, sample_time = next(iter(message_hashes.items()))
+            size += cached * (sys.getsizeof(sample_hash) + sys.getsizeof(sample_time))
+    
+    return {
+        "count": count,
+        "cached": cached,
+        "max_count": config.get("duplicate_memory_size", MAX_MESSAGE_MEMORY),
+        "bytes": size
+    }
+
+def close():
+    """Write buffered hashes and close the SQLite index, e.g. on shutdown."""
+    global _connection, _flusher, _running
+    with _hashes_lock:
+        _running = False
+        _pending_ready.notify()
+        flusher = _flusher
+        _flusher = None
+    if flusher is not None:
+        flusher.join(timeout=10)
+    with _hashes_lock:
+        if _connection is not None:
+            try:
+                _write_pending(_connection)
+            except Exception as e:
+                logger.error(f"Error writing the duplicate index: {str(e)}")
+            _connection.close()
+            _connection = None
@@ -0,0 +1,58 @@
+"""
+Module for planning how one source post is sent to all of its targets.
+Targets are grouped by transform profile, so each distinct chain of replacements,
+link cleaning, translation and formatting runs once per post and its result is
+shared by the parallel sends to every target of the group.
+"""
+
+import logging
+from collections import OrderedDict
+
+import copy_engine
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class SendGroup:
+    """Targets whose copies of a post get the same transformed text."""
+
+    __slots__ = ("profile", "sends")
+
+    def __init__(self, profile):
+        self.profile = profile
+        # (target_chat, config) pairs; configs may differ in non-transform settings
+        self.sends = []
+
+def plan(message, routes):
+    """Filter a post with each route and group the accepted targets by transform profile.
+
+    A target reached through several routes is only sent the post once, by the
+    first route that accepts it.
+
+    Args:
+        message: The source Telegram message
+        routes: The routes of the message's chat
+
+    Returns:
+        list: SendGroup objects in route order
+    """
+    groups = OrderedDict()
+    planned_targets = set()
+    for route in routes:
+        rejected_by = route.pipeline.run(message)
+        if rejected_by:
+            logger.info(f"Message {message.message_id} rejected by the '{rejected_by}' filter "
+                        f"of route '{route.name}'. Skipping route.")
+            continue
+
+        profile = copy_engine.get_transform_profile(route.config)
+        for target in route.targets:
+            if target in planned_targets:
+                continue
+            planned_targets.add(target)
+            groups.setdefault(profile, SendGroup(profile)).sends.append((target, route.config))
+
+    if groups:
+        logger.info(f"Planned message {message.message_id} for {len(planned_targets)} target(s) "
+                    f"in {len(groups)} transform group(s)")
+    return list(groups.values())
@@ -0,0 +1,168 @@
+"""
+Module for the compiled message filter pipeline used by the forwarding bot.
+The pipeline is rebuilt only when the configuration changes and keeps just the enabled stages.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import config_store
+import media_filters_handler
+import keyword_matcher
+import arabic_normalization_handler
+import inline_button_filter_handler
+import link_cleaner_handler
+import language_filter_handler
+import duplicate_filter_handler
+import working_hours_handler
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cached pipeline for the current configuration version
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+# Duplicate verdicts of recent messages: a post routed to several targets is
+# checked by several pipelines, and only the first check may consume the memory
+DUPLICATE_VERDICT_CACHE_SIZE = 256
+_duplicate_verdicts = OrderedDict()
+_duplicate_verdicts_lock = threading.Lock()
+
+def _check_duplicate(message, config):
+    """Run the duplicate filter once per message and reuse its verdict for later checks."""
+    key = (message.chat_id, message.message_id)
+    with _duplicate_verdicts_lock:
+        if key in _duplicate_verdicts:
+            return _duplicate_verdicts[key]
+        verdict = duplicate_filter_handler.remember_message(message, config)
+        _duplicate_verdicts[key] = verdict
+        while len(_duplicate_verdicts) > DUPLICATE_VERDICT_CACHE_SIZE:
+            _duplicate_verdicts.popitem(last=False)
+        return verdict
+
+class ForwardPipeline:
+    """An ordered list of enabled filter stages compiled from one config snapshot.
+
+    Each stage is a (name, check) pair where check(message, text) returns True
+    when the message may continue. Stages are ordered cheapest-first and the
+    stateful duplicate memory runs last so rejected messages never consume it.
+    Rate limiting is not a stage: it is applied per target when the send is queued.
+    """
+
+    def __init__(self, config, version):
+        self.config = config
+        self.version = version
+        self.stages = _build_stages(config)
+
+    @property
+    def stage_names(self):
+        """Names of the enabled stages in execution order."""
+        return [name for name, _ in self.stages]
+
+    def run(self, message):
+        """Run the message through every stage.
+
+        Args:
+            message: A Telegram message object
+
+        Returns:
+            str: The name of the stage that rejected the message, or None if it passed
+        """
+        text = message.text or message.caption or ""
+        for name, check in self.stages:
+            if not check(message, text):
+                return name
+        return None
+
+def _build_stages(config):
+    """Compile the enabled filters of a config snapshot into stage callables."""
+    stages = []
+
+    # Forwarding switched off: reject everything with a single constant check
+    if not config.get("forwarding_enabled", True):
+        stages.append(("forwarding", lambda message, text: False))
+        return stages
+
+    if config.get("working_hours_enabled", False):
+        start_hour = config.get("working_hours_start", 9)
+        end_hour = config.get("working_hours_end", 21)
+        stages.append(("working_hours", lambda message, text: working_hours_handler.is_hour_in_range(
+            datetime.now().hour, start_hour, end_hour)))
+
+    blocked_types = frozenset(
+        media_type for media_type, allowed in config.get("media_filters", {}).items() if not allowed
+    )
+    if blocked_types:
+        stages.append(("media_type", lambda message, text: (
+            media_filters_handler.get_message_type(message) not in blocked_types)))
+
+    if config.get("char_limit_enabled", False):
+        char_limit_count = config.get("char_limit_count", 1000)
+        stages.append(("char_limit", lambda message, text: len(text) <= char_limit_count))
+
+    if config.get("forwarded_filter_enabled", False):
+        stages.append(("forwarded", lambda message, text: not (
+            message.forward_from or message.forward_from_chat)))
+
+    if config.get("inline_button_filter_enabled", False):
+        stages.append(("inline_buttons", lambda message, text: not (
+            inline_button_filter_handler.has_inline_keyboard(message))))
+
+    blacklist = tuple(config.get("blacklist", ()))
+    if config.get("blacklist_enabled", True) and blacklist:
+        blacklist_matcher = keyword_matcher.get_matcher(
+            blacklist, arabic_normalization_handler.is_enabled("blacklist", config))
+
+        def check_blacklist(message, text):
+            term = blacklist_matcher.search(text)
+            if term is not None:
+                logger.info(f"Message {message.message_id} matched blacklisted word '{term}'")
+            return term is None
+
+        stages.append(("blacklist", check_blacklist))
+
+    whitelist = tuple(config.get("whitelist", ()))
+    if config.get("whitelist_enabled", False) and whitelist:
+        whitelist_matcher = keyword_matcher.get_matcher(
+            whitelist, arabic_normalization_handler.is_enabled("whitelist", config))
+
+        def check_whitelist(message, text):
+            if not text:
+                return True
+            term = whitelist_matcher.search(text)
+            if term is not None:
+                logger.debug(f"Message {message.message_id} matched whitelisted word '{term}'")
+            return term is not None
+
+        stages.append(("whitelist", check_whitelist))
+
+    if config.get("link_filter_enabled", False):
+        stages.append(("links", lambda message, text: not link_cleaner_handler.message_contains_links(message, text)))
+
+    if config.get("language_filter_enabled", False):
+        filter_mode = config.get("language_filter_mode", "whitelist")
+        target_language = config.get("language_filter_language", "ar")
+        stages.append(("language", lambda message, text: not text or (
+            language_filter_handler.is_language_allowed(text, filter_mode, target_language))))
+
+    if config.get("duplicate_filter_enabled", False):
+        stages.append(("duplicate", lambda message, text: _check_duplicate(message, config)))
+
+    return stages
+
+def get_pipeline():
+    """Return the pipeline for the current configuration, rebuilding it if the config changed."""
+    global _pipeline
+    config, version = config_store.get_versioned_config()
+    pipeline = _pipeline
+    if pipeline is not None and pipeline.version == version:
+        return pipeline
+
+    with _pipeline_lock:
+        if _pipeline is None or _pipeline.version != version:
+            _pipeline = ForwardPipeline(config, version)
+            logger.info(f"Built forward pipeline v{version}: {', '.join(_pipeline.stage_names) or 'no filters'}")
+        return _pipeline
@@ -3,33 +3,21 @@ Module for handling forwarded messages filter functionality in the Telegram bot.
 This module contains all functions related to filtering forwarded messages.
 """
 
-import json
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def forwarded_filter_menu(update, context):
     """Show the forwarded messages filter menu."""
@@ -103,25 +91,4 @@ def toggle_forwarded_filter_status(update, context):
             reply_markup=InlineKeyboardMarkup([[
                 InlineKeyboardButton("🔙 العودة", callback_data='forwarded_filter_menu')
             ]])
-        )
-
-def should_forward_forwarded_message(message):
-    """Check if a forwarded message should be forwarded based on config.
-    
-    Returns:
-        bool: True if the message should be forwarded, False otherwise.
-    """
-    # Load config to check if this feature is enabled
-    config = load_config()
-    forwarded_filter_enabled = config.get("forwarded_filter_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not forwarded_filter_enabled:
-        return True
-    
-    # Check if the message is a forwarded message
-    if message.forward_from or message.forward_from_chat:
-        return False
-    
-    # Otherwise, forward the message
-    return True
\ No newline at end of file
+        )
\ No newline at end of file
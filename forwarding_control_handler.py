@@ -4,11 +4,11 @@ Module for handling forwarding control functionality in the Telegram bot.
 This module contains all functions related to enabling/disabling message forwarding.
 """
 import logging
-import json
 import datetime
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
+import config_store
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +21,7 @@ def toggle_forwarding_status(update, context):
     """Toggle the forwarding feature on/off."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.load_config()
         
         # Toggle the forwarding status
         current_status = config.get('forwarding_enabled', True)
@@ -30,8 +29,7 @@ def toggle_forwarding_status(update, context):
         config['forwarding_enabled'] = new_status
         
         # Save the updated configuration
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        config_store.save_config(config)
         
         # Create a status message
         status_text = "تم تمكين توجيه الرسائل" if new_status else "تم تعطيل توجيه الرسائل"
@@ -81,8 +79,7 @@ def forwarding_control_menu(update, context):
             query.answer()
         
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the current forwarding status
         forwarding_status = config.get('forwarding_enabled', True)
@@ -124,33 +121,11 @@ def forwarding_control_menu(update, context):
             update.message.reply_text("حدث خطأ أثناء عرض قائمة التحكم في التوجيه")
         return ConversationHandler.END
 
-def should_forward_message(message_date):
-    """Check if a message should be forwarded based on forwarding status and message date."""
-    try:
-        # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
-        
-        # Check if forwarding is enabled
-        forwarding_enabled = config.get('forwarding_enabled', True)
-        
-        if not forwarding_enabled:
-            return False
-        
-        # If forwarding is enabled, the message should be forwarded
-        return True
-        
-    except Exception as e:
-        logger.error(f"Error checking if message should be forwarded: {str(e)}")
-        # Default to True in case of error to avoid losing messages
-        return True
-
 def get_forwarding_status():
     """Get the current forwarding status for display."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the forwarding status
         forwarding_enabled = config.get('forwarding_enabled', True)
@@ -3,33 +3,21 @@ Module for handling inline button filter functionality in the Telegram bot.
 This module contains all functions related to filtering messages with inline buttons.
 """
 
-import json
 import logging
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def inline_button_filter_menu(update, context):
     """Show the inline button filter menu."""
@@ -118,28 +106,4 @@ def has_inline_keyboard(message):
     return (hasattr(message, 'reply_markup') and 
             message.reply_markup and 
             hasattr(message.reply_markup, 'inline_keyboard') and
-            message.reply_markup.inline_keyboard)
-
-def should_forward_message_with_buttons(message):
-    """Check if a message with inline buttons should be forwarded.
-    
-    Args:
-        message: A Telegram message object
-        
-    Returns:
-        bool: True if the message should be forwarded, False otherwise
-    """
-    # Load config to check if this feature is enabled
-    config = load_config()
-    inline_button_filter_enabled = config.get("inline_button_filter_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not inline_button_filter_enabled:
-        return True
-    
-    # Check if message has inline buttons
-    if has_inline_keyboard(message):
-        return False
-    
-    # Otherwise, forward the message
-    return True
\ No newline at end of file
+            message.reply_markup.inline_keyboard)
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Module for matching messages against word lists (blacklist, whitelist).
+A word list is compiled once into a single trie-shaped regular expression, so
+checking a message is one pass over its text however long the list is.
+"""
+
+import functools
+import logging
+import re
+
+import arabic_normalization_handler
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of compiled word lists kept (blacklist and whitelist, plus room for edits)
+MATCHER_CACHE_SIZE = 8
+
+def _build_trie(terms):
+    """Build a character trie; the '' key marks the end of a term."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+def _trie_to_pattern(node):
+    """Convert a trie node into a regex that matches its terms, longest first."""
+    is_end = '' in node
+    branches = [re.escape(char) + _trie_to_pattern(child) for char, child in node.items() if char != '']
+    if not branches:
+        return ''
+
+    if len(branches) == 1:
+        pattern = branches[0]
+        if is_end:
+            # Optional single branch; wrap multi-character branches before adding '?'
+            pattern = f"(?:{pattern})?" if len(branches[0]) > 1 else pattern + '?'
+        return pattern
+
+    pattern = f"(?:{'|'.join(branches)})"
+    return pattern + '?' if is_end else pattern
+
+def build_trie_pattern(terms):
+    """Return a regex matching any of the terms, preferring the longest at each position."""
+    return _trie_to_pattern(_build_trie(terms))
+
+class KeywordMatcher:
+    """A compiled, case-insensitive matcher for a list of terms.
+
+    Terms are casefolded and merged into a trie before being turned into a
+    regex, so shared prefixes are only tested once and the regex engine never
+    retries thousands of alternatives at each position. With normalize=True
+    terms and texts are compared in their Arabic-normalized form.
+    """
+
+    def __init__(self, terms, normalize=False):
+        self.normalize = normalize
+        # Casefolded term -> the term as the admin entered it (for audit logs)
+        self.terms = {}
+        for term in terms:
+            term = str(term)
+            if normalize:
+                folded = arabic_normalization_handler.normalize_term(term).strip()
+            else:
+                folded = term.casefold().strip()
+            if folded and folded not in self.terms:
+                self.terms[folded] = term
+        self.pattern = re.compile(build_trie_pattern(self.terms)) if self.terms else None
+
+    def _fold(self, text):
+        """Return the form of a text that terms are matched against."""
+        if self.normalize:
+            return arabic_normalization_handler.normalize(text).text
+        return text.casefold()
+
+    def search(self, text):
+        """Return the first term found in the text, or None.
+
+        Args:
+            text (str): The message text or caption
+
+        Returns:
+            str: The matched term as it appears in the word list, or None
+        """
+        if self.pattern is None or not text:
+            return None
+        match = self.pattern.search(self._fold(text))
+        if match is None:
+            return None
+        return self.terms[match.group()]
+
+@functools.lru_cache(maxsize=MATCHER_CACHE_SIZE)
+def _get_cached_matcher(terms, normalize):
+    """Compile and cache the matcher for a tuple of terms."""
+    logger.info(f"Compiled keyword matcher for {len(terms)} terms")
+    return KeywordMatcher(terms, normalize)
+
+def get_matcher(terms, normalize=False):
+    """Return the compiled matcher for a word list, compiling it only when the list changes.
+
+    Args:
+        terms: A list or tuple of words
+        normalize (bool): Match the Arabic-normalized forms of terms and text
+
+    Returns:
+        KeywordMatcher: The shared matcher for that list
+    """
+    return _get_cached_matcher(tuple(terms), normalize)
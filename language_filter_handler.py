@@ -3,12 +3,16 @@ Module for handling language filter functionality in the Telegram bot.
 This module contains all functions related to filtering messages by language.
 """
 
-import json
+import hashlib
 import logging
 import re
-from langdetect import detect, LangDetectException
+import threading
+from collections import OrderedDict
+from langdetect import DetectorFactory, detect, LangDetectException
+from langdetect.detector_factory import init_factory
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext, ConversationHandler
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,25 +38,61 @@ LANGUAGE_NAMES = {
     "hi": "الهندية"
 }
 
+# langdetect is random unless seeded; seed it so the same text always gets the same language
+DetectorFactory.seed = 0
+
+# Shortest text worth detecting
+MIN_TEXT_LENGTH = 10
+
+# Number of detection results kept, keyed by a hash of the text
+DETECTION_CACHE_SIZE = 1024
+
+# Share of letters that must be in one script for the script to decide
+SCRIPT_DOMINANCE = 0.8
+
+# Letters of each script, counted in one regex pass per script
+SCRIPT_PATTERNS = {
+    "arabic": re.compile('[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]'),
+    "latin": re.compile('[A-Za-z\u00C0-\u024F]'),
+    "cyrillic": re.compile('[\u0400-\u04FF]'),
+    "devanagari": re.compile('[\u0900-\u097F]'),
+    "hangul": re.compile('[\u1100-\u11FF\uAC00-\uD7AF]'),
+    "kana": re.compile('[\u3040-\u30FF]'),
+    "han": re.compile('[\u4E00-\u9FFF]')
+}
+
+# Script of each filterable language
+LANGUAGE_SCRIPTS = {
+    "ar": "arabic", "fa": "arabic", "ur": "arabic",
+    "en": "latin", "fr": "latin", "de": "latin", "es": "latin", "it": "latin", "tr": "latin",
+    "ru": "cyrillic",
+    "hi": "devanagari",
+    "ko": "hangul",
+    "ja": "kana",
+    "zh-cn": "han"
+}
+
+# Scripts used by a single language of the list, unless a letter of another language appears
+SCRIPT_LANGUAGES = {
+    "arabic": ("ar", re.compile('[پچژگکیٹڈڑںےہۀ]')),
+    "cyrillic": ("ru", re.compile('[іїєґўђјљњћџѓќѕ]', re.IGNORECASE)),
+    "devanagari": ("hi", None),
+    "hangul": ("ko", None),
+    "kana": ("ja", None),
+    "han": ("zh-cn", None)
+}
+
+# Detection cache: text hash -> language code (or None)
+_detection_cache = OrderedDict()
+_detection_cache_lock = threading.Lock()
+
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def language_filter_menu(update, context):
     """Show the language filter menu."""
@@ -248,56 +288,93 @@ def set_language(update, context, language_code):
             ]])
         )
 
+def warm_up():
+    """Load the langdetect language profiles now instead of on the first message."""
+    init_factory()
+    logger.info("Loaded language detection profiles")
+
+def get_dominant_script(text):
+    """Return the script most letters of the text are written in, or None if mixed.
+    
+    Args:
+        text (str): The text to inspect
+        
+    Returns:
+        str: A key of SCRIPT_PATTERNS, or None if no script reaches SCRIPT_DOMINANCE
+    """
+    counts = {script: pattern.subn('', text)[1] for script, pattern in SCRIPT_PATTERNS.items()}
+    # Japanese mixes kana with han characters
+    if counts["kana"]:
+        counts["kana"] += counts.pop("han")
+    
+    total = sum(counts.values())
+    if not total:
+        return None
+    script = max(counts, key=counts.get)
+    return script if counts[script] >= total * SCRIPT_DOMINANCE else None
+
+def _detect_by_script(text, script):
+    """Return the language a script settles on its own, or None if langdetect has to decide."""
+    if script not in SCRIPT_LANGUAGES:
+        return None
+    language, other_letters = SCRIPT_LANGUAGES[script]
+    if other_letters is not None and other_letters.search(text):
+        return None
+    return language
+
 def detect_language(text):
     """Detect the language of a text.
     
+    Texts in a script only one supported language uses (Arabic without Persian or
+    Urdu letters, Cyrillic, Hangul...) are settled by a script histogram; only
+    Latin and ambiguous texts go to the seeded langdetect. Results are cached.
+    
     Args:
         text (str): The text to detect language from
         
     Returns:
         str: The detected language code or None if detection failed
     """
-    try:
-        # Need minimum amount of text to detect language
-        if len(text) < 10:
-            return None
-            
-        return detect(text)
-    except LangDetectException:
-        logger.warning(f"Failed to detect language for text: {text[:30]}...")
+    # Need minimum amount of text to detect language
+    if len(text) < MIN_TEXT_LENGTH:
         return None
+    
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    with _detection_cache_lock:
+        if key in _detection_cache:
+            _detection_cache.move_to_end(key)
+            return _detection_cache[key]
+    
+    language = _detect_by_script(text, get_dominant_script(text))
+    if language is None:
+        try:
+            language = detect(text)
+        except LangDetectException:
+            logger.warning(f"Failed to detect language for text: {text[:30]}...")
+    
+    with _detection_cache_lock:
+        _detection_cache[key] = language
+        while len(_detection_cache) > DETECTION_CACHE_SIZE:
+            _detection_cache.popitem(last=False)
+    return language
 
-def should_forward_by_language(message):
-    """Check if a message should be forwarded based on language.
+def is_language_allowed(text, filter_mode, target_language):
+    """Check a text against the language filter settings.
     
     Args:
-        message: A Telegram message object
+        text (str): The message text or caption
+        filter_mode (str): Either "whitelist" or "blacklist"
+        target_language (str): The language code the filter applies to
         
     Returns:
         bool: True if the message should be forwarded, False otherwise
     """
-    # Load config to check if this feature is enabled
-    config = load_config()
-    language_filter_enabled = config.get("language_filter_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not language_filter_enabled:
-        return True
-    
-    # Only apply filter to text messages
-    text = None
-    if message.text:
-        text = message.text
-    elif message.caption:
-        text = message.caption
-    
-    # If no text, always forward
-    if not text:
-        return True
-    
-    # Get filter settings
-    filter_mode = config.get("language_filter_mode", "whitelist")
-    target_language = config.get("language_filter_language", "ar")
+    # A text written in another script than the target language cannot be in it
+    target_script = LANGUAGE_SCRIPTS.get(target_language)
+    if target_script and len(text) >= MIN_TEXT_LENGTH:
+        script = get_dominant_script(text)
+        if script and script != target_script:
+            return filter_mode != "whitelist"
     
     # Detect message language
     detected_language = detect_language(text)
@@ -4,31 +4,49 @@ This module contains all functions related to removing links and usernames from
 """
 
 import logging
-import json
 import re
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error("Failed to load config.json")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
-        return False
+    return config_store.save_config(config)
+
+# One compiled alternation for every kind of link; the named group tells which one matched.
+# Every branch is anchored on a literal (http, [, <a, @, t.me) or a word boundary and uses
+# bounded or non-overlapping repeats, so no input can make it backtrack catastrophically.
+# Markdown texts and HTML attributes also stop at the next [ or <, so a run of unclosed
+# openers fails after a few characters instead of scanning the bounded window each time.
+LINK_PATTERN = re.compile(
+    r'(?P<markdown>\[(?P<markdown_text>[^\[\]\n]{1,256})\]\(https?://[^)\s]+\))'
+    r'|(?P<html><a\s[^<>]{0,512}?href=(["\'])[^"\'<>]{1,2048}\4[^<>]{0,512}>(?P<html_text>[^<]{0,1024})</a>)'
+    r'|(?P<url>https?://\S+)'
+    r'|(?P<telegram>(?<![\w.])(?:t|telegram)\.(?:me|dog)/\S+)'
+    r'|(?P<username>(?<!\w)@[A-Za-z0-9_]{1,64})'
+    r'|(?P<domain>(?<![\w.@-])(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,24}\b(?:[/?#][^\s]*)?)',
+    re.IGNORECASE
+)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Telegram entity types that mark a link or @username; a text_mention names a user
+# without a username and is not a link
+LINK_ENTITY_TYPES = frozenset(("url", "text_link", "mention"))
+
+def has_link_entities(entities):
+    """Check if Telegram's message entities contain a link or username."""
+    return any(entity.type in LINK_ENTITY_TYPES for entity in entities)
+
+def strip_link_entities(entities):
+    """Return the entities without links and mentions (their text is cleaned separately)."""
+    return [entity for entity in entities if entity.type not in LINK_ENTITY_TYPES]
 
 def contains_links(text):
     """Check if text contains links or usernames.
@@ -41,68 +59,45 @@ def contains_links(text):
     """
     if not text:
         return False
-        
-    # Check for Telegram URLs (t.me, telegram.me, telegram.dog)
-    if re.search(r'https?://(?:t(?:elegram)?\.(?:me|dog)|telegram\.me)/[^\s]+', text):
-        return True
-    
-    # Check for other URLs
-    if re.search(r'https?://[^\s]+', text):
-        return True
-    
-    # Check for markdown URLs [text](url)
-    if re.search(r'\[([^\]]+)\]\(https?://[^\)]+\)', text):
-        return True
-    
-    # Check for HTML links <a href="url">text</a>
-    if re.search(r'<a\s+(?:[^>]*?\s+)?href=(["\'])(?:https?://)?(?:[-A-Za-z0-9+&@#/%?=~_|!:,.;]+[-A-Za-z0-9+&@#/%=~_|])\1[^>]*>(.*?)</a>', text):
-        return True
     
-    # Check for usernames (@username)
-    if re.search(r'@([A-Za-z0-9_]+)', text):
-        return True
-    
-    # Check for channel names
-    if re.search(r't\.me/([A-Za-z0-9_]+)', text):
-        return True
-    
-    # Check for any remaining URLs with parameters
-    if re.search(r'[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)', text):
-        return True
+    return LINK_PATTERN.search(text) is not None
+
+def text_has_links(text, entities=None):
+    """Check if a text contains links or usernames, given the Telegram entities of the text.
     
-    return False
+    Telegram already marks links and usernames as entities, so those are used
+    when the text has any; the regex is only run on text without entities.
+    """
+    if not text:
+        return False
+    if entities:
+        return has_link_entities(entities)
+    return contains_links(text)
+
+def message_contains_links(message, text=None):
+    """Check if a message contains links or usernames (see text_has_links)."""
+    if text is None:
+        text = message.text or message.caption
+    entities = message.entities if message.text else message.caption_entities
+    return text_has_links(text, entities)
+
+def _clean_link_match(match):
+    """Return what is left of a link match: the visible text of markdown and HTML links."""
+    if match.group('markdown'):
+        return match.group('markdown_text')
+    if match.group('html'):
+        return match.group('html_text')
+    return ''
 
 def clean_links(text):
     """Remove all links and usernames from the text."""
     if not text:
         return text
-        
-    # Clean Telegram URLs (t.me, telegram.me, telegram.dog)
-    text = re.sub(r'https?://(?:t(?:elegram)?\.(?:me|dog)|telegram\.me)/[^\s]+', '', text)
-    
-    # Clean other URLs
-    text = re.sub(r'https?://[^\s]+', '', text)
     
-    # Clean markdown URLs [text](url)
-    text = re.sub(r'\[([^\]]+)\]\(https?://[^\)]+\)', r'\1', text)
-    
-    # Clean HTML links <a href="url">text</a>
-    text = re.sub(r'<a\s+(?:[^>]*?\s+)?href=(["\'])(?:https?://)?(?:[-A-Za-z0-9+&@#/%?=~_|!:,.;]+[-A-Za-z0-9+&@#/%=~_|])\1[^>]*>(.*?)</a>', r'\2', text)
-    
-    # Clean usernames (@username)
-    text = re.sub(r'@([A-Za-z0-9_]+)', '', text)
-    
-    # Clean channel names
-    text = re.sub(r't\.me/([A-Za-z0-9_]+)', '', text)
-    
-    # Remove any remaining URLs with parameters
-    text = re.sub(r'[-a-zA-Z0-9@:%._\+~#=]{1,256}\.[a-zA-Z0-9()]{1,6}\b(?:[-a-zA-Z0-9()@:%_\+.~#?&//=]*)', '', text)
+    text = LINK_PATTERN.sub(_clean_link_match, text)
     
     # Remove doubled whitespace from cleanup
-    text = re.sub(r'\s+', ' ', text)
-    text = text.strip()
-    
-    return text
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
 
 def link_cleaner_menu(update, context):
     """Show the link cleaner menu."""
@@ -224,41 +219,6 @@ def link_filter_menu(update, context):
             reply_markup=reply_markup
         )
 
-def should_forward_message_with_links(message):
-    """Check if a message with links should be forwarded.
-    
-    Args:
-        message: A Telegram message object
-        
-    Returns:
-        bool: True if the message should be forwarded, False otherwise
-    """
-    # Load config to check if this feature is enabled
-    config = load_config()
-    link_filter_enabled = config.get("link_filter_enabled", False)
-    
-    # If feature is disabled, always forward
-    if not link_filter_enabled:
-        return True
-    
-    # Check message text and caption for links
-    text = None
-    if message.text:
-        text = message.text
-    elif message.caption:
-        text = message.caption
-    
-    # If no text, forward the message
-    if not text:
-        return True
-    
-    # If text contains links and filter is enabled, don't forward
-    if contains_links(text):
-        return False
-    
-    # Otherwise, forward the message
-    return True
-
 def test_link_cleaner(update, context):
     """Show a test interface for the link cleaner."""
     update.callback_query.answer()
@@ -12,6 +12,7 @@ from flask import Flask, session, redirect, url_for, render_template, request, f
 from werkzeug.security import check_password_hash, generate_password_hash
 from flask_sqlalchemy import SQLAlchemy
 from jinja_translations import init_template_translations, get_template_language
+from utils import get_send_queue_stats
 
 # تحميل متغيرات البيئة من ملف .env
 # Load environment variables from .env file
@@ -311,6 +312,7 @@ def dashboard():
         return render_template(
             'dashboard.html', 
             stats=stats, 
+            queue_stats=get_send_queue_stats(),
             source_channel=source_channel,
             target_channel=target_channel,
             forward_mode=forward_mode,
@@ -14,14 +14,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Media filter function
-def should_forward_media_type(media_type, config):
-    """Check if a particular media type should be forwarded based on config."""
-    # Get media filters from config
-    media_filters = config.get('media_filters', {})
-    
-    # Default to True if filter is not set
-    return media_filters.get(media_type, True)
+def get_message_type(message):
+    """Return the media filter key for a message, or None if the type is unknown."""
+    if message.photo:
+        return "photo"
+    if message.video:
+        return "video"
+    if message.audio:
+        return "audio"
+    if message.voice:
+        return "voice"
+    if message.document:
+        return "document"
+    if message.animation:
+        return "animation"
+    if message.sticker:
+        return "sticker"
+    if message.video_note:
+        return "video_note"
+    if message.poll:
+        return "poll"
+    if message.game:
+        return "game"
+    if message.contact:
+        return "contact"
+    if message.location:
+        return "location"
+    if message.venue:
+        return "venue"
+    if message.text:
+        return "text"
+    return None
 
 # Media filters menu
 def media_filters_menu(update, context):
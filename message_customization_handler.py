@@ -4,8 +4,8 @@ This module contains all functions related to adding headers, footers, and inlin
 """
 
 import logging
-import json
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,22 +18,17 @@ WAITING_BUTTON_URL = 4
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error("Failed to load config.json")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
-        return False
+    return config_store.save_config(config)
+
+def get_header_prefix(config):
+    """Return the text put before the message by the header, or an empty string"""
+    if config.get("header_enabled", False) and config.get("header_text"):
+        return f"{config.get('header_text')}\n\n"
+    return ""
 
 def customize_message_text(message_text, config):
     """Add header and footer to message text"""
@@ -41,9 +36,7 @@ def customize_message_text(message_text, config):
         message_text = ""
     
     # Add header if enabled
-    if config.get("header_enabled", False) and config.get("header_text"):
-        header = config.get("header_text")
-        message_text = f"{header}\n\n{message_text}"
+    message_text = get_header_prefix(config) + message_text
     
     # Add footer if enabled
     if config.get("footer_enabled", False) and config.get("footer_text"):
@@ -0,0 +1,251 @@
+"""
+Module for storing which target message each forwarded source message became.
+Mappings live in a SQLite table (WAL mode) keyed on (source_chat, source_msg_id,
+target_chat). Writes are buffered and committed in batches by a background thread;
+lookups hit a small in-memory cache before the indexed table.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import config_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# SQLite store of message mappings
+MESSAGE_MAP_DB_FILE = 'message_map.db'
+_connection = None
+_db_lock = threading.Lock()
+
+# Buffered writes are committed every FLUSH_INTERVAL seconds, or sooner once
+# FLUSH_BATCH_SIZE mappings are waiting
+FLUSH_INTERVAL = 1
+FLUSH_BATCH_SIZE = 100
+_pending = OrderedDict()
+# Batch being written right now; still visible to lookups until it is committed
+_writing = {}
+_pending_lock = threading.Lock()
+_pending_ready = threading.Condition(_pending_lock)
+_flusher = None
+_running = False
+
+# Recently looked up or recorded mappings: (source_chat, source_msg_id, target_chat) -> target_msg_id
+CACHE_SIZE = 4096
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# Mappings older than this many days are removed ("message_map_retention_days", 0 = keep all)
+DEFAULT_RETENTION_DAYS = 30
+PRUNE_INTERVAL = 3600
+_last_prune = 0
+
+# Map file written by earlier versions ({source_msg_id: target_msg_id}); imported once
+LEGACY_MAP_FILE = 'message_map.json'
+
+def _get_connection():
+    """Open the SQLite store on first use (caller holds _db_lock)."""
+    global _connection
+    if _connection is not None:
+        return _connection
+
+    connection = sqlite3.connect(MESSAGE_MAP_DB_FILE, timeout=10, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS message_map ("
+        "source_chat INTEGER NOT NULL, source_msg_id INTEGER NOT NULL, "
+        "target_chat INTEGER NOT NULL, target_msg_id INTEGER NOT NULL, created_at REAL NOT NULL, "
+        "PRIMARY KEY (source_chat, source_msg_id, target_chat)) WITHOUT ROWID"
+    )
+    connection.execute(
+        "CREATE INDEX IF NOT EXISTS ix_message_map_created_at ON message_map (created_at)"
+    )
+    connection.commit()
+    _connection = connection
+
+    _import_legacy_map(connection)
+    return connection
+
+def _import_legacy_map(connection):
+    """Move mappings from LEGACY_MAP_FILE into the store and rename the file to a backup.
+
+    The old file only kept message ids, so the chats are taken from the
+    configured source and target channel. The backup is not imported again
+    and can be renamed back if the import has to be redone.
+    """
+    try:
+        with open(LEGACY_MAP_FILE, 'r', encoding='utf-8') as file:
+            saved = json.load(file)
+    except FileNotFoundError:
+        return
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Error loading {LEGACY_MAP_FILE}: {str(e)}")
+        return
+
+    config = config_store.get_config()
+    source_chat = config.get("source_channel")
+    target_chat = config.get("target_channel")
+    if not source_chat or not target_chat:
+        logger.warning(f"Not importing {LEGACY_MAP_FILE}: source or target channel is not set")
+        return
+
+    now = time.time()
+    rows = [
+        (int(source_chat), int(source_msg_id), int(target_chat), int(target_msg_id), now)
+        for source_msg_id, target_msg_id in saved.items()
+        if target_msg_id is not None
+    ]
+    connection.executemany(
+        "INSERT OR IGNORE INTO message_map (source_chat, source_msg_id, target_chat, target_msg_id, created_at) "
+        "VALUES (?, ?, ?, ?, ?)", rows
+    )
+    connection.commit()
+    os.replace(LEGACY_MAP_FILE, f"{LEGACY_MAP_FILE}.bak")
+    logger.info(f"Imported {len(rows)} message mappings from {LEGACY_MAP_FILE} (kept as {LEGACY_MAP_FILE}.bak)")
+
+def _cache_put(key, target_msg_id):
+    """Put a mapping into the lookup cache."""
+    with _cache_lock:
+        _cache[key] = target_msg_id
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+def record(source_chat, source_msg_id, target_chat, target_msg_id):
+    """Record that a source message was sent to a target chat as target_msg_id.
+
+    The mapping can be looked up immediately; it is written to SQLite with the
+    next batch.
+    """
+    key = (int(source_chat), int(source_msg_id), int(target_chat))
+    _cache_put(key, int(target_msg_id))
+    with _pending_lock:
+        _pending[key] = (int(target_msg_id), time.time())
+        _start_flusher()
+        if len(_pending) >= FLUSH_BATCH_SIZE:
+            _pending_ready.notify()
+
+def get_target_message_id(source_chat, source_msg_id, target_chat):
+    """Return the id of the message a source message became in a target chat, or None."""
+    key = (int(source_chat), int(source_msg_id), int(target_chat))
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    with _pending_lock:
+        for buffered in (_pending, _writing):
+            if key in buffered:
+                return buffered[key][0]
+
+    with _db_lock:
+        row = _get_connection().execute(
+            "SELECT target_msg_id FROM message_map WHERE source_chat = ? AND source_msg_id = ? AND target_chat = ?",
+            key
+        ).fetchone()
+    if row is None:
+        return None
+    _cache_put(key, row[0])
+    return row[0]
+
+def get_targets(source_chat, source_msg_id):
+    """Return [(target_chat, target_msg_id), ...] for every chat a source message was sent to."""
+    source_chat, source_msg_id = int(source_chat), int(source_msg_id)
+    with _db_lock:
+        rows = _get_connection().execute(
+            "SELECT target_chat, target_msg_id FROM message_map WHERE source_chat = ? AND source_msg_id = ?",
+            (source_chat, source_msg_id)
+        ).fetchall()
+    targets = dict(rows)
+    # Mappings not flushed yet
+    with _pending_lock:
+        for buffered in (_writing, _pending):
+            for (pending_source, pending_msg_id, target_chat), (target_msg_id, _) in buffered.items():
+                if pending_source == source_chat and pending_msg_id == source_msg_id:
+                    targets[target_chat] = target_msg_id
+    return list(targets.items())
+
+def flush():
+    """Write all buffered mappings to SQLite in one transaction and prune old ones now and then.
+
+    If the write fails (e.g. the database is locked) the batch is buffered
+    again and retried with the next flush.
+    """
+    global _pending, _writing, _last_prune
+    with _pending_lock:
+        if not _pending:
+            return
+        batch = _writing = _pending
+        _pending = OrderedDict()
+
+    now = time.time()
+    try:
+        with _db_lock:
+            connection = _get_connection()
+            try:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO message_map (source_chat, source_msg_id, target_chat, target_msg_id, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)", [key + value for key, value in batch.items()]
+                )
+                retention_days = config_store.get_config().get("message_map_retention_days", DEFAULT_RETENTION_DAYS)
+                if retention_days and now - _last_prune >= PRUNE_INTERVAL:
+                    _last_prune = now
+                    connection.execute("DELETE FROM message_map WHERE created_at < ?", (now - retention_days * 86400,))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+    except Exception:
+        with _pending_lock:
+            # Mappings recorded since the swap are newer and win
+            batch.update(_pending)
+            _pending = batch
+            _writing = {}
+        raise
+    with _pending_lock:
+        _writing = {}
+
+def _flush_loop():
+    """Background thread committing buffered mappings."""
+    while True:
+        with _pending_lock:
+            if _running and len(_pending) < FLUSH_BATCH_SIZE:
+                _pending_ready.wait(FLUSH_INTERVAL)
+            if not _running and not _pending:
+                return
+        try:
+            flush()
+        except Exception as e:
+            logger.error(f"Error writing message mappings: {str(e)}")
+
+def _start_flusher():
+    """Start the flusher thread on first use (caller holds _pending_lock)."""
+    global _flusher, _running
+    if _flusher is None:
+        _running = True
+        _flusher = threading.Thread(target=_flush_loop, name="message-map-flusher", daemon=True)
+        _flusher.start()
+
+def close():
+    """Write buffered mappings and close the store, e.g. on shutdown."""
+    global _connection, _flusher, _running
+    with _pending_lock:
+        _running = False
+        _pending_ready.notify()
+        flusher = _flusher
+        _flusher = None
+    if flusher is not None:
+        flusher.join(timeout=10)
+    try:
+        flush()
+    except Exception as e:
+        logger.error(f"Error writing message mappings: {str(e)}")
+    with _db_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
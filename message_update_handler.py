@@ -4,11 +4,12 @@ Module for handling message updates, edits, and deletions in the Telegram bot.
 This module contains all functions related to propagating message edits and deletions.
 """
 import logging
-import json
 import datetime
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
+import config_store
+import message_map_store
 
 # Configure logging
 logging.basicConfig(
@@ -17,45 +18,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Dictionary to store message mapping between source and target channels
-# Format: {source_message_id: target_message_id}
-message_map = {}
+def _default_chats(source_chat, target_chat):
+    """Fill in the configured source and target channel for chats that are not given."""
+    config = config_store.get_config()
+    return (source_chat or config.get("source_channel"),
+            target_chat or config.get("target_channel"))
 
-def store_message_mapping(source_message_id, target_message_id):
+def store_message_mapping(source_message_id, target_message_id, source_chat=None, target_chat=None):
     """Store mapping between source and target message IDs."""
     try:
-        # Load the current message map from file
-        try:
-            with open('message_map.json', 'r') as f:
-                message_map = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            message_map = {}
-        
-        # Add new mapping
-        message_map[str(source_message_id)] = target_message_id
-        
-        # Save updated mapping
-        with open('message_map.json', 'w') as f:
-            json.dump(message_map, f, indent=4)
-            
-        logger.info(f"Stored message mapping: {source_message_id} -> {target_message_id}")
+        source_chat, target_chat = _default_chats(source_chat, target_chat)
+        message_map_store.record(source_chat, source_message_id, target_chat, target_message_id)
+        logger.debug(f"Stored message mapping: {source_chat}/{source_message_id} -> {target_chat}/{target_message_id}")
         return True
     except Exception as e:
         logger.error(f"Error storing message mapping: {str(e)}")
         return False
 
-def get_target_message_id(source_message_id):
+def get_target_message_id(source_message_id, source_chat=None, target_chat=None):
     """Get target message ID for a given source message ID."""
     try:
-        # Load the message map from file
-        with open('message_map.json', 'r') as f:
-            message_map = json.load(f)
-        
-        # Get target message ID
-        return message_map.get(str(source_message_id))
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.warning("Message map file not found or invalid")
-        return None
+        source_chat, target_chat = _default_chats(source_chat, target_chat)
+        if not source_chat or not target_chat:
+            return None
+        return message_map_store.get_target_message_id(source_chat, source_message_id, target_chat)
     except Exception as e:
         logger.error(f"Error getting target message ID: {str(e)}")
         return None
@@ -64,8 +50,7 @@ def toggle_edit_propagation_status(update, context):
     """Toggle the edit propagation feature on/off."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.load_config()
         
         # Toggle the edit propagation status
         current_status = config.get('edit_propagation_enabled', True)
@@ -73,8 +58,8 @@ def toggle_edit_propagation_status(update, context):
         config['edit_propagation_enabled'] = new_status
         
         # Save the updated configuration
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        if not config_store.save_config(config):
+            raise IOError("Could not save config.json")
         
         # Create a status message
         status_text = "تم تمكين نقل التعديلات" if new_status else "تم تعطيل نقل التعديلات"
@@ -120,8 +105,7 @@ def toggle_delete_propagation_status(update, context):
     """Toggle the delete propagation feature on/off."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.load_config()
         
         # Toggle the delete propagation status
         current_status = config.get('delete_propagation_enabled', True)
@@ -129,8 +113,8 @@ def toggle_delete_propagation_status(update, context):
         config['delete_propagation_enabled'] = new_status
         
         # Save the updated configuration
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        if not config_store.save_config(config):
+            raise IOError("Could not save config.json")
         
         # Create a status message
         status_text = "تم تمكين نقل الحذف" if new_status else "تم تعطيل نقل الحذف"
@@ -176,8 +160,7 @@ def toggle_reply_status(update, context):
     """Toggle the reply preservation feature on/off."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.load_config()
         
         # Toggle the reply preservation status
         current_status = config.get('preserve_reply_enabled', True)
@@ -185,8 +168,8 @@ def toggle_reply_status(update, context):
         config['preserve_reply_enabled'] = new_status
         
         # Save the updated configuration
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
+        if not config_store.save_config(config):
+            raise IOError("Could not save config.json")
         
         # Create a status message
         status_text = "تم تمكين الحفاظ على الردود" if new_status else "تم تعطيل الحفاظ على الردود"
@@ -236,8 +219,7 @@ def message_updates_menu(update, context):
             query.answer()
         
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the current statuses
         edit_status = config.get('edit_propagation_enabled', True)
@@ -295,8 +277,7 @@ def edit_menu(update, context):
             query.answer()
         
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the current status
         edit_status = config.get('edit_propagation_enabled', True)
@@ -346,8 +327,7 @@ def delete_menu(update, context):
             query.answer()
         
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the current status
         delete_status = config.get('delete_propagation_enabled', True)
@@ -397,8 +377,7 @@ def reply_menu(update, context):
             query.answer()
         
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the current status
         reply_status = config.get('preserve_reply_enabled', True)
@@ -444,8 +423,7 @@ def is_edit_propagation_enabled():
     """Check if edit propagation is enabled."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the edit propagation status
         return config.get('edit_propagation_enabled', True)
@@ -458,8 +436,7 @@ def is_delete_propagation_enabled():
     """Check if delete propagation is enabled."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the delete propagation status
         return config.get('delete_propagation_enabled', True)
@@ -472,8 +449,7 @@ def is_preserve_reply_enabled():
     """Check if reply preservation is enabled."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the reply preservation status
         return config.get('preserve_reply_enabled', True)
@@ -486,8 +462,7 @@ def get_edit_status():
     """Get the current edit propagation status for display."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the edit propagation status
         edit_enabled = config.get('edit_propagation_enabled', True)
@@ -502,8 +477,7 @@ def get_delete_status():
     """Get the current delete propagation status for display."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the delete propagation status
         delete_enabled = config.get('delete_propagation_enabled', True)
@@ -518,8 +492,7 @@ def get_reply_status():
     """Get the current reply preservation status for display."""
     try:
         # Load the current configuration
-        with open('config.json', 'r') as f:
-            config = json.load(f)
+        config = config_store.get_config()
         
         # Get the reply preservation status
         reply_enabled = config.get('preserve_reply_enabled', True)
@@ -0,0 +1,143 @@
+"""
+Module for propagating edits of source posts to the copies in the target channels.
+Edits are looked up in the message map and re-run through the copy transformations;
+rapid successive edits of one post are coalesced into a single outbound edit per copy.
+"""
+
+import logging
+import threading
+import time
+
+from telegram.error import BadRequest
+
+import config_store
+import copy_engine
+import message_map_store
+import rate_limit_handler
+import retry_engine
+import routing_table
+import send_queue
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Seconds to wait for further edits of the same post before pushing the latest
+# version ("edit_coalesce_seconds" in config.json)
+DEFAULT_COALESCE_SECONDS = 3
+
+# Latest unsent version of each edited post: (chat_id, message_id) -> Message
+_pending_edits = {}
+_pending_lock = threading.Lock()
+
+def handle_edited_post(update, context):
+    """Handle an edited_channel_post update from the source channel."""
+    message = update.edited_channel_post or update.edited_message
+    if not message:
+        return
+
+    # Only edits of posts from routed source chats; propagate_edit checks each target's settings
+    if not routing_table.get_routing_table().get_routes(message.chat_id):
+        return
+
+    key = (message.chat_id, message.message_id)
+    with _pending_lock:
+        already_scheduled = key in _pending_edits
+        _pending_edits[key] = message
+    if already_scheduled:
+        logger.info(f"Coalesced edit of message {message.message_id}")
+        return
+
+    delay = config_store.get_config().get("edit_coalesce_seconds", DEFAULT_COALESCE_SECONDS)
+    send_queue.enqueue_at(time.time() + delay, message.chat_id, _flush_edit, context.bot, key)
+
+def _flush_edit(bot, key):
+    """Push the latest version of an edited post to every target; runs on a sender worker."""
+    with _pending_lock:
+        message = _pending_edits.pop(key, None)
+    if message is not None:
+        propagate_edit(bot, message)
+
+def propagate_edit(bot, message):
+    """Apply the current text or caption of a source message to all its copies.
+
+    Each copy is handled with the settings of its route: targets that
+    forward (their copies belong to the source) or have edit propagation off
+    are skipped, and every edit takes a send slot of the target's rate limit.
+    The edits are queued on the target's sender worker.
+
+    Args:
+        bot: The Telegram bot instance
+        message: The edited source message
+
+    Returns:
+        int: The number of target messages an edit was queued for
+    """
+    targets = message_map_store.get_targets(message.chat_id, message.message_id)
+    if not targets:
+        logger.info(f"Edited message {message.message_id} was not forwarded; nothing to update")
+        return 0
+    if not message.text and message.caption is None:
+        # Only texts and captions can be edited
+        return 0
+
+    queued = 0
+    for target_chat, target_msg_id in targets:
+        config = routing_table.get_send_config(message.chat_id, target_chat)
+        if not config.get("edit_propagation_enabled", True):
+            continue
+        # Forwarded copies belong to the source and cannot be edited by the bot
+        if config.get("forward_mode", "forward") == "forward":
+            continue
+
+        rate_slot = rate_limit_handler.reserve_send_slot(target_chat, config)
+        if rate_slot is False:
+            logger.info(f"Edit of message {target_msg_id} in {target_chat} dropped by the rate limit")
+            continue
+        if rate_slot:
+            send_queue.enqueue_at(rate_slot, target_chat, edit_copy, bot, message, target_chat, target_msg_id, config)
+        else:
+            send_queue.enqueue(target_chat, edit_copy, bot, message, target_chat, target_msg_id, config)
+        queued += 1
+
+    logger.info(f"Queued edit of message {message.message_id} for {queued} target message(s)")
+    return queued
+
+def edit_copy(bot, message, target_chat, target_msg_id, config):
+    """Edit one copy of a source message in a target chat; runs on a sender worker."""
+    text, entities = copy_engine.transform_message(message, config)
+    # Album items cannot carry inline buttons, so their copies are edited without one
+    reply_markup = None if message.media_group_id else copy_engine.get_reply_markup(config)
+    try:
+        retry_engine.send_with_retry(
+            target_chat, _edit_target, bot, message, target_chat, target_msg_id, text, entities, reply_markup,
+            max_attempts=config.get("retry_max_attempts", retry_engine.DEFAULT_MAX_ATTEMPTS)
+        )
+        return True
+    except send_queue.RetryLater:
+        raise
+    except BadRequest as e:
+        # e.g. "Message is not modified" or the copy was deleted in the target
+        logger.info(f"Could not edit message {target_msg_id} in {target_chat}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error propagating edit of message {message.message_id} to {target_chat}: {str(e)}")
+    return False
+
+def _edit_target(bot, message, target_chat, target_msg_id, text, entities, reply_markup):
+    """Send one edit call for a copy in a target chat."""
+    markup_kwargs = {"reply_markup": reply_markup} if reply_markup else {}
+    if message.text:
+        return bot.edit_message_text(
+            chat_id=target_chat,
+            message_id=target_msg_id,
+            text=text,
+            entities=entities,
+            disable_web_page_preview=getattr(message, 'disable_web_page_preview', None),
+            **markup_kwargs
+        )
+    return bot.edit_message_caption(
+        chat_id=target_chat,
+        message_id=target_msg_id,
+        caption=text,
+        caption_entities=entities,
+        **markup_kwargs
+    )
@@ -2,13 +2,14 @@
 Module for handling rate limiting functionality in the Telegram bot.
 This module contains all functions related to message rate limiting.
 """
+import heapq
 import logging
-import json
-from datetime import datetime
+import threading
+import time
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 
-import main
+import config_store
 
 # Configure logging
 logging.basicConfig(
@@ -20,8 +21,16 @@ logger = logging.getLogger(__name__)
 # Conversation states
 WAITING_MESSAGES_PER_MINUTE = 1
 
-# Message timestamps for rate limiting
-message_timestamps = []
+# Telegram allows about 20 messages per minute into one channel; stay under it by default
+TELEGRAM_CHANNEL_LIMIT = 20
+TELEGRAM_CHANNEL_BURST = 3
+
+# Maximum number of messages waiting for a rate limit slot before new ones are dropped
+DEFAULT_QUEUE_SIZE = 100
+
+# Rate buckets: "global" and ("target", chat_id) keys
+buckets = {}
+_buckets_lock = threading.Lock()
 
 def toggle_rate_limit_status(update, context):
     """Toggle the rate limit feature on/off."""
@@ -29,13 +38,13 @@ def toggle_rate_limit_status(update, context):
     query.answer()
     
     # Load config and toggle rate limit status
-    config = main.load_config()
+    config = config_store.load_config()
     current_status = config.get("rate_limit_enabled", False)
     
     # Toggle the status
     new_status = not current_status
     config["rate_limit_enabled"] = new_status
-    success = main.save_config(config)
+    success = config_store.save_config(config)
     
     if success:
         status_text = "مفعّلة ✅" if new_status else "معطلة ❌"
@@ -43,6 +52,7 @@ def toggle_rate_limit_status(update, context):
         keyboard = [
             [InlineKeyboardButton("🔄 تغيير الحد: " + str(config.get("messages_per_minute", 20)) + " رسالة/دقيقة", callback_data='change_rate_limit')],
             [InlineKeyboardButton("🔄 الحالة: " + status_text, callback_data='toggle_rate_limit_status')],
+            [InlineKeyboardButton("📥 عند تجاوز الحد: " + get_mode_text(config), callback_data='toggle_rate_limit_mode')],
             [InlineKeyboardButton("🔙 العودة للوحة التحكم", callback_data='admin_panel')]
         ]
         
@@ -69,7 +79,7 @@ def rate_limit_menu(update, context):
     query.answer()
     
     # Load current config
-    config = main.load_config()
+    config = config_store.load_config()
     rate_limit_enabled = config.get("rate_limit_enabled", False)
     messages_per_minute = config.get("messages_per_minute", 20)
     
@@ -78,6 +88,7 @@ def rate_limit_menu(update, context):
     keyboard = [
         [InlineKeyboardButton("🔄 تغيير الحد: " + str(messages_per_minute) + " رسالة/دقيقة", callback_data='change_rate_limit')],
         [InlineKeyboardButton("🔄 الحالة: " + status_text, callback_data='toggle_rate_limit_status')],
+        [InlineKeyboardButton("📥 عند تجاوز الحد: " + get_mode_text(config), callback_data='toggle_rate_limit_mode')],
         [InlineKeyboardButton("🔙 العودة للوحة التحكم", callback_data='admin_panel')]
     ]
     
@@ -98,7 +109,7 @@ def change_rate_limit(update, context):
     query.answer()
     
     # Load current config
-    config = main.load_config()
+    config = config_store.load_config()
     current_limit = config.get("messages_per_minute", 20)
     
     query.edit_message_text(
@@ -126,9 +137,9 @@ def receive_messages_per_minute(update, context):
             return WAITING_MESSAGES_PER_MINUTE
         
         # Load config and update
-        config = main.load_config()
+        config = config_store.load_config()
         config["messages_per_minute"] = limit
-        success = main.save_config(config)
+        success = config_store.save_config(config)
         
         if success:
             rate_limit_enabled = config.get("rate_limit_enabled", False)
@@ -137,6 +148,7 @@ def receive_messages_per_minute(update, context):
             keyboard = [
                 [InlineKeyboardButton("🔄 تغيير الحد: " + str(limit) + " رسالة/دقيقة", callback_data='change_rate_limit')],
                 [InlineKeyboardButton("🔄 الحالة: " + status_text, callback_data='toggle_rate_limit_status')],
+                [InlineKeyboardButton("📥 عند تجاوز الحد: " + get_mode_text(config), callback_data='toggle_rate_limit_mode')],
                 [InlineKeyboardButton("🔙 العودة للوحة التحكم", callback_data='admin_panel')]
             ]
             
@@ -164,44 +176,124 @@ def receive_messages_per_minute(update, context):
         )
         return WAITING_MESSAGES_PER_MINUTE
 
-def should_forward_message():
-    """Check if a message should be forwarded based on rate limit."""
-    global message_timestamps
+class RateBucket:
+    """GCRA rate bucket: O(1) per message, allows bursts of up to `burst` messages.
     
-    # Load config
-    config = main.load_config()
-    rate_limit_enabled = config.get("rate_limit_enabled", False)
+    The bucket stores the theoretical arrival time (tat) of the next message,
+    plus the send times of the messages it deferred so the queue can be capped.
+    """
     
-    # If rate limiting is disabled, always forward
-    if not rate_limit_enabled:
-        return True
+    def __init__(self, messages_per_minute, burst=None):
+        self.configure(messages_per_minute, burst)
+        self.tat = 0.0
+        # Heap of the send times of deferred messages
+        self.deferred = []
     
-    # Get the rate limit
-    messages_per_minute = config.get("messages_per_minute", 20)
+    def configure(self, messages_per_minute, burst=None):
+        """Update the rate without losing the bucket state."""
+        self.messages_per_minute = messages_per_minute
+        self.interval = 60.0 / max(messages_per_minute, 1)
+        self.burst = burst or messages_per_minute
+        self.tolerance = self.interval * (self.burst - 1)
     
-    # Current time
-    current_time = datetime.now()
+    def available_at(self, now):
+        """Return the earliest time the next message may be sent."""
+        return max(now, self.tat - self.tolerance)
     
-    # Clean up old timestamps (older than 1 minute)
-    message_timestamps = [ts for ts in message_timestamps if (current_time - ts).total_seconds() < 60]
+    def consume(self, at, count=1, now=None):
+        """Take `count` tokens for messages sent at `at`; they count as deferred if `at` is after `now`."""
+        self.tat = max(self.tat, at) + self.interval * count
+        if now is not None and at > now:
+            for _ in range(count):
+                heapq.heappush(self.deferred, at)
     
-    # Check if we're under the limit
-    if len(message_timestamps) < messages_per_minute:
-        # Add current timestamp
-        message_timestamps.append(current_time)
-        return True
-    else:
-        # We're over the limit
-        logger.info(f"Rate limit reached ({messages_per_minute} messages per minute). Skipping message.")
-        return False
+    def backlog(self, now):
+        """Return the number of messages already deferred into the future.
+        
+        Counted from the send times rather than from tat: when another bucket
+        defers a message further, this bucket's slots are no longer contiguous.
+        """
+        while self.deferred and self.deferred[0] <= now:
+            heapq.heappop(self.deferred)
+        return len(self.deferred)
+
+def _get_bucket(key, messages_per_minute, burst=None):
+    """Return the bucket for a key, creating or re-configuring it as needed."""
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = RateBucket(messages_per_minute, burst)
+    elif bucket.messages_per_minute != messages_per_minute or bucket.burst != (burst or messages_per_minute):
+        bucket.configure(messages_per_minute, burst)
+    return bucket
+
+def reserve_send_slot(target_channel_id, config=None, count=1):
+    """Reserve a send slot for a message to a target chat.
+    
+    Every target has its own bucket with Telegram's per-channel ceiling. When
+    rate limiting is enabled, the global bucket applies on top of it.
+    
+    Args:
+        target_channel_id: The chat the message goes to
+        config: The configuration snapshot
+        count: The number of messages sent together (the items of an album)
+    
+    Returns:
+        float: The timestamp to send at (deferred), None to send now,
+               or False if the message must be dropped
+    """
+    if config is None:
+        config = config_store.get_config()
+    
+    now = time.time()
+    with _buckets_lock:
+        active = [_get_bucket(
+            ("target", str(target_channel_id)),
+            config.get("per_target_messages_per_minute", TELEGRAM_CHANNEL_LIMIT),
+            TELEGRAM_CHANNEL_BURST
+        )]
+        if config.get("rate_limit_enabled", False):
+            active.append(_get_bucket("global", config.get("messages_per_minute", 20)))
+        
+        send_at = max(bucket.available_at(now) for bucket in active)
+        if send_at > now:
+            if config.get("rate_limit_enabled", False) and config.get("rate_limit_mode", "defer") == "drop":
+                logger.info("Rate limit reached. Dropping message.")
+                return False
+            
+            max_queue = config.get("rate_limit_queue_size", DEFAULT_QUEUE_SIZE)
+            if max(bucket.backlog(now) for bucket in active) >= max_queue:
+                logger.warning(f"Rate limit queue is full ({max_queue} messages). Dropping message.")
+                return False
+        
+        for bucket in active:
+            bucket.consume(send_at, count, now)
+    
+    return send_at if send_at > now else None
+
+def get_deferred_count():
+    """Return the largest number of messages currently deferred by any bucket."""
+    now = time.time()
+    with _buckets_lock:
+        return max((bucket.backlog(now) for bucket in buckets.values()), default=0)
+
+def get_mode_text(config):
+    """Return the display text for what happens to over-limit messages."""
+    return "إسقاط 🗑" if config.get("rate_limit_mode", "defer") == "drop" else "تأجيل ⏳"
+
+def toggle_rate_limit_mode(update, context):
+    """Switch over-limit handling between deferring and dropping messages."""
+    config = config_store.load_config()
+    config["rate_limit_mode"] = "defer" if config.get("rate_limit_mode", "defer") == "drop" else "drop"
+    config_store.save_config(config)
+    rate_limit_menu(update, context)
 
 def get_rate_limit_status():
     """Get the current rate limit status for display."""
-    config = main.load_config()
+    config = config_store.get_config()
     rate_limit_enabled = config.get("rate_limit_enabled", False)
     messages_per_minute = config.get("messages_per_minute", 20)
     
     if rate_limit_enabled:
-        return f"مفعّل ({messages_per_minute} رسالة/دقيقة)"
+        return f"مفعّل ({messages_per_minute} رسالة/دقيقة، {get_mode_text(config)}، مؤجلة: {get_deferred_count()})"
     else:
         return "معطّل"
\ No newline at end of file
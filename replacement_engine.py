@@ -0,0 +1,219 @@
+"""
+Module for applying the text replacement rules in a single pass.
+A rule set is compiled once; the text is scanned left to right and every match
+is replaced by its rule, so replaced text is never matched again and the cost
+does not grow with one string copy per rule.
+"""
+
+import functools
+import logging
+import re
+
+import arabic_normalization_handler
+import keyword_matcher
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Number of compiled rule sets kept (plain and normalized, plus room for edits)
+ENGINE_CACHE_SIZE = 8
+
+# Group references in a replacement template: \g<name>, \g<number> and \number
+_GROUP_REFERENCE_PATTERN = re.compile(r'\\(?:g<([^>]*)>|([1-9][0-9]?))|\\\\')
+# Placeholders (private use characters) standing in for group references during expansion
+_PLACEHOLDER_PATTERN = re.compile('\ue000([0-9]+)\ue001')
+
+# Last (rules, normalize, engine) looked up; config snapshots hand out the same
+# rules tuple for every message, so this skips rebuilding the cache key
+_last_engine = (None, None, None)
+
+def get_rule_key(replacement):
+    """Return (pattern, replace_with, is_regex, whole_word) for a replacement rule dict."""
+    # Support both key names: 'replace_with' and 'replacement'
+    replace_with = replacement.get('replace_with', '') or replacement.get('replacement', '')
+    return (
+        replacement.get('pattern', ''),
+        replace_with,
+        bool(replacement.get('regex', False)),
+        bool(replacement.get('whole_word', False))
+    )
+
+class ReplacementEngine:
+    """A compiled set of replacement rules.
+
+    Literal and whole-word rules are merged into trie-shaped regexes (as in the
+    keyword matcher), so their cost stays flat as the list grows. Regex rules
+    are compiled one by one, so their groups, backreferences and inline flags
+    work exactly as written. The text is scanned left to right; where several
+    rules match at the same position the longest match wins, and ties go to
+    whole-word literals, then other literals, then regex rules in the order
+    they were added. Literal rules with the same pattern keep the first rule,
+    so the output is deterministic. With normalize=True every rule is matched
+    against the normalized text: literals are normalized, and regex rules get
+    their Arabic letters normalized and ignore case.
+    """
+
+    def __init__(self, rule_keys, normalize=False):
+        self.normalize = normalize
+        self.literals = {}
+        self.word_literals = {}
+        self.regex_rules = []
+
+        for pattern, replace_with, is_regex, whole_word in rule_keys:
+            if not pattern:
+                continue
+            if is_regex:
+                try:
+                    compiled = _compile_regex(pattern, normalize)
+                except re.error as e:
+                    logger.error(f"Skipping invalid replacement regex '{pattern}': {e}")
+                    continue
+                self.regex_rules.append((compiled, replace_with))
+                continue
+            if normalize:
+                pattern = arabic_normalization_handler.normalize_term(pattern)
+            target = self.word_literals if whole_word else self.literals
+            target.setdefault(pattern, replace_with)
+
+        # (pattern, kind) in tie-break order; kind is 'word', 'literal' or the index of a regex rule
+        self.matchers = []
+        if self.word_literals:
+            self.matchers.append((re.compile(
+                f"(?<!\\w)(?:{keyword_matcher.build_trie_pattern(self.word_literals)})(?!\\w)"), 'word'))
+        if self.literals:
+            self.matchers.append((re.compile(keyword_matcher.build_trie_pattern(self.literals)), 'literal'))
+        self.matchers.extend((compiled, index) for index, (compiled, _) in enumerate(self.regex_rules))
+
+    def _find_matches(self, text):
+        """Yield (match, kind) for the non-overlapping matches of all rules, left to right.
+
+        Each matcher keeps its next match and is only searched again once the
+        scan has moved past that match's start.
+        """
+        upcoming = [_search(pattern, text, 0) for pattern, _ in self.matchers]
+        position = 0
+        while True:
+            best = None
+            for index, match in enumerate(upcoming):
+                if match is not None and match.start() < position:
+                    match = upcoming[index] = _search(self.matchers[index][0], text, position)
+                if match is None:
+                    continue
+                if best is None or match.start() < best.start() or (
+                        match.start() == best.start() and match.end() > best.end()):
+                    best, best_index = match, index
+            if best is None:
+                return
+            yield best, self.matchers[best_index][1]
+            position = best.end()
+
+    def _replacement_for(self, match, kind, normalized=None):
+        """Return the replacement text for a match of a rule.
+
+        With normalized set, the match is on the normalized text and group
+        references are filled from the matching spans of the original text.
+        """
+        if kind == 'word':
+            return self.word_literals[match.group()]
+        if kind == 'literal':
+            return self.literals[match.group()]
+        replace_with = self.regex_rules[kind][1]
+        if normalized is None:
+            return match.expand(replace_with)
+        return _expand_original(match, replace_with, normalized)
+
+    def apply(self, text):
+        """Apply every rule to the text in one left-to-right pass.
+
+        Args:
+            text (str): The original text
+
+        Returns:
+            str: The text with all matches replaced
+        """
+        if not self.matchers or not text:
+            return text
+
+        # With normalization, match on the normalized text and edit the corresponding spans of the original
+        normalized = arabic_normalization_handler.normalize(text) if self.normalize else None
+        parts = []
+        last_end = 0
+        for match, kind in self._find_matches(text if normalized is None else normalized.text):
+            start, end = match.span() if normalized is None else normalized.to_original_span(*match.span())
+            parts.append(text[last_end:start])
+            parts.append(self._replacement_for(match, kind, normalized))
+            last_end = end
+
+        if not parts:
+            return text
+        parts.append(text[last_end:])
+        return ''.join(parts)
+
+def _compile_regex(pattern, normalize):
+    """Compile a regex rule; in normalize mode it has to match the normalized, casefolded text."""
+    if not normalize:
+        return re.compile(pattern)
+    try:
+        return re.compile(arabic_normalization_handler.normalize_pattern(pattern), re.IGNORECASE)
+    except re.error:
+        # e.g. a character class made only of diacritics, which normalization removes
+        return re.compile(pattern, re.IGNORECASE)
+
+def _search(pattern, text, position):
+    """Return the first non-empty match of a pattern at or after position, or None."""
+    match = pattern.search(text, position)
+    while match is not None and match.end() == match.start():
+        if match.start() >= len(text):
+            return None
+        match = pattern.search(text, match.start() + 1)
+    return match
+
+def _expand_original(match, template, normalized):
+    """Expand a replacement template with the groups of a match on normalized text taken from the original text.
+
+    Group references are swapped for placeholders so match.expand() still
+    handles the escapes (\\n, \\t...), then the placeholders are filled with
+    the original spelling of each group (case, diacritics, alef forms).
+    """
+    groups = []
+
+    def to_placeholder(reference):
+        if reference.group(1) is None and reference.group(2) is None:
+            return reference.group()  # An escaped backslash
+        name = reference.group(1) or reference.group(2)
+        group = int(name) if name.isdigit() else match.re.groupindex[name]
+        start, end = match.span(group)
+        if start < 0:
+            groups.append('')  # The group did not take part in the match
+        else:
+            start, end = normalized.to_original_span(start, end)
+            groups.append(normalized.original[start:end])
+        return f"\ue000{len(groups) - 1}\ue001"
+
+    expanded = match.expand(_GROUP_REFERENCE_PATTERN.sub(to_placeholder, template))
+    return _PLACEHOLDER_PATTERN.sub(lambda placeholder: groups[int(placeholder.group(1))], expanded)
+
+@functools.lru_cache(maxsize=ENGINE_CACHE_SIZE)
+def _get_cached_engine(rule_keys, normalize):
+    """Compile and cache the engine for a tuple of rule keys."""
+    logger.info(f"Compiled replacement engine for {len(rule_keys)} rules")
+    return ReplacementEngine(rule_keys, normalize)
+
+def get_engine(replacements, normalize=False):
+    """Return the compiled engine for a list of replacement rules, compiling it only when the rules change.
+
+    Args:
+        replacements: A list of rule dicts (pattern, replace_with/replacement, regex, whole_word)
+        normalize (bool): Match the rules against the Arabic-normalized text
+
+    Returns:
+        ReplacementEngine: The shared engine for those rules
+    """
+    global _last_engine
+    last_rules, last_normalize, engine = _last_engine
+    if replacements is last_rules and normalize == last_normalize and isinstance(replacements, tuple):
+        return engine
+
+    engine = _get_cached_engine(tuple(get_rule_key(replacement) for replacement in replacements), normalize)
+    _last_engine = (replacements, normalize, engine)
+    return engine
@@ -5,6 +5,7 @@ This module contains all functions related to text replacement functionality.
 
 import logging
 import main
+import replacement_engine
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 
@@ -20,24 +21,33 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Apply text replacements to a message
-def apply_text_replacements(text, replacements):
-    """Apply text replacements to a string."""
-    if not text or not replacements:
+def apply_text_replacements(text, replacements, normalize=False):
+    """Apply text replacements to a string.
+    
+    All rules are applied in one left-to-right pass, longest match first, so
+    the output of one rule is never rewritten by another. With normalize=True
+    patterns match Arabic spelling variants (diacritics, alef forms, ...).
+    """
+    if not text or not replacements or not isinstance(text, str):
         return text
     
-    result = text
-    for replacement in replacements:
-        pattern = replacement.get('pattern', '')
-        
-        # Support both key names: 'replace_with' and 'replacement'
-        replace_with = replacement.get('replace_with', '')
-        if not replace_with:
-            replace_with = replacement.get('replacement', '')
-        
-        if pattern and isinstance(result, str):
-            result = result.replace(pattern, replace_with)
-    
-    return result
+    return replacement_engine.get_engine(replacements, normalize).apply(text)
+
+def build_replacement_rule(pattern, replacement):
+    """Build a replacement rule dict, reading the optional 'regex:' / 'word:' pattern prefixes.
+    
+    'regex:' makes the pattern a regular expression and 'word:' only matches whole words.
+    """
+    rule = {}
+    if pattern.startswith('regex:'):
+        pattern = pattern[len('regex:'):].strip()
+        rule['regex'] = True
+    elif pattern.startswith('word:'):
+        pattern = pattern[len('word:'):].strip()
+        rule['whole_word'] = True
+    rule['pattern'] = pattern
+    rule['replacement'] = replacement
+    return rule
 
 # Main menu for text replacements
 def text_replacements_menu(update, context):
@@ -107,6 +117,10 @@ def view_replacements(update, context):
         replacement_text = replacement.get('replacement', '')
         if not replacement_text:
             replacement_text = replacement.get('replace_with', '')
+        if replacement.get('regex'):
+            pattern = f"regex:{pattern}"
+        elif replacement.get('whole_word'):
+            pattern = f"word:{pattern}"
         replacements_text += f"{i+1}. '{pattern}' ⟹ '{replacement_text}'\n"
     
     if not replacements_text:
@@ -144,6 +158,8 @@ def add_replacement(update, context):
         '`نص2 : نص2 بديل`\n'
         '`نص3 : نص3 بديل`\n\n'
         'يمكنك إضافة استبدال واحد فقط أو عدة استبدالات دفعة واحدة.\n\n'
+        'للمطابقة بالكلمة الكاملة فقط ابدأ النص بـ `word:`، '
+        'ولاستخدام تعبير نمطي (regex) ابدأه بـ `regex:`.\n\n'
         'استخدم /cancel للإلغاء.',
         parse_mode=ParseMode.MARKDOWN,
         reply_markup=InlineKeyboardMarkup([[
@@ -205,12 +221,10 @@ def receive_replacement_pattern(update, context):
                 pattern = parts[0].strip()
                 replacement = parts[1].strip()
                 
-                if pattern and replacement:
+                rule = build_replacement_rule(pattern, replacement)
+                if rule['pattern'] and replacement:
                     # Add this replacement
-                    config['text_replacements'].append({
-                        'pattern': pattern,
-                        'replacement': replacement
-                    })
+                    config['text_replacements'].append(rule)
                     replacements_added += 1
                 else:
                     error_lines.append(i + 1)
@@ -322,10 +336,7 @@ def receive_replacement_text(update, context):
         config['text_replacements'] = []
     
     # Add the new replacement
-    config['text_replacements'].append({
-        'pattern': pattern,
-        'replacement': replace_with
-    })
+    config['text_replacements'].append(build_replacement_rule(pattern, replace_with))
     
     success = main.save_config(config)
     
@@ -0,0 +1,129 @@
+"""
+Module for retrying outbound Telegram calls of the forwarding bot.
+Sends are retried with exponential backoff and jitter, flood waits (RetryAfter)
+are honored exactly without blocking the sender worker, and a circuit breaker
+per target chat stops hammering a chat that keeps failing.
+"""
+
+import logging
+import random
+import threading
+import time
+from telegram.error import RetryAfter, TimedOut, NetworkError, BadRequest, ChatMigrated
+
+import send_queue
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Retry settings (max attempts is overridable with "retry_max_attempts" in config.json)
+DEFAULT_MAX_ATTEMPTS = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+# Circuit breaker: open after this many consecutive failures, probe again after the cooldown
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60.0
+
+# Breaker state per target chat: {target: {"failures": int, "opened_at": float or None}}
+breakers = {}
+_breakers_lock = threading.Lock()
+
+class CircuitOpenError(Exception):
+    """Raised when a send is refused because the target's circuit breaker is open."""
+
+    def __init__(self, target_chat_id, retry_in):
+        super().__init__(f"Circuit open for {target_chat_id}, retry in {retry_in:.0f}s")
+        self.target_chat_id = target_chat_id
+        self.retry_in = retry_in
+
+def is_retryable(error):
+    """Check if an error is transient and the send may succeed when retried."""
+    # BadRequest is a NetworkError subclass but fails the same way every time
+    if isinstance(error, (BadRequest, ChatMigrated)):
+        return False
+    return isinstance(error, (RetryAfter, TimedOut, NetworkError))
+
+def get_backoff_delay(attempt, error=None):
+    """Return how long to wait before the given retry attempt.
+
+    Args:
+        attempt (int): The number of failed attempts so far (1 for the first retry)
+        error: The exception of the failed attempt
+
+    Returns:
+        float: Seconds to wait; exactly retry_after for flood waits, otherwise
+               exponential backoff with full jitter
+    """
+    if isinstance(error, RetryAfter):
+        return float(error.retry_after)
+    return random.uniform(0, min(MAX_DELAY, BASE_DELAY * (2 ** attempt)))
+
+def _check_breaker(target_chat_id):
+    """Raise CircuitOpenError if the target's breaker is open and still cooling down."""
+    with _breakers_lock:
+        breaker = breakers.get(str(target_chat_id))
+        if not breaker or breaker["opened_at"] is None:
+            return
+        remaining = breaker["opened_at"] + BREAKER_COOLDOWN - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(target_chat_id, remaining)
+        # Cooldown over: let this send through as a probe (half-open)
+        breaker["opened_at"] = None
+        breaker["failures"] = BREAKER_THRESHOLD - 1
+
+def _record_result(target_chat_id, success):
+    """Update the target's breaker with the outcome of a send."""
+    with _breakers_lock:
+        breaker = breakers.setdefault(str(target_chat_id), {"failures": 0, "opened_at": None})
+        if success:
+            breaker["failures"] = 0
+            breaker["opened_at"] = None
+            return
+        breaker["failures"] += 1
+        if breaker["failures"] >= BREAKER_THRESHOLD and breaker["opened_at"] is None:
+            breaker["opened_at"] = time.monotonic()
+            logger.warning(f"Circuit opened for {target_chat_id} after {breaker['failures']} failures")
+
+def send_with_retry(target_chat_id, func, *args, max_attempts=DEFAULT_MAX_ATTEMPTS, **kwargs):
+    """Call a send function, retrying transient Telegram errors.
+
+    Runs on a sender worker. Backoff waits happen here and keep the per-target
+    order intact; a flood wait can last minutes, so the job is handed back to
+    the worker to run again after it while other targets are served.
+
+    Args:
+        target_chat_id: The chat the send goes to; used for the circuit breaker
+        func: The callable doing the send
+        max_attempts (int): Total number of attempts before giving up
+        *args, **kwargs: Arguments for func
+
+    Returns:
+        The result of func
+
+    Raises:
+        CircuitOpenError: If the target's breaker is open
+        send_queue.RetryLater: On a flood wait, when called on a sender worker
+        Exception: The last error once the attempts are exhausted or the error is permanent
+    """
+    _check_breaker(target_chat_id)
+
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if not is_retryable(e) or attempt >= max_attempts:
+                _record_result(target_chat_id, False)
+                raise
+            delay = get_backoff_delay(attempt, e)
+            if isinstance(e, RetryAfter) and send_queue.in_worker():
+                logger.warning(f"Flood wait for {target_chat_id}, sending again in {delay:.1f}s")
+                raise send_queue.RetryLater(time.time() + delay) from e
+            logger.warning(f"Send to {target_chat_id} failed ({e}), retry {attempt}/{max_attempts - 1} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        _record_result(target_chat_id, True)
+        return result
@@ -9,7 +9,7 @@ from functools import wraps
 
 from main import app, db, logger
 from models import User, BotSettings, BotStats, TextReplacement, Blacklist, Whitelist, MessageHistory
-from utils import load_config, save_config, get_bot_stats
+from utils import load_config, save_config, get_bot_stats, get_send_queue_stats
 
 # تحقق من مستخدم مصرح له
 def is_authenticated():
@@ -122,6 +122,7 @@ def dashboard():
             'dashboard.html',
             config=config,
             stats=stats,
+            queue_stats=get_send_queue_stats(),
             admin_count=admin_count,
             bot_active=forwarding_enabled
         )
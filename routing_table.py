@@ -0,0 +1,141 @@
+"""
+Module for routing posts from many source chats to many target chats.
+Routes come from the "routes" list in config.json; each maps a set of sources to
+a set of targets with an optional profile of setting overrides. The table is rebuilt
+when the configuration changes, so routes can be edited without restarting the bot.
+"""
+
+import json
+import logging
+import threading
+
+import config_store
+import forward_pipeline
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cached table for the current configuration version
+_table = None
+_table_lock = threading.Lock()
+
+class Route:
+    """Sources, targets and the effective settings (with the route profile applied) of one route.
+
+    Routes with the same profile share one config snapshot and one compiled
+    pipeline, so the filters and transformations keyed on them are shared too.
+    """
+
+    __slots__ = ("name", "sources", "targets", "config", "pipeline")
+
+    def __init__(self, name, sources, targets, config, pipeline):
+        self.name = name
+        self.sources = sources
+        self.targets = targets
+        self.config = config
+        self.pipeline = pipeline
+
+class RoutingTable:
+    """Routes indexed by source chat id, compiled from one config snapshot.
+
+    Example config.json entry:
+        "routes": [
+            {"name": "news", "sources": [-1001], "targets": [-1002, -1003],
+             "profile": {"bold_text_conversion_enabled": true}}
+        ]
+    Without "routes", the single source_channel -> target_channel pair is used.
+    """
+
+    def __init__(self, config, version):
+        self.version = version
+        self.routes = _build_routes(config, version)
+        self.by_source = {}
+        for route in self.routes:
+            for source in route.sources:
+                self.by_source.setdefault(source, []).append(route)
+
+    def get_routes(self, chat_id):
+        """Return the routes for a source chat (an empty tuple for unknown chats)."""
+        return self.by_source.get(chat_id, ())
+
+    def get_target_config(self, source_chat, target_chat):
+        """Return the settings used for a source -> target pair, or None if it is not routed."""
+        target_chat = int(target_chat)
+        for route in self.get_routes(source_chat):
+            if target_chat in route.targets:
+                return route.config
+        return None
+
+def _parse_chats(chats):
+    """Convert a chat id or list of chat ids from the config into a tuple of ints."""
+    if chats is None:
+        return ()
+    if not isinstance(chats, (list, tuple)):
+        chats = (chats,)
+    return tuple(int(chat) for chat in chats)
+
+def _build_routes(config, version):
+    """Compile the configured routes, sharing config and pipeline between equal profiles."""
+    rules = config.get("routes")
+    if not rules:
+        source, target = config.get("source_channel"), config.get("target_channel")
+        if not source or not target:
+            return []
+        rules = ({"name": "default", "sources": source, "targets": target},)
+
+    profiles = {}
+    routes = []
+    for index, rule in enumerate(rules):
+        name = rule.get("name") or f"route{index + 1}"
+        try:
+            sources = _parse_chats(rule.get("sources"))
+            targets = _parse_chats(rule.get("targets"))
+        except (TypeError, ValueError) as e:
+            logger.error(f"Skipping route '{name}' with an invalid chat id: {e}")
+            continue
+        if not sources or not targets:
+            logger.error(f"Skipping route '{name}' without sources or targets")
+            continue
+
+        profile = rule.get("profile") or {}
+        profile_key = json.dumps(profile, sort_keys=True, default=dict)
+        if profile_key not in profiles:
+            if profile:
+                route_config = config_store.merge_config(config, profile)
+                profiles[profile_key] = (route_config, forward_pipeline.ForwardPipeline(route_config, version))
+            else:
+                # Routes without a profile use the shared pipeline of the base configuration
+                pipeline = forward_pipeline.get_pipeline()
+                profiles[profile_key] = (pipeline.config, pipeline)
+        route_config, pipeline = profiles[profile_key]
+        routes.append(Route(name, frozenset(sources), targets, route_config, pipeline))
+    return routes
+
+def get_routing_table():
+    """Return the routing table for the current configuration, rebuilding it if the config changed."""
+    global _table
+    version = config_store.get_version()
+    table = _table
+    if table is not None and table.version == version:
+        return table
+    with _table_lock:
+        config, version = config_store.get_versioned_config()
+        if _table is None or _table.version != version:
+            _table = RoutingTable(config, version)
+            logger.info(f"Built routing table v{version}: {len(_table.routes)} route(s), "
+                        f"{len(_table.by_source)} source chat(s)")
+        return _table
+
+def get_send_config(source_chat, target_chat):
+    """Return the settings for sending a post from a source to a target chat.
+
+    Used where a send is resumed outside the routing path (restored delays,
+    replayed dead letters, edits); falls back to the base configuration for
+    pairs that are no longer routed.
+    """
+    table = get_routing_table()
+    try:
+        route_config = table.get_target_config(source_chat, target_chat)
+    except (TypeError, ValueError):
+        route_config = None
+    return route_config if route_config is not None else config_store.get_config()
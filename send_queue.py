@@ -0,0 +1,243 @@
+"""
+Module for the outbound send queue of the forwarding bot.
+Send jobs are drained by a pool of worker threads so slow Telegram or translation
+calls never block the update dispatcher. Jobs for the same target chat always go
+to the same worker, which keeps their order.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default number of sender workers (overridable with "send_workers" in config.json)
+DEFAULT_WORKERS = 4
+
+# File the metrics are exported to so the web dashboard (a separate process) can read them
+STATS_FILE = 'send_queue_stats.json'
+STATS_EXPORT_INTERVAL = 5
+
+# Worker state
+_queues = []
+_workers = []
+_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+# Jobs waiting for their release time: heap of (run_at, seq, target, func, args, kwargs)
+_scheduled = []
+_schedule_cond = threading.Condition()
+_scheduler = None
+_sequence = itertools.count()
+
+# Queue metrics
+queue_stats = {
+    "enqueued": 0,
+    "processed": 0,
+    "failed": 0,
+    "deferred": 0,
+    "max_depth": 0,
+    "last_latency": 0.0,
+    "avg_latency": 0.0,
+    "max_latency": 0.0
+}
+_last_export = 0
+_export_lock = threading.Lock()
+
+# Marks the sender worker threads
+_worker_state = threading.local()
+
+class RetryLater(Exception):
+    """Raised by a send job to run again at retry_at instead of waiting on its worker.
+
+    The worker holds back the later jobs of the same target until then, so they
+    keep their order while the jobs of other targets go on. A job that already
+    did part of its work passes the callable and arguments that finish it.
+    """
+
+    def __init__(self, retry_at, func=None, *args, **kwargs):
+        super().__init__(f"Retry in {max(retry_at - time.time(), 0):.1f}s")
+        self.retry_at = retry_at
+        self.job = (func, args, kwargs) if func else None
+
+def in_worker():
+    """Check if the calling thread is a sender worker."""
+    return getattr(_worker_state, "active", False)
+
+def start(workers=DEFAULT_WORKERS):
+    """Start the sender worker pool if it is not running yet."""
+    with _lock:
+        if _workers:
+            return
+        workers = max(1, int(workers))
+        for index in range(workers):
+            job_queue = queue.Queue()
+            worker = threading.Thread(
+                target=_worker_loop, args=(job_queue,), name=f"sender-{index}", daemon=True
+            )
+            _queues.append(job_queue)
+            _workers.append(worker)
+            worker.start()
+        logger.info(f"Started {workers} sender workers")
+
+def stop(timeout=10):
+    """Stop the worker pool after the queued jobs have been sent."""
+    with _lock:
+        if not _workers:
+            return
+        for job_queue in _queues:
+            job_queue.put(None)
+        for worker in _workers:
+            worker.join(timeout)
+        _queues.clear()
+        _workers.clear()
+        logger.info("Sender workers stopped")
+
+def enqueue(target_chat_id, func, *args, **kwargs):
+    """Queue a send job for a target chat.
+
+    Args:
+        target_chat_id: The chat the job sends to; used to keep per-target order
+        func: The callable doing the send
+        *args, **kwargs: Arguments for func
+    """
+    if not _workers:
+        import config_store
+        start(config_store.get_config().get("send_workers", DEFAULT_WORKERS))
+
+    job_queue = _queues[hash(str(target_chat_id)) % len(_queues)]
+    job_queue.put((time.monotonic(), target_chat_id, func, args, kwargs))
+
+    depth = get_depth()
+    with _stats_lock:
+        queue_stats["enqueued"] += 1
+        if depth > queue_stats["max_depth"]:
+            queue_stats["max_depth"] = depth
+
+def enqueue_at(run_at, target_chat_id, func, *args, **kwargs):
+    """Queue a send job that is released to the workers at a given time.
+
+    Args:
+        run_at (float): Wall-clock timestamp (time.time()) to release the job at
+        target_chat_id: The chat the job sends to
+        func: The callable doing the send
+        *args, **kwargs: Arguments for func
+    """
+    global _scheduler
+    with _schedule_cond:
+        heapq.heappush(_scheduled, (run_at, next(_sequence), target_chat_id, func, args, kwargs))
+        if _scheduler is None:
+            _scheduler = threading.Thread(target=_scheduler_loop, name="send-scheduler", daemon=True)
+            _scheduler.start()
+        _schedule_cond.notify()
+
+def get_scheduled_count():
+    """Return the number of jobs waiting for their release time."""
+    return len(_scheduled)
+
+def _scheduler_loop():
+    """Move scheduled jobs into the worker queues once they are due."""
+    while True:
+        with _schedule_cond:
+            while not _scheduled:
+                _schedule_cond.wait()
+            wait_time = _scheduled[0][0] - time.time()
+            if wait_time > 0:
+                _schedule_cond.wait(wait_time)
+                continue
+            _, _, target_chat_id, func, args, kwargs = heapq.heappop(_scheduled)
+        enqueue(target_chat_id, func, *args, **kwargs)
+
+def get_depth():
+    """Return the number of jobs waiting in all worker queues."""
+    return sum(job_queue.qsize() for job_queue in _queues)
+
+def get_queue_stats():
+    """Return the current queue metrics for display."""
+    with _stats_lock:
+        return dict(queue_stats, depth=get_depth(), scheduled=get_scheduled_count(), workers=len(_workers))
+
+def _record_job(latency, failed):
+    """Update the metrics with one finished job and its enqueue-to-done latency."""
+    with _stats_lock:
+        queue_stats["processed"] += 1
+        if failed:
+            queue_stats["failed"] += 1
+        queue_stats["last_latency"] = latency
+        queue_stats["avg_latency"] += (latency - queue_stats["avg_latency"]) / queue_stats["processed"]
+        if latency > queue_stats["max_latency"]:
+            queue_stats["max_latency"] = latency
+
+def _export_stats(force=False):
+    """Write the queue metrics to STATS_FILE, at most every STATS_EXPORT_INTERVAL seconds.
+
+    Workers export one at a time, and the file is replaced atomically so the
+    dashboard never reads a half-written one.
+    """
+    global _last_export
+    with _export_lock:
+        now = time.time()
+        if not force and now - _last_export < STATS_EXPORT_INTERVAL:
+            return
+        _last_export = now
+        temp_file = f"{STATS_FILE}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(dict(get_queue_stats(), updated_at=now), file)
+            os.replace(temp_file, STATS_FILE)
+        except Exception as e:
+            logger.error(f"Error exporting send queue stats: {e}")
+
+def _worker_loop(job_queue):
+    """Drain one worker queue until stop() is called."""
+    _worker_state.active = True
+    # Targets of this worker waiting out a flood wait: {target: retry_at}
+    paused = {}
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+
+        enqueued_at, target_chat_id, func, args, kwargs = job
+        target_key = str(target_chat_id)
+        retry_at = paused.get(target_key)
+        if retry_at is not None:
+            if time.time() < retry_at:
+                # Queue behind the job that hit the flood wait to keep the order
+                _defer(retry_at, target_chat_id, func, args, kwargs)
+                job_queue.task_done()
+                continue
+            del paused[target_key]
+
+        deferred = failed = False
+        try:
+            func(*args, **kwargs)
+        except RetryLater as e:
+            deferred = True
+            paused[target_key] = e.retry_at
+            if e.job:
+                func, args, kwargs = e.job
+            _defer(e.retry_at, target_chat_id, func, args, kwargs)
+            logger.info(f"Send job for {target_chat_id} deferred: {str(e)}")
+        except Exception as e:
+            failed = True
+            logger.error(f"Error in send job for {target_chat_id}: {str(e)}")
+        finally:
+            if not deferred:
+                _record_job(time.monotonic() - enqueued_at, failed)
+            _export_stats()
+            job_queue.task_done()
+
+    _export_stats(force=True)
+
+def _defer(run_at, target_chat_id, func, args, kwargs):
+    """Schedule a job again for run_at; it is counted as enqueued once more when released."""
+    with _stats_lock:
+        queue_stats["deferred"] += 1
+    enqueue_at(run_at, target_chat_id, func, *args, **kwargs)
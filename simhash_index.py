@@ -0,0 +1,157 @@
+"""
+Module for near-duplicate detection with SimHash fingerprints.
+Fingerprints are 64-bit SimHashes over character shingles of normalized text, and an
+LSH index finds fingerprints within a Hamming distance without scanning
+every stored message.
+"""
+
+import hashlib
+import random
+import re
+from collections import OrderedDict
+
+FINGERPRINT_BITS = 64
+_FINGERPRINT_MASK = (1 << FINGERPRINT_BITS) - 1
+
+# Shingle length in characters, and the shortest normalized text worth fingerprinting
+SHINGLE_SIZE = 4
+MIN_LENGTH = 20
+
+_url_pattern = re.compile(r'(?:https?://|www\.|t\.me/)\S+', re.IGNORECASE)
+_non_word_pattern = re.compile(r'[^\w\s]+')
+
+def normalize_text(text):
+    """Reduce text to lowercase words separated by single spaces, without links, emoji or punctuation."""
+    text = _url_pattern.sub(' ', text.casefold())
+    return ' '.join(_non_word_pattern.sub(' ', text).split())
+
+def get_fingerprint(text):
+    """Return the 64-bit SimHash of a text, or None if it is too short.
+
+    Args:
+        text (str): The message text or caption
+
+    Returns:
+        int: The fingerprint, or None if the normalized text is shorter than MIN_LENGTH
+    """
+    text = normalize_text(text)
+    if len(text) < MIN_LENGTH:
+        return None
+
+    shingles = {text[index:index + SHINGLE_SIZE] for index in range(len(text) - SHINGLE_SIZE + 1)}
+    hashes = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for shingle in shingles
+    ]
+
+    # Each fingerprint bit is set when most shingle hashes have it set;
+    # zip() transposes the bit strings so every column is counted in C
+    half = len(hashes) / 2
+    bits = ''.join('1' if column.count('1') > half else '0' for column in zip(*hashes))
+    return int(bits, 2)
+
+# Largest Hamming distance the index looks for (at the lowest similarity threshold)
+MAX_DISTANCE = 8
+MIN_THRESHOLD = 80
+
+# Lookup tables: each one buckets fingerprints on TABLE_BITS of their bits.
+# The first tables split the bits into disjoint bands, so fingerprints within
+# FINGERPRINT_BITS // TABLE_BITS - 1 bits always share a bucket; the others
+# use fixed random bit sets, which find larger distances with high probability
+TABLE_COUNT = 16
+TABLE_BITS = 16
+
+def get_max_distance(threshold):
+    """Convert a similarity threshold in percent into a maximum Hamming distance.
+
+    MIN_THRESHOLD allows MAX_DISTANCE bits and 100% only identical fingerprints.
+    Unrelated texts differ in about half of the bits, so the distance stays far
+    below where they would start to match.
+    """
+    threshold = min(max(threshold, MIN_THRESHOLD), 100)
+    return (100 - threshold) * MAX_DISTANCE // (100 - MIN_THRESHOLD)
+
+def _table_masks():
+    """Return the bit masks of the lookup tables."""
+    masks = [((1 << TABLE_BITS) - 1) << start for start in range(0, FINGERPRINT_BITS, TABLE_BITS)]
+    # Seeded, so every process builds the same tables
+    generator = random.Random(FINGERPRINT_BITS)
+    while len(masks) < TABLE_COUNT:
+        masks.append(sum(1 << bit for bit in generator.sample(range(FINGERPRINT_BITS), TABLE_BITS)))
+    return masks
+
+_TABLE_MASKS = _table_masks()
+
+class SimHashIndex:
+    """LSH index over SimHash fingerprints.
+
+    Fingerprints are bucketed once per lookup table on 16 of their bits, so a
+    lookup only compares against the few fingerprints that agree on all bits
+    of some table and verifies the Hamming distance of those. Similar
+    fingerprints share at least one table with high probability (always, up to
+    3 differing bits), while buckets stay small enough that the cost does not
+    grow with the size of the window.
+
+    Entries are scoped (e.g. by media file id) so captions of different media
+    never match each other.
+    """
+
+    def __init__(self, max_distance):
+        self.max_distance = max_distance
+        self.buckets = {}
+        # (scope, fingerprint) -> timestamp, oldest first
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _bucket_keys(self, scope, fingerprint):
+        """Return the bucket keys of a fingerprint, one per lookup table."""
+        return [(index, scope, fingerprint & mask) for index, mask in enumerate(_TABLE_MASKS)]
+
+    def find(self, scope, fingerprint):
+        """Return a stored fingerprint within max_distance of the given one, or None."""
+        for bucket_key in self._bucket_keys(scope, fingerprint):
+            for candidate in self.buckets.get(bucket_key, ()):
+                if (candidate ^ fingerprint).bit_count() <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, scope, fingerprint, timestamp):
+        """Store a fingerprint, or refresh its timestamp if it is already stored."""
+        key = (scope, fingerprint)
+        if key not in self.entries:
+            for bucket_key in self._bucket_keys(scope, fingerprint):
+                self.buckets.setdefault(bucket_key, set()).add(fingerprint)
+        self.entries[key] = timestamp
+        self.entries.move_to_end(key)
+
+    def pop_oldest(self):
+        """Remove the oldest fingerprint from the index."""
+        (scope, fingerprint), _ = self.entries.popitem(last=False)
+        for bucket_key in self._bucket_keys(scope, fingerprint):
+            bucket = self.buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del self.buckets[bucket_key]
+
+    def evict(self, max_count, cutoff=None):
+        """Remove the oldest fingerprints beyond max_count or older than cutoff."""
+        while len(self.entries) > max_count:
+            self.pop_oldest()
+        while cutoff and self.entries and next(iter(self.entries.values())) < cutoff:
+            self.pop_oldest()
+
+    def clear(self):
+        """Remove every fingerprint."""
+        self.buckets.clear()
+        self.entries.clear()
+
+def to_signed(fingerprint):
+    """Convert a fingerprint to a signed 64-bit integer for storage in SQLite."""
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >> (FINGERPRINT_BITS - 1) else fingerprint
+
+def from_signed(value):
+    """Convert a stored signed 64-bit integer back to a fingerprint."""
+    return value & _FINGERPRINT_MASK
@@ -4,7 +4,6 @@ This module initializes the bot, handlers, and starts the bot.
 """
 
 import os
-import json
 import logging
 from datetime import datetime
 
@@ -20,6 +19,16 @@ import command_handlers
 import replacements_handler
 import media_filters_handler
 import blacklist_handler
+import delay_handler
+import dead_letter_handler
+import duplicate_filter_handler
+import message_map_store
+import propagation_engine
+import routing_table
+import language_filter_handler
+import config_store
+import send_queue
+import translation_engine
 
 # Set up logging
 logging.basicConfig(
@@ -29,14 +38,13 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Configuration file path
-CONFIG_FILE = 'config.json'
+CONFIG_FILE = config_store.CONFIG_FILE
 
 def load_config():
     """Load bot configuration from config.json file"""
     try:
         if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            return config_store.load_config()
         else:
             # Default configuration
             default_config = {
@@ -65,8 +73,7 @@ def load_config():
                 "blacklist": [],
                 "blacklist_enabled": True
             }
-            with open(CONFIG_FILE, 'w', encoding='utf-8') as file:
-                json.dump(default_config, file, ensure_ascii=False, indent=2)
+            config_store.save_config(default_config)
             return default_config
     except Exception as e:
         logger.error(f"Error loading config: {e}")
@@ -74,13 +81,7 @@ def load_config():
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def main():
     """Start the bot"""
@@ -108,6 +109,7 @@ def main():
     logger.info(f"Starting Telegram forwarding bot")
     logger.info(f"Monitoring source channel: {source_channel}")
     logger.info(f"Forwarding to target channel: {target_channel}")
+    logger.info(f"Routes: {len(routing_table.get_routing_table().routes)}")
     
     # Add command handlers
     dispatcher.add_handler(CommandHandler("start", command_handlers.start_command))
@@ -258,25 +260,51 @@ def main():
     )
     dispatcher.add_handler(blacklist_handler_conv)
     
+    # Dead-letter (failed messages) handlers
+    dispatcher.add_handler(CallbackQueryHandler(
+        dead_letter_handler.dead_letters_menu, pattern='^dead_letters_menu$'))
+    dispatcher.add_handler(CallbackQueryHandler(
+        dead_letter_handler.replay_dead_letters_command, pattern='^replay_dead_letters$'))
+    dispatcher.add_handler(CallbackQueryHandler(
+        dead_letter_handler.clear_dead_letters_command, pattern='^clear_dead_letters$'))
+    
     # No action handler for informational buttons
     dispatcher.add_handler(CallbackQueryHandler(lambda u, c: None, pattern='^no_action$'))
     
-    # Message handler for channel posts - Only if we have source and target channels configured
-    if source_channel and target_channel:
-        dispatcher.add_handler(
-            MessageHandler(
-                Filters.chat(int(source_channel)) & Filters.update.channel_post,
-                lambda update, context: bot_handler.forward_message(update, context, target_channel)
-            )
-        )
+    # Message handlers for channel posts; the routing table picks the targets of each
+    # source chat and is rebuilt whenever config.json changes, so routes can be
+    # added or edited without restarting the bot
+    dispatcher.add_handler(
+        MessageHandler(Filters.update.channel_post, bot_handler.forward_message)
+    )
+    # Apply edits of forwarded posts to their copies in the target channels
+    dispatcher.add_handler(
+        MessageHandler(Filters.update.edited_channel_post, propagation_engine.handle_edited_post)
+    )
     
     # Add error handler
     dispatcher.add_error_handler(bot_handler.error_handler)
     
+    # Start the sender workers that drain the outbound queue
+    send_queue.start(config.get("send_workers", send_queue.DEFAULT_WORKERS))
+    
+    # Load the language detection profiles before the first message needs them
+    language_filter_handler.warm_up()
+    
+    # Re-schedule delayed messages that were pending before the last shutdown
+    delay_handler.restore_pending_sends(updater.bot, bot_handler.deliver_message)
+    
     # Start the bot
     updater.start_polling()
     logger.info("Bot started successfully. Press Ctrl+C to stop.")
     updater.idle()
+    
+    # Flush queued sends, save the delayed backlog and close the duplicate index, translation cache and message map
+    send_queue.stop()
+    delay_handler.flush_pending_sends()
+    duplicate_filter_handler.close()
+    translation_engine.close()
+    message_map_store.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Shared fixtures for the test suite."""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+# main.py sets up the web app's database on import; give it a throwaway one
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+def pytest_addoption(parser):
+    parser.addoption("--run-benchmarks", action="store_true",
+                     help="run the timing benchmarks (tests marked benchmark)")
+
+def pytest_collection_modifyitems(config, items):
+    # Wall-clock thresholds depend on the machine, so they only run when asked for
+    if config.getoption("--run-benchmarks"):
+        return
+    skip = pytest.mark.skip(reason="timing benchmark; run with --run-benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+class CountingBot:
+    """Bot stand-in that records every API method called on it.
+
+    Set errors[n] to an exception to make the n-th call (counting from 1) raise it.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.errors = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            self.calls.append((name, kwargs))
+            error = self.errors.pop(len(self.calls), None)
+            if error:
+                raise error
+            if name == "send_media_group":
+                return [SimpleNamespace(message_id=len(self.calls) * 100 + index)
+                        for index in range(len(kwargs["media"]))]
+            return SimpleNamespace(message_id=len(self.calls))
+        return call
+
+    @property
+    def call_names(self):
+        return [name for name, _ in self.calls]
+
+@pytest.fixture
+def bot():
+    return CountingBot()
+
+@pytest.fixture
+def configure(tmp_path, monkeypatch):
+    """Run the test in a temporary directory; returns a function that saves config.json there."""
+    import config_store
+    import message_map_store
+
+    monkeypatch.chdir(tmp_path)
+
+    def save(**settings):
+        config_store.save_config(settings)
+        return config_store.get_config()
+
+    save()
+    yield save
+    message_map_store.close()
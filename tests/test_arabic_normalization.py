@@ -0,0 +1,38 @@
+"""Tests for Arabic normalization and its map back to the original text."""
+
+import random
+
+import arabic_normalization_handler
+
+def test_variants_normalize_to_one_form():
+    normalized = arabic_normalization_handler.normalize("أَخْبَارُ إسلام آمنة مصطفى ـــ Hello")
+    assert normalized.text == "اخبار اسلام امنه مصطفي  hello"
+
+def test_spans_map_back_to_the_original_text():
+    original = "قالَ: الأخبارُ اليومَ"
+    normalized = arabic_normalization_handler.normalize(original)
+    start = normalized.text.index("الاخبار")
+    span = normalized.to_original_span(start, start + len("الاخبار"))
+    # The word keeps its own diacritics and nothing of the next word
+    assert original[span[0]:span[1]] == "الأخبارُ"
+
+def test_offsets_cover_every_character_in_order():
+    generator = random.Random(0)
+    alphabet = "abcABCأإآٱةىاب" + "ًٌٍَُِّْ" + "ـ ٰ"
+    for _ in range(200):
+        original = "".join(generator.choices(alphabet, k=generator.randint(0, 30)))
+        normalized = arabic_normalization_handler.normalize(original)
+        assert len(normalized.offsets) == len(normalized.text) + 1
+        assert normalized.offsets == sorted(normalized.offsets)
+        assert normalized.offsets[-1] == len(original)
+        # Every kept character maps to the original character it came from
+        for index, char in enumerate(normalized.text):
+            assert arabic_normalization_handler.normalize_term(original[normalized.offsets[index]]) == char
+
+def test_casefolding_that_grows_the_text_keeps_the_map():
+    normalized = arabic_normalization_handler.normalize("Straße")
+    assert normalized.text == "strasse"
+    assert normalized.to_original_span(4, 7) == (4, 6)
+
+def test_patterns_keep_escapes_and_case():
+    assert arabic_normalization_handler.normalize_pattern(r"\Aأ(?P<Name>\S+)\\إ") == r"\Aا(?P<Name>\S+)\\ا"
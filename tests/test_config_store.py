@@ -0,0 +1,64 @@
+"""Tests for the shared configuration snapshot."""
+
+import json
+
+import pytest
+
+import config_store
+
+def _write(settings):
+    """Write config.json the way another process (e.g. the dashboard) would."""
+    with open(config_store.CONFIG_FILE, 'w', encoding='utf-8') as file:
+        json.dump(settings, file)
+
+def test_file_is_parsed_only_when_it_changes(configure, monkeypatch):
+    configure(blacklist=["spam"])
+    reads = []
+    real_load = json.load
+    monkeypatch.setattr(config_store.json, "load", lambda file: reads.append(1) or real_load(file))
+
+    for _ in range(100):
+        assert config_store.get_config()["blacklist"] == ("spam",)
+    assert reads == []
+
+def test_changes_written_by_another_process_are_picked_up(configure):
+    configure(delay_seconds=5)
+    version = config_store.get_version()
+
+    # A different size makes the change visible even within one mtime tick
+    _write({"delay_seconds": 10, "padding": "x" * 10})
+
+    assert config_store.get_config()["delay_seconds"] == 10
+    assert config_store.get_version() > version
+
+def test_snapshot_is_read_only(configure):
+    config = configure(media_filters={"photo": True}, blacklist=["spam"])
+    with pytest.raises(TypeError):
+        config["forward_mode"] = "copy"
+    with pytest.raises(TypeError):
+        config["media_filters"]["photo"] = False
+    assert isinstance(config["blacklist"], tuple)
+
+def test_load_config_returns_an_independent_copy(configure):
+    configure(blacklist=["spam"])
+    config = config_store.load_config()
+    config["blacklist"].append("ads")
+
+    assert config_store.get_config()["blacklist"] == ("spam",)
+    assert config_store.save_config(config)
+    assert config_store.get_config()["blacklist"] == ("spam", "ads")
+
+def test_broken_file_keeps_the_last_good_snapshot(configure):
+    configure(delay_seconds=5)
+    with open(config_store.CONFIG_FILE, 'w', encoding='utf-8') as file:
+        file.write('{"delay_seconds": ')
+
+    assert config_store.get_config()["delay_seconds"] == 5
+
+def test_merge_config_overrides_without_changing_the_snapshot(configure):
+    config = configure(forward_mode="forward", header_enabled=False)
+    merged = config_store.merge_config(config, {"forward_mode": "copy"})
+
+    assert merged["forward_mode"] == "copy"
+    assert merged["header_enabled"] is False
+    assert config["forward_mode"] == "forward"
@@ -0,0 +1,75 @@
+"""Tests for the persisted backlog of delayed sends."""
+
+import json
+import time
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message
+
+import delay_handler
+
+def _message(message_id):
+    return Message(message_id, datetime.now(), Chat(-1001, Chat.CHANNEL), text="hello")
+
+def test_backlog_writes_are_batched(configure, monkeypatch):
+    saves = []
+    monkeypatch.setattr(delay_handler, "SAVE_INTERVAL", 0.2)
+    monkeypatch.setattr(delay_handler, "_save_pending_sends", lambda: saves.append(len(delay_handler.pending_sends)))
+    monkeypatch.setattr(delay_handler, "pending_sends", {})
+    monkeypatch.setattr(delay_handler.send_queue, "enqueue_at", lambda *args: None)
+
+    for message_id in range(50):
+        delay_handler.schedule_delayed_send(None, None, _message(message_id), -1002, {}, time.time() + 60)
+    time.sleep(0.5)
+
+    assert saves == [50]
+
+def test_backlog_file_is_replaced_atomically(configure, monkeypatch, tmp_path):
+    monkeypatch.setattr(delay_handler, "pending_sends", {})
+    monkeypatch.setattr(delay_handler.send_queue, "enqueue_at", lambda *args: None)
+
+    delay_handler.schedule_delayed_send(None, None, _message(1), -1002, {}, time.time() + 60)
+    delay_handler.flush_pending_sends()
+
+    with open(delay_handler.PENDING_FILE, encoding='utf-8') as file:
+        assert list(json.load(file)) == ["-1001:1:-1002"]
+    # The temporary file was renamed into place
+    assert not (tmp_path / f"{delay_handler.PENDING_FILE}.tmp").exists()
+
+def test_delay_is_kept_per_target(monkeypatch):
+    monkeypatch.setattr(delay_handler, "last_forwarded_times", {})
+    config = {"delay_enabled": True, "delay_seconds": 5}
+
+    # The first post goes out to every target at once
+    assert [delay_handler.reserve_send_time(target, config) for target in (-1002, -1003, -1004)] == [None] * 3
+
+    # The next post to a target waits for that target's slot only
+    send_at = delay_handler.reserve_send_time(-1002, config)
+    assert send_at == pytest.approx(time.time() + 5, abs=1)
+    assert delay_handler.reserve_send_time(-1005, config) is None
+
+def test_restored_sends_are_delivered_once_and_cleared(bot, configure, monkeypatch):
+    monkeypatch.setattr(delay_handler, "pending_sends", {})
+    monkeypatch.setattr(delay_handler, "last_forwarded_times", {})
+
+    def deliver(bot, message, target_channel_id, config):
+        bot.send_message(chat_id=target_channel_id, text=message.text)
+
+    # Scheduled before a shutdown: the job itself is lost, only the file remains
+    with monkeypatch.context() as before_restart:
+        before_restart.setattr(delay_handler.send_queue, "enqueue_at", lambda *args: None)
+        delay_handler.schedule_delayed_send(deliver, bot, _message(5), -1002, {}, time.time() + 0.1)
+        delay_handler.flush_pending_sends()
+    delay_handler.pending_sends.clear()
+
+    assert delay_handler.restore_pending_sends(bot, deliver) == 1
+    deadline = time.time() + 5
+    while delay_handler.pending_sends and time.time() < deadline:
+        time.sleep(0.05)
+    delay_handler.flush_pending_sends()
+
+    assert bot.call_names == ["send_message"]
+    assert delay_handler.pending_sends == {}
+    with open(delay_handler.PENDING_FILE, encoding='utf-8') as file:
+        assert json.load(file) == {}
@@ -0,0 +1,74 @@
+"""Tests for the duplicate index and the Bloom filter in front of it."""
+
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message
+
+import bloom_filter
+import duplicate_filter_handler
+
+def _message(text, message_id=1):
+    return Message(message_id, datetime.now(), Chat(-1001, Chat.CHANNEL), text=text)
+
+@pytest.fixture
+def index(configure):
+    """An empty duplicate index in the test directory."""
+    duplicate_filter_handler.close()
+    duplicate_filter_handler.message_hashes.clear()
+    config = configure(duplicate_filter_enabled=True, duplicate_memory_size=1000)
+    yield config
+    duplicate_filter_handler.close()
+
+def _count_lookups(monkeypatch):
+    """Count the index reads for a content hash."""
+    statements = []
+    with duplicate_filter_handler._hashes_lock:
+        connection = duplicate_filter_handler._get_connection()
+    connection.set_trace_callback(statements.append)
+    monkeypatch.setattr(duplicate_filter_handler, "HOT_CACHE_SIZE", 0)
+    return lambda: sum("WHERE content_hash =" in statement for statement in statements)
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = bloom_filter.BloomFilter(1000)
+    keys = [f"key-{index}" for index in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+def test_duplicates_survive_a_restart(index):
+    assert duplicate_filter_handler.remember_message(_message("first post"), index)
+    assert not duplicate_filter_handler.remember_message(_message("first post"), index)
+
+    duplicate_filter_handler.close()
+    duplicate_filter_handler.message_hashes.clear()
+
+    assert not duplicate_filter_handler.remember_message(_message("first post"), index)
+    assert duplicate_filter_handler.remember_message(_message("second post"), index)
+
+def test_new_messages_do_not_read_the_index(index, monkeypatch):
+    for number in range(50):
+        duplicate_filter_handler.remember_message(_message(f"old post {number}"), index)
+    duplicate_filter_handler.flush(index)
+    lookups = _count_lookups(monkeypatch)
+
+    for number in range(200):
+        assert duplicate_filter_handler.remember_message(_message(f"new post {number}"), index)
+    assert lookups() < 10
+
+    # Hashes that left the hot cache are still found through the index
+    assert not duplicate_filter_handler.remember_message(_message("old post 7"), index)
+    assert lookups() >= 1
+
+def test_writes_are_batched(index, monkeypatch):
+    monkeypatch.setattr(duplicate_filter_handler, "FLUSH_INTERVAL", 60)
+    for number in range(10):
+        duplicate_filter_handler.remember_message(_message(f"post {number}"), index)
+    assert len(duplicate_filter_handler._pending_hashes) == 10
+
+    duplicate_filter_handler.flush(index)
+
+    assert not duplicate_filter_handler._pending_hashes
+    assert duplicate_filter_handler.get_memory_stats(index)["count"] == 10
@@ -0,0 +1,47 @@
+"""Tests for the compiled blacklist/whitelist matcher."""
+
+import random
+
+import keyword_matcher
+
+def _substring_search(text, terms):
+    """The per-word substring loop the matcher replaced."""
+    folded = text.casefold()
+    return any(term.casefold().strip() and term.casefold().strip() in folded for term in terms)
+
+def test_matches_exactly_what_the_substring_loop_matched():
+    generator = random.Random(0)
+    alphabet = "abcأبت. "
+    for _ in range(300):
+        terms = ["".join(generator.choices(alphabet, k=generator.randint(1, 4))) for _ in range(generator.randint(1, 30))]
+        matcher = keyword_matcher.KeywordMatcher(terms)
+        for _ in range(10):
+            text = "".join(generator.choices(alphabet + "ABC", k=generator.randint(0, 40)))
+            term = matcher.search(text)
+            assert (term is not None) == _substring_search(text, terms), (terms, text)
+            if term is not None:
+                assert term.casefold().strip() in text.casefold()
+
+def test_returns_the_term_as_entered():
+    matcher = keyword_matcher.KeywordMatcher(["Crypto", "crypto airdrop", "BTC"])
+    assert matcher.search("Join our CRYPTO AIRDROP now") == "crypto airdrop"
+    assert matcher.search("btc price") == "BTC"
+    assert matcher.search("nothing here") is None
+
+def test_prefixes_and_special_characters():
+    matcher = keyword_matcher.KeywordMatcher(["a", "ab", "a.b", "(x)", "c++"])
+    assert matcher.search("zab") == "ab"
+    assert matcher.search("a.b") == "a.b"
+    assert matcher.search("axb") == "a"
+    assert matcher.search("see (x)") == "(x)"
+    assert matcher.search("c++ code") == "c++"
+
+def test_normalized_matching_ignores_arabic_letter_variants():
+    matcher = keyword_matcher.KeywordMatcher(["أخبار"], normalize=True)
+    assert matcher.search("آخر الاخبار اليوم") == "أخبار"
+    assert keyword_matcher.KeywordMatcher(["أخبار"]).search("آخر الاخبار اليوم") is None
+
+def test_matchers_are_compiled_once_per_word_list():
+    first = keyword_matcher.get_matcher(["spam", "ads"])
+    assert keyword_matcher.get_matcher(("spam", "ads")) is first
+    assert keyword_matcher.get_matcher(["spam"]) is not first
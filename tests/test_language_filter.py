@@ -0,0 +1,54 @@
+"""Tests for script-first language detection and its cache."""
+
+import pytest
+
+import language_filter_handler
+
+ARABIC = "هذا خبر عاجل عن الطقس في المدينة اليوم"
+PERSIAN = "این یک خبر فوری درباره هوای شهر است"
+RUSSIAN = "Это срочная новость о погоде в городе"
+ENGLISH = "This is breaking news about the weather in the city today"
+
+@pytest.fixture
+def langdetect_calls(monkeypatch):
+    """Count the texts sent to langdetect, with an empty detection cache."""
+    monkeypatch.setattr(language_filter_handler, "_detection_cache", type(language_filter_handler._detection_cache)())
+    calls = []
+    detect = language_filter_handler.detect
+    monkeypatch.setattr(language_filter_handler, "detect", lambda text: calls.append(text) or detect(text))
+    return calls
+
+def test_script_histogram_picks_the_dominant_script():
+    assert language_filter_handler.get_dominant_script(ARABIC + " OK") == "arabic"
+    assert language_filter_handler.get_dominant_script(RUSSIAN) == "cyrillic"
+    assert language_filter_handler.get_dominant_script("日本語のテキストです") == "kana"
+    # Half Arabic, half Latin: no script dominates
+    assert language_filter_handler.get_dominant_script("خبر عاجل news flash") is None
+    assert language_filter_handler.get_dominant_script("12345 !!!") is None
+
+def test_single_language_scripts_skip_langdetect(langdetect_calls):
+    assert language_filter_handler.detect_language(ARABIC) == "ar"
+    assert language_filter_handler.detect_language(RUSSIAN) == "ru"
+    assert langdetect_calls == []
+
+def test_ambiguous_scripts_go_to_langdetect(langdetect_calls):
+    assert language_filter_handler.detect_language(PERSIAN) == "fa"
+    assert language_filter_handler.detect_language(ENGLISH) == "en"
+    assert langdetect_calls == [PERSIAN, ENGLISH]
+
+def test_results_are_cached(langdetect_calls):
+    for _ in range(3):
+        assert language_filter_handler.detect_language(ENGLISH) == "en"
+    assert langdetect_calls == [ENGLISH]
+
+def test_cache_is_bounded(langdetect_calls, monkeypatch):
+    monkeypatch.setattr(language_filter_handler, "DETECTION_CACHE_SIZE", 2)
+    for text in (ARABIC, RUSSIAN, ENGLISH):
+        language_filter_handler.detect_language(text)
+    assert len(language_filter_handler._detection_cache) == 2
+
+def test_filter_rejects_other_scripts_without_detecting(langdetect_calls):
+    assert not language_filter_handler.is_language_allowed(ENGLISH, "whitelist", "ar")
+    assert language_filter_handler.is_language_allowed(ENGLISH, "blacklist", "ar")
+    assert language_filter_handler.is_language_allowed(ARABIC, "whitelist", "ar")
+    assert langdetect_calls == []
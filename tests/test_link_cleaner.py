@@ -0,0 +1,117 @@
+"""Tests for the link engine: entity fast path, and fuzz/benchmark inputs against ReDoS."""
+
+import random
+import time
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message, MessageEntity
+
+import copy_engine
+import link_cleaner_handler
+
+# Longest text Telegram allows in a message
+MESSAGE_LENGTH = 4096
+
+# Inputs built to make a backtracking regex retry each position many times
+ADVERSARIAL_UNITS = {
+    "dotted labels": "a.",
+    "dashed labels": "a-",
+    "long labels": "a" * 61 + ".",
+    "digits": "1.",
+    "at signs": "@",
+    "open brackets": "[",
+    "bracket texts": "[a",
+    "markdown starts": "[x](http://",
+    "anchor starts": '<a href="',
+    "anchor attributes": '<a href="x" ',
+    "anchor without href": "<a ",
+    "schemes": "http://",
+    "telegram links": "t.me/",
+    "whitespace": " \t",
+    "usernames": "a@b_",
+    "arabic": "مثال.",
+}
+
+def _adversarial(unit, length):
+    # A trailing character that no branch can complete forces every attempt to fail late
+    return unit * (length // len(unit)) + "!"
+
+def _elapsed(text):
+    start = time.perf_counter()
+    link_cleaner_handler.contains_links(text)
+    link_cleaner_handler.clean_links(text)
+    return time.perf_counter() - start
+
+def _message(text, entities=()):
+    return Message(1, datetime.now(), Chat(-1001, Chat.CHANNEL), text=text, entities=list(entities))
+
+class CountingPattern:
+    """Stand-in for LINK_PATTERN that counts the passes over the text."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.passes = 0
+
+    def search(self, *args):
+        self.passes += 1
+        return self.pattern.search(*args)
+
+    def sub(self, *args):
+        self.passes += 1
+        return self.pattern.sub(*args)
+
+@pytest.mark.parametrize("unit", ADVERSARIAL_UNITS.values(), ids=list(ADVERSARIAL_UNITS))
+def test_each_check_is_one_regex_pass(unit, monkeypatch):
+    pattern = CountingPattern(link_cleaner_handler.LINK_PATTERN)
+    monkeypatch.setattr(link_cleaner_handler, "LINK_PATTERN", pattern)
+    text = _adversarial(unit, MESSAGE_LENGTH)
+
+    link_cleaner_handler.contains_links(text)
+    assert pattern.passes == 1
+    link_cleaner_handler.clean_links(text)
+    assert pattern.passes == 2
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("unit", ADVERSARIAL_UNITS.values(), ids=list(ADVERSARIAL_UNITS))
+def test_adversarial_inputs_finish_quickly(unit):
+    assert _elapsed(_adversarial(unit, 5 * MESSAGE_LENGTH)) < 0.25
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("unit", ADVERSARIAL_UNITS.values(), ids=list(ADVERSARIAL_UNITS))
+def test_adversarial_inputs_scale_linearly(unit):
+    short = min(_elapsed(_adversarial(unit, MESSAGE_LENGTH)) for _ in range(3))
+    long = min(_elapsed(_adversarial(unit, 8 * MESSAGE_LENGTH)) for _ in range(3))
+    # Linear is 8x; quadratic backtracking would be 64x
+    assert long < max(short, 0.0005) * 20
+
+@pytest.mark.benchmark
+def test_fuzzed_inputs_finish_quickly():
+    generator = random.Random(0)
+    alphabet = "aZ09.-_@/:[]()<>\"'=#?& \t\nhttpsme" + "مثال"
+    slowest = 0
+    for _ in range(200):
+        text = "".join(generator.choices(alphabet, k=MESSAGE_LENGTH))
+        slowest = max(slowest, _elapsed(text))
+    print(f"slowest fuzzed message: {slowest * 1000:.2f} ms")
+    assert slowest < 0.05
+
+def test_cleaner_and_filter_agree_without_entities():
+    message = _message("see x.com today")
+    assert link_cleaner_handler.message_contains_links(message)
+    text, _ = copy_engine.transform_text(message.text, {"link_cleaner_enabled": True}, message.entities)
+    assert text == "see today"
+
+def test_entities_are_the_fast_path():
+    # Telegram found no link in the bold text, so neither check runs the regex
+    bold = [MessageEntity(MessageEntity.BOLD, 0, 3)]
+    assert not link_cleaner_handler.text_has_links("see x.com", bold)
+    url = [MessageEntity(MessageEntity.URL, 4, 5)]
+    assert link_cleaner_handler.text_has_links("see x.com", url)
+
+def test_text_mentions_are_not_links():
+    # A mention of a user without a username carries no link
+    message = _message("thanks Ahmad", [MessageEntity(MessageEntity.TEXT_MENTION, 7, 5)])
+    assert not link_cleaner_handler.message_contains_links(message)
+    _, entities = copy_engine.transform_text(message.text, {"link_cleaner_enabled": True}, message.entities)
+    assert [entity.type for entity in entities] == [MessageEntity.TEXT_MENTION]
@@ -0,0 +1,62 @@
+"""Tests for the batched message map store."""
+
+import sqlite3
+
+import pytest
+
+import message_map_store
+
+class LockedConnection:
+    """Connection wrapper whose writes fail as if another process held the lock."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+def test_failed_flush_keeps_the_batch(configure, monkeypatch):
+    monkeypatch.setattr(message_map_store, "FLUSH_INTERVAL", 60)
+    message_map_store.record(-1001, 1, -1002, 10)
+    with message_map_store._db_lock:
+        connection = message_map_store._get_connection()
+
+    message_map_store._connection = LockedConnection(connection)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            message_map_store.flush()
+    finally:
+        message_map_store._connection = connection
+    message_map_store.record(-1001, 2, -1002, 20)
+    # Still found while the write is retried
+    assert message_map_store.get_targets(-1001, 1) == [(-1002, 10)]
+
+    message_map_store.flush()
+
+    rows = connection.execute("SELECT source_msg_id, target_msg_id FROM message_map ORDER BY source_msg_id").fetchall()
+    assert rows == [(1, 10), (2, 20)]
+
+def test_legacy_map_is_imported_once_and_kept(configure, tmp_path):
+    configure(source_channel=-1001, target_channel=-1002)
+    message_map_store.close()
+    message_map_store._cache.clear()
+    (tmp_path / message_map_store.LEGACY_MAP_FILE).write_text('{"23": 139604, "27": null}', encoding='utf-8')
+
+    assert message_map_store.get_target_message_id(-1001, 23, -1002) == 139604
+    backup = tmp_path / f"{message_map_store.LEGACY_MAP_FILE}.bak"
+    assert backup.exists()
+    assert not (tmp_path / message_map_store.LEGACY_MAP_FILE).exists()
+
+    # Forget the imported rows; the next startup must not bring them back
+    with message_map_store._db_lock:
+        connection = message_map_store._get_connection()
+        connection.execute("DELETE FROM message_map")
+        connection.commit()
+    message_map_store.close()
+    message_map_store._cache.clear()
+
+    assert message_map_store.get_target_message_id(-1001, 23, -1002) is None
+    assert backup.exists()
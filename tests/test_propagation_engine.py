@@ -0,0 +1,59 @@
+"""Tests for edit propagation to the copies in target channels."""
+
+from datetime import datetime
+
+from telegram import Chat, Message
+
+import message_map_store
+import propagation_engine
+import rate_limit_handler
+
+SOURCE_CHAT = -1001
+
+def _run_now(target, func, *args):
+    func(*args)
+
+def test_edits_follow_each_target_route(bot, configure, monkeypatch):
+    configure(
+        forward_mode="forward",
+        routes=[
+            {"sources": [SOURCE_CHAT], "targets": [-1002]},
+            {"sources": [SOURCE_CHAT], "targets": [-1003], "profile": {"forward_mode": "copy"}},
+            {"sources": [SOURCE_CHAT], "targets": [-1004],
+             "profile": {"forward_mode": "copy", "edit_propagation_enabled": False}},
+        ]
+    )
+    reserved = []
+    reserve_send_slot = rate_limit_handler.reserve_send_slot
+    monkeypatch.setattr(rate_limit_handler, "reserve_send_slot",
+                        lambda target, config: reserved.append(target) or reserve_send_slot(target, config))
+    monkeypatch.setattr(propagation_engine.send_queue, "enqueue", _run_now)
+    for target in (-1002, -1003, -1004):
+        message_map_store.record(SOURCE_CHAT, 1, target, 50)
+
+    edited = Message(1, datetime.now(), Chat(SOURCE_CHAT, Chat.CHANNEL), text="fixed typo")
+    assert propagation_engine.propagate_edit(bot, edited) == 1
+
+    assert reserved == [-1003]
+    assert [(name, kwargs["chat_id"]) for name, kwargs in bot.calls] == [("edit_message_text", -1003)]
+
+def test_album_captions_are_edited_without_buttons(bot, configure, monkeypatch):
+    configure(
+        forward_mode="copy", inline_button_enabled=True,
+        inline_button_text="Join", inline_button_url="https://t.me/example",
+        routes=[{"sources": [SOURCE_CHAT], "targets": [-1002]}]
+    )
+    monkeypatch.setattr(propagation_engine.send_queue, "enqueue", _run_now)
+    message_map_store.record(SOURCE_CHAT, 1, -1002, 50)
+    message_map_store.record(SOURCE_CHAT, 2, -1002, 60)
+
+    chat = Chat(SOURCE_CHAT, Chat.CHANNEL)
+    album_item = Message(1, datetime.now(), chat, caption="fixed typo", photo=[], media_group_id="album")
+    single = Message(2, datetime.now(), chat, caption="fixed typo")
+    propagation_engine.propagate_edit(bot, album_item)
+    propagation_engine.propagate_edit(bot, single)
+
+    album_edit, single_edit = bot.calls
+    assert album_edit[0] == single_edit[0] == "edit_message_caption"
+    assert "reply_markup" not in album_edit[1]
+    assert single_edit[1]["reply_markup"] is not None
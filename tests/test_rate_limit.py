@@ -0,0 +1,67 @@
+"""Tests for the GCRA rate buckets."""
+
+import time
+
+import pytest
+
+import rate_limit_handler
+
+TARGET = -1002
+
+@pytest.fixture(autouse=True)
+def buckets(monkeypatch):
+    monkeypatch.setattr(rate_limit_handler, "buckets", {})
+
+def _reserve(count, config, target=TARGET):
+    return [rate_limit_handler.reserve_send_slot(target, config) for _ in range(count)]
+
+def test_bucket_allows_a_burst_then_spaces_messages():
+    bucket = rate_limit_handler.RateBucket(60, burst=3)
+    sent_at = []
+    for _ in range(5):
+        at = bucket.available_at(100.0)
+        bucket.consume(at, now=100.0)
+        sent_at.append(at)
+    assert sent_at == [100.0, 100.0, 100.0, 101.0, 102.0]
+    assert bucket.backlog(100.0) == 2
+
+def test_messages_over_the_global_limit_are_deferred():
+    config = {"rate_limit_enabled": True, "messages_per_minute": 2}
+    now = time.time()
+
+    # A burst of two, then one message every 30 seconds
+    assert _reserve(4, config) == [None, None, pytest.approx(now + 30, abs=0.5), pytest.approx(now + 60, abs=0.5)]
+
+def test_per_target_limit_applies_without_the_global_limit():
+    interval = 60 / rate_limit_handler.TELEGRAM_CHANNEL_LIMIT
+    now = time.time()
+    slots = _reserve(5, {})
+
+    assert slots[:rate_limit_handler.TELEGRAM_CHANNEL_BURST] == [None] * rate_limit_handler.TELEGRAM_CHANNEL_BURST
+    assert slots[3:] == pytest.approx([now + interval, now + 2 * interval], abs=0.5)
+    # Other targets have their own bucket
+    assert rate_limit_handler.reserve_send_slot(-1003, {}) is None
+
+def test_drop_mode_drops_instead_of_deferring():
+    config = {"rate_limit_enabled": True, "messages_per_minute": 2, "rate_limit_mode": "drop"}
+    assert _reserve(3, config) == [None, None, False]
+
+def test_queue_size_caps_the_deferred_messages():
+    config = {"rate_limit_enabled": True, "messages_per_minute": 1, "rate_limit_queue_size": 3}
+    slots = _reserve(6, config)
+
+    # One goes now, three wait, the rest are dropped
+    assert slots[0] is None
+    assert all(slots[1:4])
+    assert slots[4:] == [False, False]
+
+def test_queue_size_counts_messages_deferred_by_the_global_limit():
+    # The global limit spaces messages further apart than the per-target limit would
+    config = {"rate_limit_enabled": True, "messages_per_minute": 1, "rate_limit_queue_size": 2}
+    assert [bool(slot) for slot in _reserve(3, config)[1:]] == [True, True]
+    assert rate_limit_handler.buckets[("target", str(TARGET))].backlog(time.time()) == 2
+
+def test_dropped_messages_do_not_take_a_slot():
+    config = {"rate_limit_enabled": True, "messages_per_minute": 1, "rate_limit_queue_size": 1}
+    assert _reserve(3, config)[2] is False
+    assert rate_limit_handler.buckets["global"].backlog(time.time()) == 1
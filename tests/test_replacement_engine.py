@@ -0,0 +1,93 @@
+"""Tests for the single-pass replacement engine."""
+
+import random
+import timeit
+
+import pytest
+
+import replacement_engine
+
+def _apply(rules, text, normalize=False):
+    """Apply (pattern, replacement, is_regex, whole_word) rules to a text."""
+    return replacement_engine.ReplacementEngine(rules, normalize).apply(text)
+
+def test_normalized_regex_groups_keep_the_original_spelling():
+    rules = [(r'(\w+)!', r'[\1]', True, False)]
+    assert _apply(rules, 'Ahmed! مُحَمَّد!', normalize=True) == '[Ahmed] [مُحَمَّد]'
+
+def test_normalized_expansion_handles_named_groups_and_escapes():
+    rules = [(r'(?P<name>\w+)!', r'\\\g<name>\n\\1', True, False)]
+    assert _apply(rules, 'Ahmed!', normalize=True) == _apply(rules, 'Ahmed!') == '\\Ahmed\n\\1'
+
+def test_normalized_regex_rules_match_any_case_and_letter_variant():
+    rules = [(r'Breaking (\w+)', r'News: \1', True, False), (r'أخبار\s+(\d+)', r'[\1]', True, False)]
+    assert _apply(rules, 'BREAKING Story', normalize=True) == 'News: Story'
+    assert _apply(rules, 'الاخبار 5', normalize=True) == 'ال[5]'
+    # Escapes and classes are kept as written
+    assert _apply([(r'\Aإ\S+', 'X', True, False)], 'اسلام', normalize=True) == 'X'
+
+def test_regex_backreferences_refer_to_their_own_groups():
+    rules = [('foo', 'bar', False, False), (r'(\w)\1', '<\\1\\1>', True, False)]
+    assert _apply(rules, 'foo book') == 'bar b<oo>k'
+    assert _apply(rules[1:], 'book') == 'b<oo>k'
+
+def test_inline_flags_only_affect_their_rule():
+    rules = [('(?i)hello', 'hi', True, False), ('y', 'z', True, False), ('x', 'w', False, False)]
+    assert _apply(rules, 'HELLO y x') == 'hi z w'
+
+def test_invalid_regex_rules_are_skipped_alone():
+    rules = [('(unclosed', 'x', True, False), ('a(?i)b', 'x', True, False), ('b', 'c', True, False)]
+    assert _apply(rules, 'ab') == 'ac'
+
+def test_longest_match_wins():
+    assert _apply([('ab', 'X', False, True), ('ab cd', 'Y', False, False)], 'ab cd') == 'Y'
+    assert _apply([('ab', 'X', False, False), (r'ab\s+cd', 'Y', True, False)], 'ab  cd ab') == 'Y X'
+
+def test_ties_go_to_words_then_literals_then_regex_rules_in_order():
+    rules = [(r'\w+', 'R1', True, False), ('cat', 'L', False, False), ('cat', 'W', False, True),
+             (r'[a-z]+', 'R2', True, False)]
+    assert _apply(rules, 'cat dog') == 'W R1'
+
+def test_replaced_text_is_not_matched_again():
+    assert _apply([('a', 'b', False, False), ('b', 'c', False, False)], 'ab') == 'bc'
+
+def test_empty_regex_matches_are_ignored():
+    assert _apply([('x*', '-', True, False)], 'axxb') == 'a-b'
+
+def _literal_rules(count):
+    generator = random.Random(0)
+    words = [''.join(generator.choices('abcdefghijklmnop', k=generator.randint(4, 9))) for _ in range(2000)]
+    text = ' '.join(generator.choices(words, k=400))
+    return [(word, word.upper(), False, False) for word in words[:count]], text
+
+def test_literal_rules_cost_one_search_per_replacement(monkeypatch):
+    rules, text = _literal_rules(500)
+    engine = replacement_engine.ReplacementEngine(rules)
+    replacements = len(list(engine._find_matches(text)))
+    searches = []
+    search = replacement_engine._search
+    monkeypatch.setattr(replacement_engine, "_search", lambda *args: searches.append(1) or search(*args))
+
+    engine.apply(text)
+
+    # All 500 rules are one compiled pattern, searched once per replacement plus the final miss
+    assert len(engine.matchers) == 1
+    assert replacements > 100
+    assert len(searches) <= replacements + 1
+
+@pytest.mark.benchmark
+def test_benchmark_against_per_rule_loop():
+    """The engine stays ahead of one str.replace per rule once rule lists grow into the hundreds."""
+    rules, text = _literal_rules(500)
+    engine = replacement_engine.ReplacementEngine(rules)
+
+    def per_rule_loop():
+        result = text
+        for pattern, replace_with, _, _ in rules:
+            result = result.replace(pattern, replace_with)
+        return result
+
+    engine_time = min(timeit.repeat(lambda: engine.apply(text), number=10, repeat=3))
+    loop_time = min(timeit.repeat(per_rule_loop, number=10, repeat=3))
+    print(f"500 rules: engine {engine_time * 100:.2f} ms, per-rule loop {loop_time * 100:.2f} ms per text")
+    assert engine_time < loop_time
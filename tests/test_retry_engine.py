@@ -0,0 +1,117 @@
+"""Tests for retries, the circuit breaker and the dead-letter store."""
+
+from datetime import datetime
+
+import pytest
+from telegram import Chat, Message
+from telegram.error import BadRequest, RetryAfter, TimedOut
+
+import bot_handler
+import dead_letter_handler
+import rate_limit_handler
+import retry_engine
+
+TARGET = -1002
+
+@pytest.fixture(autouse=True)
+def state(configure, monkeypatch):
+    """Fresh breakers, rate buckets and dead-letter store, without real waiting."""
+    monkeypatch.setattr(retry_engine, "breakers", {})
+    monkeypatch.setattr(rate_limit_handler, "buckets", {})
+    monkeypatch.setattr(dead_letter_handler, "dead_letters", {})
+    monkeypatch.setattr(dead_letter_handler, "_loaded", False)
+    waits = []
+    backoff = retry_engine.get_backoff_delay
+    monkeypatch.setattr(retry_engine, "get_backoff_delay", lambda *args: waits.append(backoff(*args)) or 0)
+    return waits
+
+def _failing(*errors):
+    """Return a send function that raises the given errors in turn, then succeeds."""
+    calls = []
+
+    def send():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return "sent"
+    send.calls = calls
+    return send
+
+def _message(message_id):
+    return Message(message_id, datetime.now(), Chat(-1001, Chat.CHANNEL), text="hello")
+
+def test_backoff_grows_with_full_jitter(state):
+    send = _failing(*[TimedOut()] * 7)
+    retry_engine.send_with_retry(TARGET, send, max_attempts=8)
+    for attempt, delay in enumerate(state, 1):
+        assert 0 <= delay <= min(retry_engine.MAX_DELAY, retry_engine.BASE_DELAY * 2 ** attempt)
+
+def test_flood_waits_are_honored_exactly(state):
+    send = _failing(RetryAfter(7))
+    assert retry_engine.send_with_retry(TARGET, send) == "sent"
+    assert state == [7.0]
+
+def test_transient_errors_are_retried_until_the_last_attempt():
+    send = _failing(TimedOut(), TimedOut(), TimedOut())
+    with pytest.raises(TimedOut):
+        retry_engine.send_with_retry(TARGET, send, max_attempts=3)
+    assert len(send.calls) == 3
+
+def test_permanent_errors_are_not_retried():
+    send = _failing(BadRequest("Chat not found"))
+    with pytest.raises(BadRequest):
+        retry_engine.send_with_retry(TARGET, send)
+    assert len(send.calls) == 1
+
+def test_breaker_opens_and_probes_after_the_cooldown():
+    for _ in range(retry_engine.BREAKER_THRESHOLD):
+        with pytest.raises(BadRequest):
+            retry_engine.send_with_retry(TARGET, _failing(BadRequest("Forbidden")))
+
+    send = _failing()
+    with pytest.raises(retry_engine.CircuitOpenError):
+        retry_engine.send_with_retry(TARGET, send)
+    assert send.calls == []
+    # Other targets are not affected
+    assert retry_engine.send_with_retry(-1003, send) == "sent"
+
+    # Cooldown over: one probe goes through and closes the breaker
+    retry_engine.breakers[str(TARGET)]["opened_at"] -= retry_engine.BREAKER_COOLDOWN + 1
+    assert retry_engine.send_with_retry(TARGET, _failing()) == "sent"
+    assert retry_engine.breakers[str(TARGET)] == {"failures": 0, "opened_at": None}
+
+def test_failed_messages_are_dead_lettered_and_replayed(bot, configure, monkeypatch):
+    config = configure(forward_mode="copy")
+    bot.errors[1] = BadRequest("Chat not found")
+    bot_handler.deliver_message(bot, _message(1), TARGET, config)
+    assert dead_letter_handler.get_dead_letter_count() == 1
+
+    queued = []
+    monkeypatch.setattr(dead_letter_handler.send_queue, "enqueue",
+                        lambda target, deliver, *args: queued.append((None, deliver, args)))
+    monkeypatch.setattr(dead_letter_handler.send_queue, "enqueue_at",
+                        lambda at, target, deliver, *args: queued.append((at, deliver, args)))
+    assert dead_letter_handler.replay_dead_letters(bot, bot_handler.deliver_message) == 1
+    assert dead_letter_handler.get_dead_letter_count() == 0
+
+    _, deliver, args = queued[0]
+    deliver(*args)
+    assert bot.call_names[-1] == "copy_message"
+    assert dead_letter_handler.get_dead_letter_count() == 0
+
+def test_replay_takes_rate_limit_slots(bot, configure, monkeypatch):
+    configure(rate_limit_enabled=True, messages_per_minute=60, rate_limit_queue_size=5)
+    for message_id in range(70):
+        dead_letter_handler.add_dead_letter(_message(message_id), TARGET, BadRequest("Chat not found"))
+    queued = []
+    monkeypatch.setattr(dead_letter_handler.send_queue, "enqueue", lambda *args: queued.append(None))
+    monkeypatch.setattr(dead_letter_handler.send_queue, "enqueue_at", lambda at, *args: queued.append(at))
+
+    replayed = dead_letter_handler.replay_dead_letters(bot, bot_handler.deliver_message)
+
+    # The per-target burst goes now, a few wait for their slot, the rest stay stored
+    burst = rate_limit_handler.TELEGRAM_CHANNEL_BURST
+    assert queued[:burst] == [None] * burst
+    assert all(queued[burst:])
+    assert replayed == burst + 5
+    assert dead_letter_handler.get_dead_letter_count() == 70 - replayed
@@ -0,0 +1,65 @@
+"""Tests for the routing table and the fan-out planner."""
+
+from datetime import datetime
+
+from telegram import Chat, Message
+
+import fanout_planner
+import routing_table
+
+SOURCE = -1001
+
+def _message(text="hello world"):
+    return Message(1, datetime.now(), Chat(SOURCE, Chat.CHANNEL), text=text)
+
+def test_single_channel_pair_is_the_default_route(configure):
+    configure(source_channel=SOURCE, target_channel="-1002")
+    table = routing_table.get_routing_table()
+    assert [route.targets for route in table.get_routes(SOURCE)] == [(-1002,)]
+    assert table.get_routes(-1009) == ()
+
+def test_routes_with_the_same_profile_share_config_and_pipeline(configure):
+    bold = {"bold_text_conversion_enabled": True}
+    configure(routes=[
+        {"name": "a", "sources": [SOURCE], "targets": [-1002], "profile": bold},
+        {"name": "b", "sources": [-1005], "targets": [-1003], "profile": dict(bold)},
+        {"name": "c", "sources": [SOURCE], "targets": [-1004]},
+        {"name": "broken", "sources": ["not a chat"], "targets": [-1006]},
+    ])
+    a, b, c = routing_table.get_routing_table().routes
+
+    assert a.config is b.config and a.pipeline is b.pipeline
+    assert a.config["bold_text_conversion_enabled"] and not c.config.get("bold_text_conversion_enabled")
+    assert routing_table.get_send_config(SOURCE, -1002) is a.config
+    # Pairs that are not routed fall back to the base settings
+    assert routing_table.get_send_config(SOURCE, -1003) is c.config
+
+def test_table_is_rebuilt_when_the_config_changes(configure):
+    configure(routes=[{"sources": [SOURCE], "targets": [-1002]}])
+    table = routing_table.get_routing_table()
+    assert routing_table.get_routing_table() is table
+
+    configure(routes=[{"sources": [SOURCE], "targets": [-1002, -1003]}])
+    assert routing_table.get_routing_table().get_routes(SOURCE)[0].targets == (-1002, -1003)
+
+def test_plan_groups_targets_by_transform_profile(configure):
+    configure(routes=[
+        {"name": "plain", "sources": [SOURCE], "targets": [-1002, -1003]},
+        {"name": "delayed", "sources": [SOURCE], "targets": [-1004], "profile": {"delay_enabled": True}},
+        {"name": "bold", "sources": [SOURCE], "targets": [-1005, -1002],
+         "profile": {"bold_text_conversion_enabled": True}},
+    ])
+    groups = fanout_planner.plan(_message(), routing_table.get_routing_table().get_routes(SOURCE))
+
+    # A delay does not change the text, so those targets share one transformed copy;
+    # -1002 is only sent once, by the first route that has it
+    assert [[target for target, _ in group.sends] for group in groups] == [[-1002, -1003, -1004], [-1005]]
+
+def test_plan_skips_routes_whose_filters_reject_the_post(configure):
+    configure(routes=[
+        {"name": "strict", "sources": [SOURCE], "targets": [-1002],
+         "profile": {"blacklist_enabled": True, "blacklist": ["hello"]}},
+        {"name": "open", "sources": [SOURCE], "targets": [-1003]},
+    ])
+    groups = fanout_planner.plan(_message(), routing_table.get_routing_table().get_routes(SOURCE))
+    assert [target for group in groups for target, _ in group.sends] == [-1003]
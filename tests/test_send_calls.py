@@ -0,0 +1,131 @@
+"""Regression benchmark: every forwarded message costs exactly one outbound API call."""
+
+import time
+from datetime import datetime
+
+import pytest
+from telegram import (Animation, Audio, Chat, Contact, Dice, Document, Location, Message, PhotoSize,
+                      Poll, PollOption, Sticker, Venue, Video, VideoNote, Voice)
+from telegram.error import RetryAfter, TimedOut
+
+import bot_handler
+import rate_limit_handler
+import retry_engine
+import send_queue
+
+SOURCE_CHAT = -1001
+TARGET_CHAT = -1002
+
+def _message(message_id=1, **content):
+    return Message(message_id, datetime.now(), Chat(SOURCE_CHAT, Chat.CHANNEL), **content)
+
+MESSAGES = {
+    "text": lambda: _message(text="hello world"),
+    "photo": lambda: _message(photo=[PhotoSize("small", "s", 90, 90), PhotoSize("big", "b", 800, 800)],
+                              caption="hello photo"),
+    "video": lambda: _message(video=Video("video", "v", 640, 480, 10), caption="hello video"),
+    "document": lambda: _message(document=Document("doc", "d"), caption="hello document"),
+    "audio": lambda: _message(audio=Audio("audio", "a", 60), caption="hello audio"),
+    "voice": lambda: _message(voice=Voice("voice", "vo", 5), caption="hello voice"),
+    "animation": lambda: _message(animation=Animation("gif", "g", 320, 240, 3), caption="hello gif"),
+    "sticker": lambda: _message(sticker=Sticker("sticker", "st", 512, 512, False, False, "regular")),
+    "video_note": lambda: _message(video_note=VideoNote("note", "n", 240, 5)),
+    "location": lambda: _message(location=Location(44.8, 20.4)),
+    "contact": lambda: _message(contact=Contact("+100", "hello")),
+    "dice": lambda: _message(dice=Dice(3, "🎲")),
+    "poll": lambda: _message(poll=Poll("1", "hello?", [PollOption("hello", 0), PollOption("no", 0)],
+                                       0, False, True, Poll.REGULAR, False)),
+    "venue": lambda: _message(venue=Venue(Location(44.8, 20.4), "hello place", "hello street")),
+}
+
+# Settings under which copy mode keeps, or has to rewrite, the content
+COPY_SETTINGS = {
+    "unchanged": {},
+    "transformed": {
+        "text_replacements": [{"pattern": "hello", "replacement": "bye"}],
+        "header_enabled": True,
+        "header_text": "News"
+    }
+}
+
+@pytest.mark.parametrize("media_type", MESSAGES)
+def test_forward_mode_sends_once(media_type, bot, configure):
+    config = configure(forward_mode="forward")
+    bot_handler.send_to_target(bot, MESSAGES[media_type](), TARGET_CHAT, config)
+    assert bot.call_names == ["forward_message"]
+
+@pytest.mark.parametrize("settings", COPY_SETTINGS)
+@pytest.mark.parametrize("media_type", MESSAGES)
+def test_copy_mode_sends_once(media_type, settings, bot, configure):
+    config = configure(forward_mode="copy", **COPY_SETTINGS[settings])
+    bot_handler.send_to_target(bot, MESSAGES[media_type](), TARGET_CHAT, config)
+    assert len(bot.calls) == 1, bot.call_names
+
+@pytest.mark.parametrize("media_type", MESSAGES)
+def test_deliver_message_records_the_single_send(media_type, bot, configure):
+    config = configure(forward_mode="copy", **COPY_SETTINGS["transformed"])
+    forwarded = bot_handler.stats["messages_forwarded"]
+
+    bot_handler.deliver_message(bot, MESSAGES[media_type](), TARGET_CHAT, config)
+
+    assert len(bot.calls) == 1, bot.call_names
+    assert bot_handler.stats["messages_forwarded"] == forwarded + 1
+    assert bot_handler.message_map_store.get_target_message_id(SOURCE_CHAT, 1, TARGET_CHAT) == 1
+
+def _album(*media_types):
+    items = []
+    for number, media_type in enumerate(media_types, 1):
+        item = MESSAGES[media_type]()
+        item.message_id = number
+        item.media_group_id = "album"
+        items.append(item)
+    return items
+
+def test_album_is_one_send_media_group_call(bot, configure):
+    config = configure(forward_mode="copy")
+    bot_handler.deliver_album(bot, _album("photo", "video", "document"), TARGET_CHAT, config)
+    assert bot.call_names == ["send_media_group"]
+
+def test_album_fallback_retries_only_the_failed_item(bot, configure, monkeypatch):
+    config = configure(forward_mode="copy")
+    monkeypatch.setattr(retry_engine, "get_backoff_delay", lambda *args: 0)
+    bot.errors[2] = TimedOut()
+
+    # Stickers cannot go into sendMediaGroup, so the items are sent one by one
+    bot_handler.deliver_album(bot, _album("photo", "sticker"), TARGET_CHAT, config)
+
+    # The photo went out once; only the sticker was sent again
+    assert len(bot.calls) == 3, bot.call_names
+    assert bot.call_names[1] == bot.call_names[2]
+    assert bot_handler.message_map_store.get_target_message_id(SOURCE_CHAT, 2, TARGET_CHAT) == 3
+
+def test_album_flood_wait_resumes_after_the_sent_items(bot, configure, monkeypatch):
+    config = configure(forward_mode="copy")
+    monkeypatch.setattr(send_queue._worker_state, "active", True, raising=False)
+    bot.errors[2] = RetryAfter(30)
+    items = _album("photo", "sticker")
+
+    # On a sender worker the flood wait is handed back to the worker instead of slept through
+    with pytest.raises(send_queue.RetryLater) as raised:
+        bot_handler.deliver_album(bot, items, TARGET_CHAT, config)
+
+    assert raised.value.retry_at == pytest.approx(time.time() + 30, abs=1)
+    _, args, _ = raised.value.job
+    assert args[1] == items[1:]
+    assert len(bot.calls) == 2
+
+def test_album_takes_a_rate_slot_per_item(bot, configure, monkeypatch):
+    config = configure(forward_mode="copy")
+    monkeypatch.setattr(rate_limit_handler, "buckets", {})
+    queued = []
+    monkeypatch.setattr(bot_handler.send_queue, "enqueue", lambda *args: queued.append(None))
+    monkeypatch.setattr(bot_handler.send_queue, "enqueue_at", lambda send_at, *args: queued.append(send_at))
+
+    bot_handler.queue_album_send(bot, _album(*["photo"] * 10), TARGET_CHAT, config)
+    bot_handler.queue_album_send(bot, _album("photo"), TARGET_CHAT, config)
+
+    # Ten items use up the burst and seven more slots of the per-target limit
+    interval = 60 / rate_limit_handler.TELEGRAM_CHANNEL_LIMIT
+    assert queued[0] is None
+    assert queued[1] == pytest.approx(
+        datetime.now().timestamp() + interval * (10 - rate_limit_handler.TELEGRAM_CHANNEL_BURST + 1), abs=1)
@@ -0,0 +1,82 @@
+"""Tests for the outbound send queue."""
+
+import json
+import random
+import threading
+import time
+
+import pytest
+
+import send_queue
+
+def test_stats_file_is_never_half_written(configure):
+    stop = threading.Event()
+
+    def export():
+        while not stop.is_set():
+            send_queue._export_stats(force=True)
+
+    exporters = [threading.Thread(target=export) for _ in range(4)]
+    for exporter in exporters:
+        exporter.start()
+    try:
+        send_queue._export_stats(force=True)
+        for _ in range(300):
+            with open(send_queue.STATS_FILE, encoding='utf-8') as file:
+                assert "processed" in json.load(file)
+    finally:
+        stop.set()
+        for exporter in exporters:
+            exporter.join()
+
+@pytest.fixture
+def workers(configure):
+    """Restart the sender workers with a given pool size for the test."""
+    def restart(count):
+        send_queue.stop()
+        send_queue.start(count)
+    yield restart
+    send_queue.stop()
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_jobs_of_a_target_keep_their_order(workers):
+    workers(4)
+    generator = random.Random(0)
+    sent = []
+
+    def send(target, number):
+        time.sleep(generator.random() / 1000)
+        sent.append((target, number))
+
+    for number in range(200):
+        send_queue.enqueue(-1000 - number % 7, send, number % 7, number)
+
+    assert _wait_for(lambda: len(sent) == 200)
+    for target in range(7):
+        numbers = [number for chat, number in sent if chat == target]
+        assert numbers == sorted(numbers)
+
+def test_flood_waits_do_not_stall_other_targets(workers):
+    workers(1)
+    started = time.time()
+    floods = [send_queue.RetryLater(started + 0.3)]
+    sent = []
+
+    def send(name):
+        if name == "first" and floods:
+            raise floods.pop()
+        sent.append((name, time.time() - started))
+
+    send_queue.enqueue(-1002, send, "first")
+    send_queue.enqueue(-1002, send, "second")
+    send_queue.enqueue(-1003, send, "other target")
+
+    assert _wait_for(lambda: len(sent) == 3)
+    # The other target went out at once; the flooded one waited and kept its order
+    assert [name for name, _ in sent] == ["other target", "first", "second"]
+    assert sent[0][1] < 0.3 <= sent[1][1]
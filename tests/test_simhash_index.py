@@ -0,0 +1,54 @@
+"""Tests for the SimHash near-duplicate index."""
+
+import random
+
+import simhash_index
+
+def _texts(seed):
+    generator = random.Random(seed)
+    words = [''.join(generator.choices('abcdefghijklmnopqrstuvwxyz', k=generator.randint(3, 8)))
+             for _ in range(5000)]
+    return generator, words
+
+def test_distance_is_capped():
+    assert simhash_index.get_max_distance(100) == 0
+    assert simhash_index.get_max_distance(80) == simhash_index.MAX_DISTANCE
+    assert simhash_index.get_max_distance(50) == simhash_index.MAX_DISTANCE
+    assert [simhash_index.get_max_distance(threshold) for threshold in (80, 85, 90, 95)] == [8, 6, 4, 2]
+
+def test_lookups_compare_few_candidates_and_no_unrelated_texts():
+    generator, words = _texts(1)
+    index = simhash_index.SimHashIndex(simhash_index.get_max_distance(80))
+    for number in range(10000):
+        index.add('', simhash_index.get_fingerprint(' '.join(generator.choices(words, k=30))), number)
+
+    candidates = matches = 0
+    for _ in range(200):
+        fingerprint = simhash_index.get_fingerprint(' '.join(generator.choices(words, k=30)))
+        candidates += sum(len(index.buckets.get(key, ())) for key in index._bucket_keys('', fingerprint))
+        matches += index.find('', fingerprint) is not None
+
+    assert candidates / 200 < 50
+    assert matches == 0
+
+def test_edited_posts_are_found():
+    generator, words = _texts(2)
+    index = simhash_index.SimHashIndex(simhash_index.get_max_distance(85))
+    found = checked = 0
+    for number in range(300):
+        post = generator.choices(words, k=30)
+        original = simhash_index.get_fingerprint(' '.join(post))
+        index.add('', original, number)
+        post[5] = generator.choice(words)
+        edited = simhash_index.get_fingerprint(' '.join(post))
+        if (original ^ edited).bit_count() <= index.max_distance:
+            checked += 1
+            found += index.find('', edited) is not None
+
+    assert found >= checked * 0.95
+
+def test_close_fingerprints_always_share_a_bucket():
+    index = simhash_index.SimHashIndex(3)
+    index.add('', 0, 0)
+    assert index.find('', (1 << 0) | (1 << 20) | (1 << 40)) == 0
+    assert index.find('', 1 << 63 | 1 << 62 | 1 << 17) == 0
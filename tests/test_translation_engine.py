@@ -0,0 +1,107 @@
+"""Tests for the translation memory, run against an offline backend."""
+
+import threading
+import time
+
+import pytest
+
+import translation_engine
+
+class CountingBackend(translation_engine.StubBackend):
+    """Stub backend that records its calls and can be held back or made to fail."""
+
+    def __init__(self):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.error = None
+
+    def translate(self, text, source, target):
+        self.calls.append(text)
+        self.started.set()
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return super().translate(text, source, target)
+
+@pytest.fixture
+def backend(configure):
+    """A fresh translation cache in the test directory, translating through CountingBackend."""
+    translation_engine.close()
+    instance = CountingBackend()
+    translation_engine.register_backend("counting", lambda: instance)
+    yield instance
+    instance.release.set()
+    translation_engine.close()
+
+def _config(**settings):
+    return dict({"translation_backend": "counting"}, **settings)
+
+def test_cache_hit_survives_a_restart(backend):
+    assert translation_engine.translate("Hello world.", "auto", "ar", _config()) == "[ar] Hello world."
+    translation_engine.close()
+
+    assert translation_engine.translate("Hello world.", "auto", "ar", _config()) == "[ar] Hello world."
+    assert backend.calls == ["Hello world."]
+
+def test_expired_translations_are_translated_again(backend):
+    config = _config(translation_cache_hours=1)
+    translation_engine.translate("Hello world.", "auto", "ar", config)
+    with translation_engine._db_lock:
+        connection = translation_engine._get_connection()
+        connection.execute("UPDATE translations SET created_at = ?", (time.time() - 2 * 3600,))
+        connection.commit()
+
+    translation_engine.translate("Hello world.", "auto", "ar", config)
+    assert backend.calls == ["Hello world.", "Hello world."]
+
+def test_repeated_sentences_come_from_the_memory(backend):
+    hits = translation_engine.get_stats()["hits"]
+
+    translation_engine.translate("Daily news.\nFirst story.", "auto", "ar", _config())
+    translated = translation_engine.translate("Daily news.\nSecond story.", "auto", "ar", _config())
+
+    assert translated == "[ar] Daily news.\n[ar] Second story."
+    assert backend.calls == ["Daily news.", "First story.", "Second story."]
+    assert translation_engine.get_stats()["hits"] == hits + 1
+
+def test_identical_requests_in_flight_share_one_call(backend):
+    backend.release.clear()
+    results = []
+    first = threading.Thread(target=lambda: results.append(
+        translation_engine.translate("Breaking news.", "auto", "ar", _config())))
+    first.start()
+    assert backend.started.wait(5)
+
+    second = threading.Thread(target=lambda: results.append(
+        translation_engine.translate("Breaking news.", "auto", "ar", _config())))
+    second.start()
+    time.sleep(0.1)
+    backend.release.set()
+    first.join(5)
+    second.join(5)
+
+    assert results == ["[ar] Breaking news."] * 2
+    assert backend.calls == ["Breaking news."]
+
+def test_timeouts_forward_the_original_text(backend):
+    backend.release.clear()
+    config = _config(translation_timeout=0.1)
+    assert translation_engine.translate("Slow service.", "auto", "ar", config) == "Slow service."
+
+    # The translation finishes in the background and serves the next message
+    backend.release.set()
+    deadline = time.time() + 5
+    while translation_engine._inflight and time.time() < deadline:
+        time.sleep(0.01)
+    assert translation_engine.translate("Slow service.", "auto", "ar", config) == "[ar] Slow service."
+    assert backend.calls == ["Slow service."]
+
+def test_backend_errors_forward_the_original_text(backend):
+    backend.error = RuntimeError("service unavailable")
+    assert translation_engine.translate("Hello again.", "auto", "ar", _config()) == "Hello again."
+
+    # Failures are not cached
+    backend.error = None
+    assert translation_engine.translate("Hello again.", "auto", "ar", _config()) == "[ar] Hello again."
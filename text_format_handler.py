@@ -1,36 +1,24 @@
 """
 Module for handling text formatting functionality in the Telegram bot.
-This module contains functions for plain text conversion and bold text conversion.
+This module contains functions for plain text conversion and bold text conversion,
+which work on the message entities instead of rewriting the text.
 """
 
-import json
 import logging
-import re
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, MessageEntity, ParseMode, Update
 from telegram.ext import CallbackContext
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def text_format_menu(update, context):
     """Show the text formatting menu."""
@@ -155,80 +143,44 @@ def toggle_bold_text_status(update, context):
             ]])
         )
 
-def convert_to_plain_text(text):
-    """Convert rich text (Markdown/HTML) to plain text.
-    
-    Args:
-        text (str): The text to convert
-        
-    Returns:
-        str: Plain text without formatting
-    """
-    if not text:
-        return text
-    
-    # Remove HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
-    
-    # Remove Markdown formatting
-    # Remove bold
-    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
-    text = re.sub(r'\*(.*?)\*', r'\1', text)
-    
-    # Remove italic
-    text = re.sub(r'__(.*?)__', r'\1', text)
-    text = re.sub(r'_(.*?)_', r'\1', text)
-    
-    # Remove code
-    text = re.sub(r'```(.*?)```', r'\1', text, flags=re.DOTALL)
-    text = re.sub(r'`(.*?)`', r'\1', text)
-    
-    # Remove blockquotes
-    text = re.sub(r'> ', '', text)
-    
-    # Remove URL formatting but keep the URL
-    text = re.sub(r'\[(.*?)\]\((.*?)\)', r'\1 (\2)', text)
-    
-    return text
+def utf16_length(text):
+    """Return the length of a text in UTF-16 code units, the unit of Telegram entity offsets."""
+    return len(text.encode('utf-16-le')) // 2
 
-def convert_to_bold_text(text):
-    """Convert plain text to bold text using HTML formatting.
-    
-    Args:
-        text (str): The text to convert
-        
-    Returns:
-        str: Text with bold formatting
-    """
-    if not text:
-        return text
-    
-    # First convert to plain text to remove any existing formatting
-    text = convert_to_plain_text(text)
-    
-    # Wrap the entire text in bold tags
-    return f"<b>{text}</b>"
+def shift_entities(entities, offset):
+    """Return copies of the entities moved by offset UTF-16 code units (e.g. past a header)."""
+    if not offset:
+        return list(entities)
+    return [
+        MessageEntity(entity.type, entity.offset + offset, entity.length,
+                      url=entity.url, user=entity.user, language=entity.language)
+        for entity in entities
+    ]
 
-def apply_text_formatting(text, config):
-    """Apply text formatting based on configuration.
+def apply_entity_formatting(text, entities, config):
+    """Apply text formatting to the entities of a text based on configuration.
+    
+    Formatting never touches the text itself: plain text drops every entity and
+    bold text replaces them with one bold entity spanning the whole text.
     
     Args:
-        text (str): The original text
+        text (str): The text the entities belong to
+        entities (list): The MessageEntity list of the text
         config (dict): The bot configuration
         
     Returns:
-        str: The formatted text
+        list: The formatted entities
     """
     if not text:
-        return text
+        return entities
     
     # Check if plain text conversion is enabled
     if config.get("plain_text_conversion_enabled", False):
-        return convert_to_plain_text(text)
+        return []
     
     # Check if bold text conversion is enabled
     if config.get("bold_text_conversion_enabled", False):
-        return convert_to_bold_text(text)
+        return [MessageEntity(MessageEntity.BOLD, 0, utf16_length(text))]
     
-    # If no formatting is enabled, return the original text
-    return text
\ No newline at end of file
+    # If no formatting is enabled, keep the original entities
+    return entities
@@ -0,0 +1,297 @@
+"""
+Module for translating message texts with a persistent translation memory.
+Texts are split into sentences and each sentence is stored in SQLite keyed on
+(source, target, normalized text), so recurring posts, boilerplate paragraphs,
+headers and footers are translated once. Translator calls run on
+a small worker pool with a timeout, and identical requests in flight share one call.
+"""
+
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# SQLite cache of translations (WAL mode, shared between bot processes)
+TRANSLATION_DB_FILE = 'translation_cache.db'
+PRUNE_INTERVAL = 300
+_connection = None
+_last_prune = 0
+_db_lock = threading.Lock()
+
+# Default cache limits ("translation_cache_size" and "translation_cache_hours" in config.json)
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_HOURS = 720
+
+# Translator calls run on this many worker threads; a message waits at most
+# "translation_timeout" seconds and is forwarded untranslated after that
+TRANSLATION_WORKERS = 2
+DEFAULT_TIMEOUT = 10
+_executor = None
+_executor_lock = threading.Lock()
+
+# Texts are translated per sentence: split after sentence punctuation and at line breaks
+_SEPARATOR_PATTERN = re.compile(r'((?<=[.!?؟。])[ \t]+|\n+)')
+
+# Translation memory statistics (segments found in the cache vs sent to the translator)
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# Requests being translated right now: cache key -> Future
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+class TranslationBackend:
+    """Interface of a translation service."""
+
+    def translate(self, text, source, target):
+        """Translate text from source ('auto' to detect) to target and return the translation."""
+        raise NotImplementedError
+
+class GoogleBackend(TranslationBackend):
+    """Translation through googletrans."""
+
+    def __init__(self):
+        from googletrans import Translator
+        self.translator = Translator()
+
+    def translate(self, text, source, target):
+        if source == 'auto':
+            translated = self.translator.translate(text, dest=target)
+        else:
+            translated = self.translator.translate(text, src=source, dest=target)
+        logger.info(f"Translated text from {translated.src} to {target}")
+        return translated.text
+
+class StubBackend(TranslationBackend):
+    """Offline backend that tags the text with the target language, for testing without network."""
+
+    def translate(self, text, source, target):
+        return f"[{target}] {text}"
+
+# Backend factories by name ("translation_backend" in config.json)
+BACKENDS = {
+    "google": GoogleBackend,
+    "stub": StubBackend
+}
+DEFAULT_BACKEND = "google"
+_backends = {}
+_backends_lock = threading.Lock()
+
+def register_backend(name, factory):
+    """Make a backend available under a name for the "translation_backend" setting."""
+    BACKENDS[name] = factory
+    with _backends_lock:
+        _backends.pop(name, None)
+
+def get_backend(name=None):
+    """Return the shared backend instance for a name, creating it on first use."""
+    name = name or DEFAULT_BACKEND
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            factory = BACKENDS.get(name)
+            if factory is None:
+                logger.error(f"Unknown translation backend '{name}', using {DEFAULT_BACKEND}")
+                factory = BACKENDS[DEFAULT_BACKEND]
+            backend = _backends[name] = factory()
+        return backend
+
+def normalize_text(text):
+    """Return the form of a text used for the cache key (line endings unified, outer whitespace stripped)."""
+    return text.replace('\r\n', '\n').strip()
+
+def get_cache_key(text, source, target):
+    """Return the (source, target, text hash) cache key of a normalized text."""
+    return (source, target, hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest())
+
+def _get_connection():
+    """Open the SQLite cache on first use (caller holds _db_lock)."""
+    global _connection
+    if _connection is None:
+        connection = sqlite3.connect(TRANSLATION_DB_FILE, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "source TEXT NOT NULL, target TEXT NOT NULL, text_hash TEXT NOT NULL, "
+            "translated TEXT NOT NULL, created_at REAL NOT NULL, "
+            "PRIMARY KEY (source, target, text_hash))"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS ix_translations_created_at ON translations (created_at)"
+        )
+        connection.commit()
+        _connection = connection
+    return _connection
+
+def _get_limits(config):
+    """Return (max_count, max_age in seconds) of the cache from the configuration."""
+    max_count = config.get("translation_cache_size", DEFAULT_CACHE_SIZE)
+    max_age = config.get("translation_cache_hours", DEFAULT_CACHE_HOURS) * 3600
+    return max_count, max_age
+
+def get_cached_many(keys, config):
+    """Return {key: translation} for the keys found in the cache and not expired.
+
+    All keys must share the same source and target language, so one query covers them.
+    """
+    if not keys:
+        return {}
+    _, max_age = _get_limits(config)
+    source, target = keys[0][:2]
+    hashes = [key[2] for key in keys]
+    with _db_lock:
+        rows = _get_connection().execute(
+            "SELECT text_hash, translated FROM translations WHERE source = ? AND target = ? "
+            f"AND text_hash IN ({', '.join('?' * len(hashes))}) AND created_at >= ?",
+            [source, target] + hashes + [time.time() - max_age if max_age else 0]
+        ).fetchall()
+    return {(source, target, text_hash): translated for text_hash, translated in rows}
+
+def store(key, translated, config):
+    """Store a translation and prune the cache now and then."""
+    global _last_prune
+    max_count, max_age = _get_limits(config)
+    now = time.time()
+    with _db_lock:
+        connection = _get_connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO translations (source, target, text_hash, translated, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            key + (translated, now)
+        )
+        if now - _last_prune >= PRUNE_INTERVAL:
+            _last_prune = now
+            if max_age:
+                connection.execute("DELETE FROM translations WHERE created_at < ?", (now - max_age,))
+            connection.execute(
+                "DELETE FROM translations WHERE rowid IN ("
+                "SELECT rowid FROM translations ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (max_count,)
+            )
+        connection.commit()
+
+def _get_executor():
+    """Start the translation worker pool on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRANSLATION_WORKERS, thread_name_prefix="translate")
+        return _executor
+
+def _run_translation(key, text, source, target, config):
+    """Translate on a worker thread and cache the result."""
+    try:
+        translated = get_backend(config.get("translation_backend")).translate(text, source, target)
+        store(key, translated, config)
+        return translated
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+def split_segments(text):
+    """Split a text into sentences and the separators between them.
+
+    Returns:
+        list: Alternating [segment, separator, segment, ...]; joining it gives back the text
+    """
+    return _SEPARATOR_PATTERN.split(text)
+
+def _submit(key, text, source, target, config):
+    """Return the future translating a segment, starting one unless it is already in flight."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is None:
+            future = _inflight[key] = _get_executor().submit(
+                _run_translation, key, text, source, target, config)
+        return future
+
+def _record_stats(hits, misses):
+    """Add segment lookups to the translation memory statistics."""
+    with _stats_lock:
+        _stats["hits"] += hits
+        _stats["misses"] += misses
+
+def get_stats():
+    """Return translation memory statistics: segment hits, misses and hit ratio in percent."""
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits * 100 / total, 1) if total else 0.0
+    }
+
+def translate(text, source, target, config):
+    """Translate a text sentence by sentence through the translation memory.
+
+    Sentences found in the cache are reused; only the missing ones are sent to
+    the translator, in parallel, and identical sentences in flight share one
+    call. Posts that repeat boilerplate paragraphs therefore only pay for the
+    lines that changed.
+
+    Args:
+        text (str): The text to translate
+        source (str): The source language code, or 'auto'
+        target (str): The target language code
+        config: The configuration snapshot
+
+    Returns:
+        str: The translation; sentences that failed or timed out stay untranslated
+    """
+    parts = split_segments(text)
+    keys = {}
+    for index in range(0, len(parts), 2):
+        normalized = normalize_text(parts[index])
+        # Numbers, emoji and punctuation-only segments are kept as they are
+        if any(char.isalpha() for char in normalized):
+            keys[index] = get_cache_key(normalized, source, target)
+    if not keys:
+        return text
+
+    cached = get_cached_many(list(set(keys.values())), config)
+    futures = {}
+    for index, key in keys.items():
+        if key not in cached and key not in futures:
+            futures[key] = _submit(key, normalize_text(parts[index]), source, target, config)
+    _record_stats(len(keys) - len(futures), len(futures))
+
+    translations = dict(cached)
+    if futures:
+        deadline = time.monotonic() + config.get("translation_timeout", DEFAULT_TIMEOUT)
+        for key, future in futures.items():
+            try:
+                translations[key] = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except FutureTimeoutError:
+                # The translation keeps running and fills the cache for the next message
+                logger.warning("Translation timed out, forwarding the sentence untranslated")
+            except Exception as e:
+                logger.error(f"Translation error: {str(e)}")
+
+    for index, key in keys.items():
+        if key in translations:
+            segment = parts[index]
+            # Keep the whitespace around the sentence, which the cache key strips
+            leading = segment[:len(segment) - len(segment.lstrip())]
+            trailing = segment[len(segment.rstrip()):]
+            parts[index] = leading + translations[key] + trailing
+    return ''.join(parts)
+
+def close():
+    """Stop the worker pool and close the SQLite cache, e.g. on shutdown."""
+    global _connection, _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+    with _db_lock:
+        if _connection is not None:
+            _connection.close()
+            _connection = None
@@ -4,17 +4,15 @@ This module contains all functions related to translating messages before forwar
 """
 
 import logging
-import json
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
-from googletrans import Translator, LANGUAGES
+from googletrans import LANGUAGES
+import config_store
+import translation_engine
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Create a global translator instance
-translator = Translator()
-
 # State constants for conversation handlers
 WAITING_TRANSLATE_SOURCE = range(1)
 WAITING_TRANSLATE_TARGET = range(1)
@@ -46,22 +44,11 @@ LANGUAGES_AR = {
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        logger.error("Failed to load config.json")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w') as f:
-            json.dump(config, f, indent=4)
-        return True
-    except Exception as e:
-        logger.error(f"Error saving config: {str(e)}")
-        return False
+    return config_store.save_config(config)
 
 def translation_menu(update, context):
     """Show the translation settings menu."""
@@ -91,11 +78,15 @@ def translation_menu(update, context):
     
     reply_markup = InlineKeyboardMarkup(keyboard)
     
+    memory_stats = translation_engine.get_stats()
+    
     message = "🌐 *إعدادات الترجمة التلقائية*\n\n" \
               "هذه الميزة تقوم بترجمة الرسائل تلقائياً قبل توجيهها.\n\n" \
               f"الحالة الحالية: {translation_status}\n" \
               f"اللغة المصدر: {source_lang_name}\n" \
               f"اللغة الهدف: {target_lang_name}\n\n" \
+              f"ذاكرة الترجمة: {memory_stats['hit_ratio']}% من الجمل مترجمة مسبقاً " \
+              f"({memory_stats['hits']} موجودة، {memory_stats['misses']} جديدة)\n\n" \
               "ملاحظة: اختيار 'تلقائي' للغة المصدر يسمح بالكشف التلقائي عن لغة الرسالة."
     
     # Edit message if it exists, otherwise send new message
@@ -298,11 +289,9 @@ def test_translation(update, context):
     test_text = "Hello, this is a test of the automatic translation feature."
     
     try:
-        # Translate the test text
-        if source_lang == 'auto':
-            translated = translator.translate(test_text, dest=target_lang)
-        else:
-            translated = translator.translate(test_text, src=source_lang, dest=target_lang)
+        # Translate the test text directly with the backend, bypassing the cache
+        translated = translation_engine.get_backend(config.get("translation_backend")).translate(
+            test_text, source_lang, target_lang)
         
         message = "🌐 *اختبار الترجمة*\n\n" \
                  f"النص الأصلي:\n" \
@@ -310,7 +299,7 @@ def test_translation(update, context):
                  f"اللغة المصدر: {source_lang_name}\n" \
                  f"اللغة الهدف: {target_lang_name}\n\n" \
                  f"النص المترجم:\n" \
-                 f"`{translated.text}`\n\n" \
+                 f"`{translated}`\n\n" \
                  f"لتغيير إعدادات الترجمة، عد إلى قائمة الترجمة."
     except Exception as e:
         message = "❌ *خطأ في الترجمة*\n\n" \
@@ -328,8 +317,8 @@ def translate_text(text, config=None):
     if not text:
         return text
         
-    if not config:
-        config = load_config()
+    if config is None:
+        config = config_store.get_config()
     
     # Check if translation is enabled
     if not config.get("auto_translate_enabled", False):
@@ -338,14 +327,6 @@ def translate_text(text, config=None):
     source_lang = config.get("translate_source", "auto")
     target_lang = config.get("translate_target", "ar")
     
-    try:
-        if source_lang == 'auto':
-            translated = translator.translate(text, dest=target_lang)
-        else:
-            translated = translator.translate(text, src=source_lang, dest=target_lang)
-            
-        logger.info(f"Translated text from {translated.src} to {target_lang}")
-        return translated.text
-    except Exception as e:
-        logger.error(f"Translation error: {str(e)}")
-        return text  # Return original text if translation fails
\ No newline at end of file
+    # Cached, shared between identical requests and bounded by translation_timeout;
+    # the original text is returned if translation fails
+    return translation_engine.translate(text, source_lang, target_lang, config)
@@ -54,6 +54,14 @@ def save_config(config):
         logger.error(f"خطأ في حفظ الإعدادات: {str(e)}")
         return False
 
+def get_send_queue_stats():
+    """جلب مقاييس طابور الإرسال التي يصدّرها البوت"""
+    try:
+        with open('send_queue_stats.json', 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
 def get_bot_stats():
     """جلب إحصائيات البوت"""
     # استخدام البيانات الافتراضية إذا لم يتم العثور على الإحصائيات
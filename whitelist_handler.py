@@ -5,6 +5,7 @@ This module contains all functions related to whitelisted words and phrases.
 
 import logging
 import main
+import keyword_matcher
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode
 from telegram.ext import ConversationHandler
 
@@ -18,16 +19,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Whitelist check function
-def contains_whitelisted_words(text, whitelist):
-    """Check if a message contains any whitelisted words."""
+def find_whitelisted_word(text, whitelist, normalize=False):
+    """Return the first whitelisted word found in a message, or None.
+    
+    With normalize=True Arabic spelling variants (diacritics, alef forms, ...) also match.
+    """
     if not text or not whitelist:
-        # No whitelist or no text means whitelist check passes
-        return True
+        return None
     
-    # If whitelist exists, the message must contain at least one whitelisted word
-    text_lower = text.lower()
-    return any(word.lower() in text_lower for word in whitelist)
+    return keyword_matcher.get_matcher(whitelist, normalize).search(text)
 
 # Main menu for whitelist management
 def toggle_whitelist_status(update, context):
@@ -3,11 +3,10 @@ Module for handling working hours functionality in the Telegram bot.
 This module contains all functions related to setting active and inactive hours for the bot.
 """
 
-import json
 import logging
-from datetime import datetime
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, ParseMode, Update
 from telegram.ext import CallbackContext, ConversationHandler
+import config_store
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -18,23 +17,11 @@ WAITING_END_HOUR = 2
 
 def load_config():
     """Load bot configuration from config.json file"""
-    try:
-        with open('config.json', 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            return config
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        logger.error(f"Error loading config: {e}")
-        return {}
+    return config_store.load_config()
 
 def save_config(config):
     """Save configuration to config.json file"""
-    try:
-        with open('config.json', 'w', encoding='utf-8') as file:
-            json.dump(config, file, ensure_ascii=False, indent=2)
-            return True
-    except Exception as e:
-        logger.error(f"Error saving config: {e}")
-        return False
+    return config_store.save_config(config)
 
 def working_hours_menu(update, context):
     """Show the working hours menu."""
@@ -250,26 +237,17 @@ def set_end_hour_callback(update, context):
             ]])
         )
 
-def is_within_working_hours():
-    """Check if current time is within working hours.
+def is_hour_in_range(current_hour, start_hour, end_hour):
+    """Check if an hour falls inside the [start_hour, end_hour) working window.
     
+    Args:
+        current_hour (int): The hour to check (0-23)
+        start_hour (int): First working hour
+        end_hour (int): Hour at which work stops
+        
     Returns:
-        bool: True if current time is within working hours, False otherwise
+        bool: True if the hour is within working hours, False otherwise
     """
-    # Load config
-    config = load_config()
-    
-    # Check if feature is enabled
-    if not config.get("working_hours_enabled", False):
-        return True  # If feature is disabled, always return True
-    
-    # Get working hours
-    start_hour = config.get("working_hours_start", 9)
-    end_hour = config.get("working_hours_end", 21)
-    
-    # Get current hour
-    current_hour = datetime.now().hour
-    
     # Handle cases where end_hour is before start_hour (overnight)
     if start_hour <= end_hour:
         # Normal case (e.g., 9:00 to 17:00)